@@ -2,7 +2,8 @@
 
 from pathlib import Path, PurePosixPath
 from pprint import pprint
-from scripts.polybar import util
+from concurrent.futures import ThreadPoolExecutor
+from scripts.polybar import lastknown, spawns, util
 import click
 import configparser
 import getpass
@@ -14,17 +15,25 @@ import re
 import signal
 import subprocess
 import sys
+import threading
 import time
 
 # Constants
+BACKGROUND_WORKERS = 8
 BAR_NAME = 'main'
+BUNDLE_NAME = 'polybar-scripts.pyz'
 CONFIG_FILE = Path(PurePosixPath(util.get_config_directory())) / 'config.ini'
 CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
+IPC_TIMEOUT = 10
 LOGFILE = Path.home() / f'polybar-{BAR_NAME}.log'
 STATEFILE = Path.home() / '.polybar-launch-state.json'
+STARTUP_STAGGER = 0.25
+STOP_TIMEOUT = 5
 
 # Globals
+BUNDLE : str | None = None
 CONFIG : configparser.ConfigParser | None = None
+ENABLED_MODULES : list | None = None
 IPC_ENABLED : bool | None = None
 PROCESS_NAME : str | None = None
 
@@ -58,6 +67,8 @@ def get_background_scripts():
                 cmdline = ' '.join(list(proc.info['cmdline']))
                 if len(proc.info['cmdline']) > 2:
                     cmd_short = ' '.join(list(proc.info['cmdline'][:2]))
+                    if proc.info['cmdline'][1].endswith(BUNDLE_NAME) and len(proc.info['cmdline']) > 3:
+                        cmd_short = ' '.join(list(proc.info['cmdline'][:3]))
                 if cmdline.startswith('python3') and util.get_script_directory() in cmdline and proc.info.get('username') == getpass.getuser():
                     new_process = {
                         'cmd_short': cmd_short,
@@ -176,11 +187,27 @@ def parse_config():
 
     return parser
 
+def get_bundle() -> str | None:
+    """
+    Return the path of the precompiled bundle built by tools/build-bundle.py
+    if it exists and isn't older than the scripts it was built from
+    """
+    bundle = os.path.join(util.get_script_directory(), BUNDLE_NAME)
+    if not util.file_is_executable(bundle):
+        return None
+
+    sources = list(Path(util.get_script_directory()).glob('*.py')) + list(Path(util.get_script_directory()).glob('polybar/*.py'))
+    if len(sources) > 0 and os.path.getmtime(bundle) < max(os.path.getmtime(source) for source in sources):
+        logging.warning(f'{bundle} is older than the scripts it bundles; run tools/build-bundle.py to rebuild it')
+        return None
+
+    return bundle
+
 def setup(debug: bool=False):
     """
     Run some quick checks and return relevant bits
     """
-    global CONFIG, IPC_ENABLED, PROCESS_NAME
+    global BUNDLE, CONFIG, IPC_ENABLED, PROCESS_NAME
 
     for binary in ['polybar', 'polybar-msg']:
         if not util.is_binary_installed(binary):
@@ -192,6 +219,9 @@ def setup(debug: bool=False):
 
     PROCESS_NAME = f'{util.is_binary_installed('polybar')} {BAR_NAME}'
     CONFIG = parse_config()
+    BUNDLE = get_bundle()
+    if BUNDLE:
+        logging.debug(f'using the precompiled bundle {BUNDLE}')
 
     if f'bar/{BAR_NAME}' in CONFIG:
         if 'enable-ipc' in CONFIG[f'bar/{BAR_NAME}']:
@@ -218,7 +248,8 @@ def start_polybar():
     stop_scripts()
     pid = launch_polybar()
     background_processes()
-    time.sleep(2)
+    wait_for_polybar(pid=pid)
+    populate_modules(pid=pid)
     write_launch_state(pid=pid)
 
 def launch_polybar():
@@ -247,12 +278,44 @@ def launch_polybar():
                 stderr     = subprocess.STDOUT,
                 preexec_fn = os.setpgrp  # Detach like 'disown'
             )
+            spawns.record(command=[command])
             print(f'successfully launched polybar with PID {proc.pid}')
             return proc.pid
     except Exception as e:
         logging.error(f'failed to launch polybar: {e}')
         sys.exit(1)
 
+def get_ipc_socket(pid: int=0) -> str:
+    """
+    Return the path of the IPC socket polybar creates for a given PID
+    """
+    return os.path.join(util.get_runtime_directory(), f'ipc.{pid}.sock')
+
+def wait_for_polybar(pid: int=0, timeout: float=IPC_TIMEOUT) -> bool:
+    """
+    Wait until polybar is ready to take IPC messages, which is signalled by
+    its IPC socket appearing, or until it exits or the timeout expires
+    """
+    global IPC_ENABLED
+
+    if not IPC_ENABLED:
+        return process_is_alive(pid=pid) is not False
+
+    socket = get_ipc_socket(pid=pid)
+    start = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(socket):
+            logging.debug(f'polybar was ready after {(time.perf_counter() - start) * 1000:.1f} ms')
+            return True
+        if not psutil.pid_exists(pid):
+            logging.error(f'polybar (PID {pid}) exited during startup; see {LOGFILE}')
+            return False
+        time.sleep(.05)
+
+    logging.warning(f'{socket} didn\'t appear within {timeout} seconds')
+    return False
+
 def write_launch_state(pid: int=0):
     try:
         proc = psutil.Process(pid)
@@ -281,18 +344,129 @@ def background_processes():
 
     all_modules = sorted([section.replace('module/', '') for section in CONFIG.sections() if section.startswith('module/')])
     common_modules = sorted(list(set(find_enabled_modules()) & set(all_modules)))
+    if len(common_modules) == 0:
+        return
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(BACKGROUND_WORKERS, len(common_modules))) as executor:
+        results = list(executor.map(lambda module_name: timed_background(module_name=module_name), common_modules))
+
+    errors = []
+    for module_name, error, duration in results:
+        logging.debug(f'{module_name} took {duration * 1000:.1f} ms to launch')
+        if error:
+            errors.append(module_name)
+            logging.error(error)
+
+    logging.debug(f'launched {len(common_modules)} {"module" if len(common_modules) == 1 else "modules"} in {(time.perf_counter() - start) * 1000:.1f} ms')
+    if len(errors) > 0:
+        logging.error(f'failed to launch {len(errors)} background {"module" if len(errors) == 1 else "modules"}: {", ".join(errors)}')
+
+def timed_background(module_name: str=None) -> tuple[str, str | None, float]:
+    """
+    Run background() for a module and return its name, error and duration
+    """
+    start = time.perf_counter()
+    error = background(module_name=module_name)
+    return module_name, error, time.perf_counter() - start
+
+def get_module_config(module_name: str=None) -> dict:
+    """
+    Return the configuration for a module with any inherited sections merged in
+    """
+    global CONFIG
+
+    module_config = {}
+    section = f'module/{module_name}'
+    seen = set()
+    while section in CONFIG and section not in seen:
+        seen.add(section)
+        module_config = dict(CONFIG[section]) | module_config
+        section = CONFIG[section].get('inherit', '').strip()
+
+    module_config.pop('inherit', None)
+    return module_config
+
+def get_initial_hook(module_config: dict={}, key: str=None) -> int | None:
+    """
+    Return the hook an initial or background-initial key names, counting
+    from 0, or None if it's unset or 0
+    """
+    value = module_config.get(key, '').strip()
+    return int(value) - 1 if value.isdigit() and int(value) > 0 else None
+
+def run_hooks(pid: int=0, hooks: list=[]):
+    """
+    Fire each (module, hook) pair STARTUP_STAGGER seconds apart
+    """
+    for module_name, hook in hooks:
+        logging.debug(f'running hook-{hook} for {module_name}')
+        util.run_piped_command(['polybar-msg', '-p', str(pid), 'action', f'#{module_name}.hook.{hook}'])
+        time.sleep(STARTUP_STAGGER)
+
+def populate_modules(pid: int=0):
+    """
+    Put each ipc module's last known output on the bar, then fire the hooks
+    named by background-initial one module at a time rather than all at
+    once. Modules using polybar's own initial are left to polybar, which
+    has already run their hook.
+    """
+    global CONFIG, IPC_ENABLED
+
+    if not IPC_ENABLED:
+        logging.debug('ipc is disabled; not populating modules')
+        return
+
+    all_modules = sorted([section.replace('module/', '') for section in CONFIG.sections() if section.startswith('module/')])
+    common_modules = sorted(list(set(find_enabled_modules()) & set(all_modules)))
+    hooks = []
     for module_name in common_modules:
-        background(module_name=module_name)
+        module_config = get_module_config(module_name=module_name)
+        if module_config.get('type') != 'custom/ipc':
+            continue
+
+        try:
+            interval = int(module_config.get('background-arg-interval', 300))
+        except ValueError:
+            interval = 300
+
+        initial = get_initial_hook(module_config=module_config, key='initial')
+        background_initial = get_initial_hook(module_config=module_config, key='background-initial')
+        if initial is not None:
+            # Sending the last known output now could replace what the hook
+            # polybar already ran put there
+            if background_initial is not None:
+                logging.warning(f'module/{module_name} sets both initial and background-initial; only initial is used')
+            continue
+
+        output = lastknown.get_output(module=module_name, max_age=interval * 2)
+        if output:
+            logging.debug(f'populating {module_name} with its last known output')
+            util.run_piped_command(['polybar-msg', '-p', str(pid), 'action', f'#{module_name}.send.{output}'])
+
+        if background_initial is not None:
+            hooks.append((module_name, background_initial))
+
+    # The stagger grows with the number of modules, so it runs alongside the
+    # rest of startup; launch.py doesn't exit until it's done
+    if len(hooks) > 0:
+        threading.Thread(target=run_hooks, kwargs={'pid': pid, 'hooks': hooks}, name='initial-hooks').start()
 
 def find_enabled_modules() -> list:
     """
     Return a list of enabled modules from config.ini
     """
-    enabled_modules = []
+    global ENABLED_MODULES
+
+    if ENABLED_MODULES is not None:
+        return ENABLED_MODULES
 
-    for orientation in ['left', 'right']:
-        command = f'polybar --dump=modules-{orientation}'
-        rc, stdout, _ = util.run_piped_command(command)
+    commands = [f'polybar --dump=modules-{orientation}' for orientation in ['left', 'right']]
+    with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+        results = list(executor.map(util.run_piped_command, commands))
+
+    enabled_modules = []
+    for command, (rc, stdout, _) in zip(commands, results):
         if rc == 0:
             for module in re.split(r'\s+', stdout):
                 if len(module) > 0:
@@ -301,21 +475,22 @@ def find_enabled_modules() -> list:
             print(f'failed to execute "{command}"')
             sys.exit(1)
 
-    return sorted(enabled_modules)
+    ENABLED_MODULES = sorted(enabled_modules)
+    return ENABLED_MODULES
 
-def background(module_name: str=None):
+def background(module_name: str=None) -> str | None:
     """
     Attempt to put a module into the background with its configured flags
+    and return an error message if it couldn't be
     """
-    global CONFIG
+    global BUNDLE
 
     try:
-        module_config = dict(CONFIG[f'module/{module_name}'])
+        module_config = get_module_config(module_name=module_name)
         if 'background' in module_config:
             module_config['background'] = True if module_config['background'] == 'true' else False
     except Exception as e:
-        logging.error(f'failed to parse the configuration for module/{module_name}: {e}')
-        sys.exit(1)
+        return f'failed to parse the configuration for module/{module_name}: {e}'
 
     if 'background-script' in module_config:
         script_name = os.path.join(util.get_script_directory(), f'{module_config["background-script"]}')
@@ -325,14 +500,15 @@ def background(module_name: str=None):
     if 'background' in module_config:
         if module_config['background']:
             if not util.file_exists(script_name):
-                logging.error(f'the script {script_name} doesn\'t exist')
-                sys.exit(1)
+                return f'the script {script_name} doesn\'t exist'
 
             if not util.file_is_executable(script_name):
-                logging.error(f'the script {script_name} isn\'t executable')
-                sys.exit(1)
+                return f'the script {script_name} isn\'t executable'
 
-            command_bits = [ script_name ]
+            if BUNDLE:
+                command_bits = [ BUNDLE, os.path.splitext(os.path.basename(script_name))[0] ]
+            else:
+                command_bits = [ script_name ]
 
             if 'background-action' in module_config:
                 command_bits.append(module_config['background-action'])
@@ -347,13 +523,16 @@ def background(module_name: str=None):
 
             try:
                 logging.debug(f'attempting to launch {os.path.basename(script_name)} in the background with "{command}"')
-                _ = util.run_piped_command(command=command, background=True)
+                result = util.run_piped_command(command=command, background=True)
+                if isinstance(result, tuple):
+                    return f'failed to execute "{command}": {result[2]}'
             except Exception as e:
-                logging.error(f'failed to execute "{command}": {e}')
-                sys.exit(1)
+                return f'failed to execute "{command}": {e}'
         else:
             logging.warning(f'the module {module_name} cannot be launched in the background due to a configuration setting')
 
+    return None
+
 #----------------------------
 # Stop functions
 #----------------------------
@@ -368,9 +547,27 @@ def stop_polybar(pid: str=None):
 
     print('stopping polybar')
     kill_polybar_if_running(pid=pid)
-    time.sleep(.5)
+    wait_for_exit(pids=[pid.get('pid')], timeout=STOP_TIMEOUT)
     stop_scripts()
 
+def wait_for_exit(pids: list=[], timeout: float=STOP_TIMEOUT) -> list:
+    """
+    Wait until every PID has exited or the timeout expires and return the
+    PIDs that are still alive
+    """
+    processes = []
+    for pid in pids:
+        try:
+            processes.append(psutil.Process(pid))
+        except psutil.NoSuchProcess:
+            continue
+
+    start = time.perf_counter()
+    _, alive = psutil.wait_procs(processes, timeout=timeout)
+    logging.debug(f'waited {(time.perf_counter() - start) * 1000:.1f} ms for {len(processes)} {"process" if len(processes) == 1 else "processes"} to exit')
+
+    return [proc.pid for proc in alive]
+
 def kill_polybar_if_running(pid: str=None):
     """
     Kill polybar if it's running
@@ -418,14 +615,13 @@ def stop_scripts():
             except psutil.AccessDenied:
                 logging.error(f'permission denied stopping PID {pid}')
 
-            time.sleep(.5)
-
-            # Make sure it's gone
-            try:
-                proc = psutil.Process(pid)
-                logging.error(f'process "{cmd}" with PID ({pid}) was not successfully stopped')
-            except psutil.NoSuchProcess:
-                logging.debug(f'successfully stopped PID {pid}')
+        # Make sure they're gone
+        alive = wait_for_exit(pids=[process['pid'] for process in processes], timeout=STOP_TIMEOUT)
+        for process in processes:
+            if process['pid'] in alive:
+                logging.error(f'process "{process["cmd_short"]}" with PID ({process["pid"]}) was not successfully stopped')
+            else:
+                logging.debug(f'successfully stopped PID {process["pid"]}')
 
 @click.group(context_settings=CONTEXT_SETTINGS)
 def cli():
@@ -451,7 +647,6 @@ def stop(debug, pid):
 def restart(debug, pid):
     setup(debug=debug)
     stop_polybar()
-    time.sleep(.5)
     start_polybar()
 
 @cli.command(name='status', help='Get the status of polybar and its background modules')
@@ -489,6 +684,42 @@ def status(debug, pid, detail):
 
     sys.exit(0)
 
+@cli.command(name='spawns', help='Report the processes spawned by the scripts')
+@click.option('-d', '--debug', is_flag=True, help='Show debug logging')
+@click.option('-m', '--minutes', type=int, default=10, show_default=True, help='How many minutes back to report on')
+@click.option('-t', '--top', type=int, default=10, show_default=True, help='How many of the top offenders to show')
+def spawns_report(debug, minutes, top):
+    configure_logging(debug=debug)
+    since = time.time() - (minutes * 60)
+    records = spawns.load(since=since)
+    if len(records) == 0:
+        print(f'nothing was spawned in the last {minutes} {"minute" if minutes == 1 else "minutes"}')
+        sys.exit(0)
+
+    # Report over the time actually covered if the log doesn't go back that far
+    elapsed = max(time.time() - max(since, records[0]['time']), 60) / 60
+    processes = sum(record['processes'] for record in records)
+    print(f'{processes} processes from {len(records)} commands in the last {elapsed:.1f} minutes ({processes / elapsed:.1f} per minute)')
+    print(f'{sum(record["cpu"] for record in records):.2f}s of CPU time in children, {sum(record["duration"] for record in records):.2f}s of wall time')
+
+    offenders = {}
+    for record in records:
+        binary = os.path.basename(record['command'].split(' ', 1)[0])
+        key = (record['module'], binary)
+        offender = offenders.setdefault(key, {'commands': 0, 'processes': 0, 'cpu': 0.0, 'duration': 0.0, 'failures': 0})
+        offender['commands'] += 1
+        offender['processes'] += record['processes']
+        offender['cpu'] += record['cpu']
+        offender['duration'] += record['duration']
+        offender['failures'] += 1 if record['rc'] not in (None, 0) else 0
+
+    ranked = sorted(offenders.items(), key=lambda item: (item[1]['processes'], item[1]['cpu']), reverse=True)[:top]
+    width = max([len('module')] + [len(module) for (module, _), _ in ranked])
+    print()
+    print(f'{"module":<{width}}  {"procs/min":>9}  {"cpu":>8}  {"wall":>8}  {"failed":>6}  command')
+    for (module, binary), offender in ranked:
+        print(f'{module:<{width}}  {offender["processes"] / elapsed:>9.1f}  {offender["cpu"]:>7.2f}s  {offender["duration"]:>7.2f}s  {offender["failures"]:>6}  {binary}')
+
 @cli.command(name='dummy', help='I am a dummy', hidden=(getpass.getuser() != 'gdanko'))
 @click.option('-d', '--debug', is_flag=True, help='Show debug logging')
 @click.option('-p', '--pid', help='Specify a pid')
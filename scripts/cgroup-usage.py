@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+from polybar import cgroup, glyphs, lastknown, state, util
+from typing import Optional, NamedTuple
+import argparse
+import os
+import sys
+import time
+
+CGROUP_LABEL : str | None = None
+
+class CgroupInfo(NamedTuple):
+    success        : Optional[bool]  = False
+    error          : Optional[str]   = None
+    cgroup         : Optional[str]   = None
+    cpu            : Optional[float] = 0.0
+    user           : Optional[float] = 0.0
+    system         : Optional[float] = 0.0
+    throttled      : Optional[float] = 0.0
+    throttled_usec : Optional[int]   = 0
+    memory         : Optional[int]   = 0
+    anon           : Optional[int]   = 0
+    file           : Optional[int]   = 0
+    read           : Optional[float] = 0.0
+    write          : Optional[float] = 0.0
+
+def set_label(label: str=None):
+    """
+    Set the global label variable
+    """
+    global CGROUP_LABEL
+    CGROUP_LABEL = label
+
+def get_statefile() -> str:
+    statefile = os.path.basename(__file__)
+    statefile_no_ext = os.path.splitext(statefile)[0]
+
+    return Path.home() / f'.polybar-{statefile_no_ext}-{CGROUP_LABEL}-state'
+
+def get_cgroup_usage(name: str=None) -> CgroupInfo:
+    """
+    Read a cgroup's accounting files and return its usage since the last
+    refresh
+    """
+    if cgroup.get_root() is None:
+        return CgroupInfo(
+            success = False,
+            cgroup  = name,
+            error   = 'cgroup v2 is not mounted',
+        )
+
+    directory = cgroup.resolve(name=name)
+    if directory is None:
+        return CgroupInfo(
+            success = False,
+            cgroup  = name,
+            error   = f'{name} does not exist',
+        )
+
+    previous, current = cgroup.get_samples(name=CGROUP_LABEL, directory=directory)
+    if current is None:
+        return CgroupInfo(
+            success = False,
+            cgroup  = name,
+            error   = f'failed to read {directory}',
+        )
+
+    rates = cgroup.get_rates(previous=previous, current=current)
+    return CgroupInfo(
+        success        = True,
+        cgroup         = name,
+        cpu            = rates['cpu'],
+        user           = rates['user'],
+        system         = rates['system'],
+        throttled      = rates['throttled'],
+        throttled_usec = rates['throttled_usec'],
+        memory         = current['memory'] or 0,
+        anon           = current['stat'].get('anon', 0),
+        file           = current['stat'].get('file', 0),
+        read           = rates['read'],
+        write          = rates['write'],
+    )
+
+def main():
+    mode_count = 4
+    parser = argparse.ArgumentParser(description='Get the resource usage of a cgroup from its cgroup v2 accounting files')
+    parser.add_argument('-c', '--cgroup', help='The cgroup to check: a path below /sys/fs/cgroup, a unit name or "user" for your user slice', required=True)
+    parser.add_argument('-l', '--label', help='A friendly label for the cgroup', required=True)
+    parser.add_argument('-u', '--unit', help='The unit to use for display', choices=util.get_valid_units(), required=False)
+    parser.add_argument('-t', '--toggle', action='store_true', help='Toggle the output format', required=False)
+    parser.add_argument('-i', '--interval', help='The update interval (in seconds)', required=False, default=2, type=int)
+    parser.add_argument('-b', '--background', action='store_true', help='Run this script in the background', required=False)
+    args = parser.parse_args()
+
+    set_label(label=args.label)
+
+    # Background mode: periodic updates
+    if args.background:
+        # Wait a bit to let Polybar fully initialize
+        time.sleep(1)
+        while True:
+            if not util.polybar_is_running():
+                sys.exit(0)
+            _, _, _ = util.run_piped_command(['polybar-msg', 'action', f'cgroup-usage-{args.label}', 'hook', '0'])
+            time.sleep(args.interval)
+        sys.exit(0)
+    else:
+        if args.toggle:
+            mode = state.next_state(statefile=get_statefile(), mode_count=mode_count)
+        else:
+            mode = state.read_state(statefile=get_statefile())
+
+        cgroup_info = get_cgroup_usage(name=args.cgroup)
+
+        if cgroup_info.success:
+            memory = util.byte_converter(number=cgroup_info.memory, unit=args.unit)
+            if mode == 0:
+                output = f'{util.color_title(glyphs.cod_package)} {args.label} cpu {util.pad_float(cgroup_info.cpu)}%, mem {memory}'
+            elif mode == 1:
+                output = f'{util.color_title(glyphs.cod_package)} {args.label} user {util.pad_float(cgroup_info.user)}%, sys {util.pad_float(cgroup_info.system)}%, throttled {util.pad_float(cgroup_info.throttled)}%'
+            elif mode == 2:
+                output = f'{util.color_title(glyphs.cod_package)} {args.label} mem {memory} (anon {util.byte_converter(number=cgroup_info.anon, unit=args.unit)}, file {util.byte_converter(number=cgroup_info.file, unit=args.unit)})'
+            elif mode == 3:
+                output = f'{util.color_title(glyphs.cod_package)} {args.label} read {util.byte_converter(number=cgroup_info.read, unit=args.unit)}/s, write {util.byte_converter(number=cgroup_info.write, unit=args.unit)}/s'
+            print(output)
+            lastknown.save(module=f'cgroup-usage-{args.label}', output=output, values=cgroup_info._asdict())
+            sys.exit(0)
+        else:
+            output = f'{util.color_title(glyphs.cod_package)} {args.label} {util.color_error(cgroup_info.error)}'
+            print(output)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
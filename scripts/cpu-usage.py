@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 from pathlib import Path
-from polybar import glyphs, state, util
+from polybar import capabilities, cpufreq, glyphs, history, lastknown, procstat, state, topology, util
 from typing import Any, Dict, List, Optional, NamedTuple
 import argparse
 import json
@@ -34,6 +34,15 @@ class CpuInfo(NamedTuple):
     system         : Optional[float] = 0.0
     user           : Optional[float] = 0.0
 
+# What the per-core, topology and frequency spread formats show beyond
+# CpuInfo, kept apart so CpuInfo's fields stay what they always were
+class CpuDetails(NamedTuple):
+    cores_usage    : Optional[List[float]] = None
+    sockets        : Optional[int]   = 0
+    freq_high      : Optional[int]   = 0
+    freq_histogram : Optional[List[int]] = None
+    freq_low       : Optional[int]   = 0
+
 def get_statefile() -> str:
     statefile = os.path.basename(__file__)
     statefile_no_ext = os.path.splitext(statefile)[0]
@@ -48,46 +57,45 @@ def get_icon():
         return glyphs.oct_cpu
 
 def get_cpu_type():
-    command = 'grep -m 1 "model name" /proc/cpuinfo'
-    rc, stdout, _ = util.run_piped_command(command)
-    if rc == 0:
-        return re.split(r'\s*:\s*', stdout)[1]
-    else:
-        return 'Unknown CPU model'
-
-def get_cpu_freq():
-    rc, stdout, _ = util.run_piped_command('cat /sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq')
-    freq_cur = stdout if (rc == 0 and stdout and stdout != '') else -1
+    return topology.get()['model']
 
-    rc, stdout, _ = util.run_piped_command('cat /sys/devices/system/cpu/cpu0/cpufreq/cpuinfo_min_freq')
-    freq_min = stdout if (rc == 0 and stdout and stdout != '') else -1
+def read_file(filename: str=None) -> str | None:
+    try:
+        with open(filename, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
 
-    rc, stdout, _ = util.run_piped_command('cat /sys/devices/system/cpu/cpu0/cpufreq/cpuinfo_max_freq')
-    freq_max = stdout if (rc == 0 and stdout and stdout != '') else -1
+def get_cpu_freq() -> dict:
+    """
+    Return the average, lowest and highest current frequency across every
+    cpu, the hardware limits and a histogram of the current frequencies,
+    all in Hz; -1000 if cpufreq isn't available
+    """
+    if not capabilities.has_reader('cpufreq'):
+        return {'avg': -1000, 'low': -1000, 'high': -1000, 'min': -1000, 'max': -1000, 'histogram': []}
 
-    return int(freq_cur) * 1000, int(freq_min) * 1000, int(freq_max) * 1000
+    summary = cpufreq.summarize(freqs=cpufreq.sample(), limits=cpufreq.get_limits())
+    return {key: value * 1000 if key != 'histogram' else value for key, value in summary.items()}
 
 def get_logical_cpu_cores():
-    command = 'grep -c ^processor /proc/cpuinfo'
-    rc, stdout, _ = util.run_piped_command(command)
-    if rc == 0 and stdout != '':
-        return int(stdout)
-
-    return -1
+    return topology.get()['threads']
 
 def get_physical_cpu_cores():
-    command = 'grep -m 1 "cpu cores" /proc/cpuinfo'
-    rc, stdout, _ = util.run_piped_command(command)
-    if rc == 0 and stdout != '':
-        physical_cores = re.split(r'\s+:\s+', stdout)[1]
-        return int(physical_cores)
+    return topology.get()['cores']
 
-    return -1
+def get_cpu_sockets():
+    return topology.get()['sockets']
 
 def get_load_averages():
     """
-    Execute uptime and return the load averages
+    Read /proc/loadavg, or execute uptime if it can't be read, and return the load averages
     """
+    if capabilities.has_reader('loadavg'):
+        loadavg = read_file('/proc/loadavg')
+        if loadavg:
+            return [float(avg) for avg in loadavg.split()[:3]]
+
     rc, stdout, stderr = util.run_piped_command('uptime')
     if rc == 0:
         if stdout != '':
@@ -97,33 +105,102 @@ def get_load_averages():
 
     return [-1.0, -1.0, -1.0]
 
-def get_cpu_info() -> CpuInfo:
+def record_history(cpu_info: CpuInfo=None, add: bool=True) -> tuple[history.History, history.History]:
+    """
+    Add this refresh's busy percentage and 1-minute load to their histories,
+    unless add is False, and return both; load is scaled against the number
+    of threads
+    """
+    usage = history.History(name='cpu-usage')
+    load = history.History(name='cpu-load', high=max(cpu_info.cores_logical, 1))
+    if add:
+        usage.add(procstat.get_busy(idle=float(cpu_info.idle), iowait=float(cpu_info.iowait)))
+        if float(cpu_info.load1) >= 0:
+            load.add(float(cpu_info.load1))
+
+    return usage, load
+
+def get_cpu_info() -> tuple[CpuInfo, CpuDetails]:
     """
     Gather information about the CPU and return it to main()
     """
+    if capabilities.has_reader('stat'):
+        return get_cpu_info_from_proc()
 
-    if platform.machine() == 'x86':
-        icon = glyphs.md_cpu_32_bit
-    elif platform.machine() == 'x86_64':
-        icon = glyphs.md_cpu_64_bit
-    else:
-        icon = glyphs.oct_cpu
+    return get_cpu_info_from_mpstat()
+
+def get_cpu_info_from_proc() -> tuple[CpuInfo, CpuDetails]:
+    """
+    Compute CPU usage from the change in /proc/stat since the last refresh
+    """
+    try:
+        previous, current = procstat.get_samples(name='cpu-usage')
+    except (OSError, ValueError) as e:
+        return CpuInfo(
+            success = False,
+            error   = f'failed to read {procstat.STAT}: {e}',
+        ), CpuDetails()
+
+    usage = procstat.get_percentages(previous['cpu'], current['cpu'])
+    cores_usage = procstat.get_core_percentages(previous, current)
+    load_averages = get_load_averages()
+    freq = get_cpu_freq()
+
+    return CpuInfo(
+        success        = True,
+        model          = get_cpu_type(),
+        cores_logical  = get_logical_cpu_cores(),
+        cores_physical = get_physical_cpu_cores(),
+        freq_cur       = freq['avg'],
+        freq_max       = freq['max'],
+        freq_min       = freq['min'],
+        idle           = util.pad_float(round(usage['idle'], 2)),
+        nice           = util.pad_float(round(usage['nice'], 2)),
+        system         = util.pad_float(round(usage['system'], 2)),
+        user           = util.pad_float(round(usage['user'], 2)),
+        iowait         = util.pad_float(round(usage['iowait'], 2)),
+        irq            = util.pad_float(round(usage['irq'], 2)),
+        softirq        = util.pad_float(round(usage['softirq'], 2)),
+        steal          = util.pad_float(round(usage['steal'], 2)),
+        guest          = util.pad_float(round(usage['guest'], 2)),
+        guestnice      = util.pad_float(round(usage['guest_nice'], 2)),
+        load1          = util.pad_float(load_averages[0]),
+        load5          = util.pad_float(load_averages[1]),
+        load15         = util.pad_float(load_averages[2]),
+    ), CpuDetails(
+        cores_usage    = cores_usage,
+        sockets        = get_cpu_sockets(),
+        freq_high      = freq['high'],
+        freq_histogram = freq['histogram'],
+        freq_low       = freq['low'],
+    )
+
+def get_cpu_info_from_mpstat() -> tuple[CpuInfo, CpuDetails]:
+    """
+    Get CPU usage from mpstat(1) when /proc/stat can't be read
+    """
+    if not capabilities.has_binary('mpstat'):
+        return CpuInfo(
+            success = False,
+            error   = 'mpstat is not installed',
+        ), CpuDetails()
 
-    # make sure mpstat is installed
     load_averages = get_load_averages()
-    rc, stdout, stderr = util.run_piped_command(f'mpstat | tail -n 1')
+    cpu_details = CpuDetails()
+    command = 'mpstat | tail -n 1'
+    rc, stdout, stderr = util.run_piped_command(command)
     if rc == 0:
         if stdout != '':
-            freq_cur, freq_min, freq_max = get_cpu_freq()
+            freq = get_cpu_freq()
             values = re.split(r'\s+', stdout)
             cpu_info = CpuInfo(
                 success            = True,
                 model              = get_cpu_type(),
                 cores_logical      = get_logical_cpu_cores(),
                 cores_physical     = get_physical_cpu_cores(),
-                freq_cur           = freq_cur,
-                freq_max           = freq_max,
-                freq_min           = freq_min,
+                freq_cur           = freq['avg'],
+                freq_max           = freq['max'],
+                freq_min           = freq['min'],
                 idle               = util.pad_float(values[12]),
                 nice               = util.pad_float(values[4]),
                 system             = util.pad_float(values[5]),
@@ -138,6 +215,12 @@ def get_cpu_info() -> CpuInfo:
                 load5              = util.pad_float(load_averages[1]),
                 load15             = util.pad_float(load_averages[2]),
             )
+            cpu_details = CpuDetails(
+                sockets            = get_cpu_sockets(),
+                freq_high          = freq['high'],
+                freq_histogram     = freq['histogram'],
+                freq_low           = freq['low'],
+            )
         else:
             cpu_info = CpuInfo(
                 success   = False,
@@ -149,14 +232,16 @@ def get_cpu_info() -> CpuInfo:
             error     = stderr if stderr != '' else f'failed to execute "{command}"',
         )
 
-    return cpu_info
+    return cpu_info, cpu_details
 
 def main():
-    mode_count = 4
-    parser = argparse.ArgumentParser(description='Get CPU usage from mpstat(1)')
+    mode_count = 6
+    parser = argparse.ArgumentParser(description='Get CPU usage from /proc/stat')
     parser.add_argument('-t', '--toggle', action='store_true', help='Toggle the output format', required=False)
     parser.add_argument('-i', '--interval', help='The update interval (in seconds)', required=False, default=2, type=int)
     parser.add_argument('-b', '--background', action='store_true', help='Run this script in the background', required=False)
+    parser.add_argument('-c', '--cells', help='The most characters the per-core bar may use', required=False, default=32, type=int)
+    parser.add_argument('--braille', action='store_true', help='Draw the per-core bar and the sparklines with braille, two values per character', required=False)
     args = parser.parse_args()
 
     # Background mode: periodic updates
@@ -166,7 +251,7 @@ def main():
         while True:
             if not util.polybar_is_running():
                 sys.exit(0)
-            _, _, _ = util.run_piped_command('polybar-msg action cpu-usage hook 0')
+            _, _, _ = util.run_piped_command(['polybar-msg', 'action', 'cpu-usage', 'hook', '0'])
             time.sleep(args.interval)
         sys.exit(0)
     else:
@@ -175,18 +260,37 @@ def main():
         else:
             mode = state.read_state(statefile=get_statefile())
 
-        cpu_info = get_cpu_info()
+        cpu_info, cpu_details = get_cpu_info()
 
         if cpu_info.success:
+            # A click refreshes outside the timer and would skew the history
+            usage_history, load_history = record_history(cpu_info=cpu_info, add=not args.toggle)
             if mode == 0:
                 output = f'{util.color_title(get_icon())} user {cpu_info.user}%, sys {cpu_info.system}%, idle {cpu_info.idle}%'
             elif mode == 1:
                 output = f'{util.color_title(get_icon())} load {cpu_info.load1},  {cpu_info.load5},  {cpu_info.load15}'
             elif mode == 2:
-                output = f'{util.color_title(get_icon())} {cpu_info.cores_physical}C/{cpu_info.cores_logical}T x {cpu_info.model}'
+                sockets = f'{cpu_details.sockets}S/' if cpu_details.sockets > 1 else ''
+                output = f'{util.color_title(get_icon())} {sockets}{cpu_info.cores_physical}C/{cpu_info.cores_logical}T x {cpu_info.model}'
             elif mode == 3:
                 output = f'{util.color_title(get_icon())} current: {util.processor_speed(cpu_info.freq_cur)}, min: {util.processor_speed(cpu_info.freq_min)}, max: {util.processor_speed(cpu_info.freq_max)}'
+                if cpu_details.freq_histogram and sum(cpu_details.freq_histogram) > 1:
+                    # Spread across the cores, scaled so the most common bin is a full block
+                    peak = max(cpu_details.freq_histogram)
+                    spread = util.heat_bar([count * 100 / peak for count in cpu_details.freq_histogram])
+                    output = f'{util.color_title(get_icon())} avg: {util.processor_speed(cpu_info.freq_cur)} ({util.processor_speed(cpu_details.freq_low)} - {util.processor_speed(cpu_details.freq_high)}) {spread}, min: {util.processor_speed(cpu_info.freq_min)}, max: {util.processor_speed(cpu_info.freq_max)}'
+            elif mode == 4:
+                if cpu_details.cores_usage:
+                    output = f'{util.color_title(get_icon())} {util.heat_bar(cpu_details.cores_usage, cells=args.cells, braille=args.braille)} max {round(max(cpu_details.cores_usage))}%'
+                else:
+                    output = f'{util.color_title(get_icon())} {util.color_error("per-core usage needs /proc/stat")}'
+            elif mode == 5:
+                usage = usage_history.get_stats()
+                output = f'{util.color_title(get_icon())} usage {usage_history.sparkline(braille=args.braille)} {round(usage["mean"])}% p95 {round(usage["p95"])}%'
+                if len(load_history) > 0:
+                    output += f' · load {load_history.sparkline(braille=args.braille)} {cpu_info.load1}'
             print(output)
+            lastknown.save(module='cpu-usage', output=output, values=cpu_info._asdict())
             sys.exit(0)
         else:
             output = f'{util.color_title(get_icon())} {util.color_error(cpu_info.error)}'
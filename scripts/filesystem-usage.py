@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 from pathlib import Path
-from polybar import glyphs, state, util
+from polybar import capabilities, glyphs, lastknown, state, util
 from typing import Any, Dict, List, Optional, NamedTuple
 import argparse
 import os
@@ -25,11 +25,26 @@ class FilesystemInfo(NamedTuple):
     free       : Optional[int]   = 0
 
 def get_uuid(mountpoint: str='') -> str:
-    rc, device, _ = util.run_piped_command(f'findmnt -n -o SOURCE {mountpoint}')
+    if not capabilities.has_binary('findmnt'):
+        util.error_exit(icon=glyphs.md_alert, message='findmnt is not installed')
+
+    rc, device, _ = util.run_piped_command(['findmnt', '-n', '-o', 'SOURCE', mountpoint])
     if rc == 0 and device != '':
-        rc, uuid, _ = util.run_piped_command(f'blkid -s UUID -o value "{device}"')
-        if rc == 0 and uuid != '':
-            return uuid
+        if not capabilities.has_binary('blkid'):
+            return None
+        # A UUID only changes when a filesystem is created, which updates
+        # /dev/disk/by-uuid, so its mtime is part of the cache key
+        try:
+            key = os.stat('/dev/disk/by-uuid').st_mtime_ns
+        except OSError:
+            key = None
+        uuid = util.read_boot_cache_entries(name='filesystem-uuids', key=key).get(device)
+        if uuid is None:
+            rc, uuid, _ = util.run_piped_command(['blkid', '-s', 'UUID', '-o', 'value', device])
+            if rc != 0 or uuid == '':
+                return None
+            util.write_boot_cache_entries(name='filesystem-uuids', entries={device: uuid}, key=key)
+        return uuid
     else:
         util.error_exit(icon=glyphs.md_alert, message=f'{mountpoint} is an invalid mountpoint')
     
@@ -65,7 +80,7 @@ def get_disk_usage(mountpoint: str) -> list:
     Execute df -B 1 against a mount point and return a namedtuple with its values
     """
 
-    rc, stdout, stderr = util.run_piped_command(f'findmnt {mountpoint}')
+    rc, stdout, stderr = util.run_piped_command(['findmnt', mountpoint])
     if rc != 0:
         return FilesystemInfo(
             success    = False,
@@ -118,7 +133,7 @@ def main():
     parser = argparse.ArgumentParser(description='Get disk info from df(1)')
     parser.add_argument('-m', '--mountpoint', help='The mountpoint to check', required=False)
     parser.add_argument('-u', '--unit', help='The unit to use for display', choices=util.get_valid_units(), required=False)
-    parser.add_argument('-l', '--label', help='For now we need to pass a friendly mountpoint label', required=False)
+    parser.add_argument('-l', '--label', help='For now we need to pass a friendly mountpoint label', required=True)
     parser.add_argument('-t', '--toggle', action='store_true', help='Toggle the output format', required=False)
     parser.add_argument('-i', '--interval', help='The update interval (in seconds)', required=False, default=2, type=int)
     parser.add_argument('-b', '--background', action='store_true', help='Run this script in the background', required=False)
@@ -134,7 +149,7 @@ def main():
         while True:
             if not util.polybar_is_running():
                 sys.exit(0)
-            _, _, _ = util.run_piped_command(f'polybar-msg action filesystem-usage-{args.label} hook 0')
+            _, _, _ = util.run_piped_command(['polybar-msg', 'action', f'filesystem-usage-{args.label}', 'hook', '0'])
             time.sleep(args.interval)
         sys.exit(0)
     else:
@@ -160,6 +175,7 @@ def main():
             elif mode == 2:
                 output = f'{util.color_title(glyphs.md_harddisk)} {util.color_title(args.mountpoint)} {used} used / {free} free'
             print(output)
+            lastknown.save(module=f'filesystem-usage-{args.label}', output=output, values=disk_info._asdict())
             sys.exit(0)
         else:
             output = f'{util.color_title(glyphs.md_harddisk)} {util.color_error(args.mountpoint)} {util.color_error(disk_info["error"])}'
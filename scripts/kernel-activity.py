@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+from polybar import capabilities, glyphs, lastknown, procstat, schedstat, state, util
+from typing import List, Optional, NamedTuple
+import argparse
+import os
+import sys
+import time
+
+class KernelActivity(NamedTuple):
+    success        : Optional[bool]  = False
+    error          : Optional[str]   = None
+    ctxt           : Optional[float] = 0.0
+    intr           : Optional[float] = 0.0
+    softirq        : Optional[float] = 0.0
+    forks          : Optional[float] = 0.0
+    procs_running  : Optional[int]   = 0
+    procs_blocked  : Optional[int]   = 0
+    runqueue       : Optional[List[float]] = None
+
+def get_statefile() -> str:
+    statefile = os.path.basename(__file__)
+    statefile_no_ext = os.path.splitext(statefile)[0]
+    return Path.home() / f'.polybar-{statefile_no_ext}-state'
+
+def format_rate(number: float=0.0) -> str:
+    """
+    Shorten a per-second count, e.g., 12345 to 12.3k
+    """
+    for unit in ['', 'k', 'M']:
+        if abs(number) < 1000:
+            return f'{round(number)}{unit}' if unit == '' else f'{number:.1f}{unit}'
+        number = number / 1000
+    return f'{number:.1f}G'
+
+def format_latency(microseconds: float=0.0) -> str:
+    if microseconds >= 1000:
+        return f'{microseconds / 1000:.1f}ms'
+    return f'{round(microseconds)}µs'
+
+def get_kernel_activity() -> KernelActivity:
+    """
+    Derive per-second rates from the change in /proc/stat since the last
+    refresh, reusing cpu-usage's sample when it's recent enough
+    """
+    if not capabilities.has_reader('stat'):
+        return KernelActivity(
+            success = False,
+            error   = f'failed to read {procstat.STAT}',
+        )
+
+    try:
+        previous, current = procstat.get_samples(name='kernel-activity', source='cpu-usage')
+    except (OSError, ValueError) as e:
+        return KernelActivity(
+            success = False,
+            error   = f'failed to read {procstat.STAT}: {e}',
+        )
+
+    elapsed = current['time'] - previous['time']
+    def rate(name: str) -> float:
+        return max(current.get(name, 0) - previous.get(name, 0), 0) / elapsed if elapsed > 0 else 0.0
+
+    # None without /proc/schedstat, empty until there's a usable baseline
+    runqueue = None
+    if capabilities.has_reader('schedstat'):
+        try:
+            runqueue_previous, runqueue_current = schedstat.get_samples(name='kernel-activity')
+            runqueue = schedstat.get_latencies(previous=runqueue_previous, current=runqueue_current) if runqueue_previous is not None else []
+        except (OSError, ValueError):
+            runqueue = None
+
+    return KernelActivity(
+        success       = True,
+        ctxt          = rate('ctxt'),
+        intr          = rate('intr'),
+        softirq       = rate('softirq'),
+        forks         = rate('processes'),
+        procs_running = current.get('procs_running', 0),
+        procs_blocked = current.get('procs_blocked', 0),
+        runqueue      = runqueue,
+    )
+
+def main():
+    mode_count = 3
+    parser = argparse.ArgumentParser(description='Get context switch, interrupt and run queue activity from /proc/stat and /proc/schedstat')
+    parser.add_argument('-t', '--toggle', action='store_true', help='Toggle the output format', required=False)
+    parser.add_argument('-i', '--interval', help='The update interval (in seconds)', required=False, default=2, type=int)
+    parser.add_argument('-b', '--background', action='store_true', help='Run this script in the background', required=False)
+    args = parser.parse_args()
+
+    # Background mode: periodic updates
+    if args.background:
+        # Wait a bit to let Polybar fully initialize
+        time.sleep(1)
+        while True:
+            if not util.polybar_is_running():
+                sys.exit(0)
+            _, _, _ = util.run_piped_command(['polybar-msg', 'action', 'kernel-activity', 'hook', '0'])
+            time.sleep(args.interval)
+        sys.exit(0)
+    else:
+        if args.toggle:
+            mode = state.next_state(statefile=get_statefile(), mode_count=mode_count)
+        else:
+            mode = state.read_state(statefile=get_statefile())
+
+        activity = get_kernel_activity()
+
+        if activity.success:
+            if mode == 0:
+                output = f'{util.color_title(glyphs.cod_graph_line)} ctx {format_rate(activity.ctxt)}/s, irq {format_rate(activity.intr)}/s, softirq {format_rate(activity.softirq)}/s'
+            elif mode == 1:
+                output = f'{util.color_title(glyphs.cod_graph_line)} running {activity.procs_running}, blocked {activity.procs_blocked}, forks {format_rate(activity.forks)}/s'
+            elif mode == 2:
+                if activity.runqueue:
+                    output = f'{util.color_title(glyphs.cod_graph_line)} runq avg {format_latency(sum(activity.runqueue) / len(activity.runqueue))}, max {format_latency(max(activity.runqueue))}'
+                elif activity.runqueue is not None:
+                    output = f'{util.color_title(glyphs.cod_graph_line)} runq measuring...'
+                else:
+                    output = f'{util.color_title(glyphs.cod_graph_line)} {util.color_error("run queue latency needs /proc/schedstat")}'
+            print(output)
+            lastknown.save(module='kernel-activity', output=output, values=activity._asdict())
+            sys.exit(0)
+        else:
+            output = f'{util.color_title(glyphs.cod_graph_line)} {util.color_error(activity.error)}'
+            print(output)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
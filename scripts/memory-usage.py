@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 from pathlib import Path
-from polybar import glyphs, state, util
+from polybar import capabilities, glyphs, history, lastknown, meminfo, state, util
 from typing import Any, Dict, List, Optional, NamedTuple
 import argparse
 import os
@@ -45,13 +45,29 @@ class MemoryInfo(NamedTuple):
     pct_free    : Optional[int]  = 0
     memory_type : Optional[List[MemoryType]] = None
 
+# The DIMM inventory can't change until the next boot, so it's read once
+# in the background and kept in the runtime directory. A hook that finds no
+# inventory starts that read itself, unless one started this long ago; a
+# failed read is also retried once it's this old.
+INVENTORY_TIMEOUT = 60
+
 def get_statefile() -> str:
     statefile = os.path.basename(__file__)
     statefile_no_ext = os.path.splitext(statefile)[0]
     return Path.home() / f'.polybar-{statefile_no_ext}-state'
 
 def get_memory_type():
-    command = 'sudo dmidecode -t memory'
+    """
+    Read the installed DIMMs from dmidecode. sudo is run with -n, so a
+    missing sudoers rule fails right away instead of waiting for a password.
+    """
+    if not capabilities.has_binary('dmidecode'):
+        return MemoryType(
+            success = False,
+            error   = 'dmidecode is not installed',
+        )
+
+    command = 'sudo -n dmidecode -t memory'
     rc, stdout, stderr = util.run_piped_command(command)
     if rc == 0 and stdout != '':
         stanzas = re.split(r'^Handle.*', stdout, flags=re.MULTILINE)
@@ -142,7 +158,7 @@ def get_memory_type():
         if stderr != '':
             memory_type = MemoryType(
                 success = False,
-                error   = stderr,
+                error   = str(stderr),
             )
         else:
             memory_type = MemoryType(
@@ -152,9 +168,87 @@ def get_memory_type():
 
     return memory_type
 
+def save_memory_type(memory_type: MemoryType=None):
+    """
+    Save the inventory until the next boot, or the reason it couldn't be
+    read for INVENTORY_TIMEOUT seconds
+    """
+    util.write_boot_cache(name='memory-type', data={
+        'success' : memory_type.success,
+        'error'   : memory_type.error,
+        'info'    : [dimm._asdict() for dimm in memory_type.info or []],
+    }, ttl=None if memory_type.success else INVENTORY_TIMEOUT)
+
+def load_memory_type() -> MemoryType | None:
+    """
+    Return the inventory saved during this boot, or None if it hasn't been
+    read yet or the last read failed more than INVENTORY_TIMEOUT ago
+    """
+    data = util.read_boot_cache(name='memory-type')
+    if data is None:
+        return None
+
+    return MemoryType(
+        success = data['success'],
+        error   = data['error'],
+        info    = [DIMMInfo(**dimm) for dimm in data['info']],
+    )
+
+def start_inventory():
+    """
+    Read the inventory in a detached process so the hook doesn't wait on
+    sudo and dmidecode
+    """
+    if util.read_boot_cache(name='memory-type-pending') is not None:
+        return
+
+    util.write_boot_cache(name='memory-type-pending', data={'pid': os.getpid()}, ttl=INVENTORY_TIMEOUT)
+    util.run_piped_command([__file__, '--inventory'], background=True)
+
 def get_memory_usage():
     """
-    Execute free -b -w and return a namedtuple with its values
+    Gather memory usage and return it to main()
+    """
+    if capabilities.has_reader('meminfo'):
+        return get_memory_usage_from_proc()
+
+    return get_memory_usage_from_free()
+
+def get_memory_usage_from_proc():
+    """
+    Read /proc/meminfo and return a namedtuple with its values
+    """
+    try:
+        values = meminfo.get()
+    except (OSError, ValueError) as e:
+        return MemoryInfo(
+            success = False,
+            error   = f'failed to read {meminfo.MEMINFO}: {e}',
+        )
+
+    total     = values['total']
+    available = values['available']
+    used      = total - available
+    pct_used  = meminfo.get_pct_used(used=used, total=total)
+
+    return MemoryInfo(
+        success     = True,
+        total       = total,
+        shared      = values['shared'],
+        buffers     = values['buffers'],
+        cache       = values['cache'],
+        available   = available,
+        pct_total   = 100,
+        pct_used    = pct_used,
+        pct_free    = 100 - pct_used,
+        used        = used,
+        free        = total - used,
+    )
+
+def get_memory_usage_from_free():
+    """
+    Execute free -b -w when /proc/meminfo can't be read and return a
+    namedtuple with its values
     """
 
     command = 'free -b -w | sed -n "2p"'
@@ -170,7 +264,7 @@ def get_memory_usage():
             used      = total - available
             free      = total - used
             pct_total = 100
-            pct_used  = int(((total - available) / total) * 100)
+            pct_used  = meminfo.get_pct_used(used=used, total=total)
             pct_free  = pct_total - pct_used
 
             mem_info = MemoryInfo(
@@ -185,7 +279,6 @@ def get_memory_usage():
                 pct_free    = pct_free,
                 used        = used,
                 free        = free,
-                memory_type = get_memory_type()
             )
         else:
             mem_info = MemoryInfo(
@@ -193,7 +286,7 @@ def get_memory_usage():
                 error   = 'no output from free',
             )
     else:
-        mem_info = MemInfo(
+        mem_info = MemoryInfo(
             success   = False,
             error     = stderr if stderr != '' else f'failed to execute "{command}"',
         )
@@ -201,22 +294,31 @@ def get_memory_usage():
     return mem_info
 
 def main():
-    mode_count = 4
-    parser = argparse.ArgumentParser(description='Get memory usage from free(1)')
+    mode_count = 5
+    parser = argparse.ArgumentParser(description='Get memory usage from /proc/meminfo')
     parser.add_argument('-u', '--unit', help='The unit to use for display', choices=util.get_valid_units(), required=False)
     parser.add_argument('-t', '--toggle', action='store_true', help='Toggle the output format', required=False)
     parser.add_argument('-i', '--interval', help='The update interval (in seconds)', required=False, default=2, type=int)
     parser.add_argument('-b', '--background', action='store_true', help='Run this script in the background', required=False)
+    parser.add_argument('--braille', action='store_true', help='Draw the sparkline with braille, two samples per character', required=False)
+    parser.add_argument('--inventory', action='store_true', help='Read the installed DIMMs once for this boot and exit', required=False)
     args = parser.parse_args()
 
+    if args.inventory:
+        save_memory_type(get_memory_type())
+        _, _, _ = util.run_piped_command(['polybar-msg', 'action', 'memory-usage', 'hook', '0'])
+        sys.exit(0)
+
     # Background mode: periodic updates
     if args.background:
         # Wait a bit to let Polybar fully initialize
         time.sleep(1)
+        if load_memory_type() is None:
+            save_memory_type(get_memory_type())
         while True:
             if not util.polybar_is_running():
                 sys.exit(0)
-            _, _, _ = util.run_piped_command('polybar-msg action memory-usage hook 0')
+            _, _, _ = util.run_piped_command(['polybar-msg', 'action', 'memory-usage', 'hook', '0'])
             time.sleep(args.interval)
         sys.exit(0)
     else:
@@ -228,6 +330,9 @@ def main():
         memory_info = get_memory_usage()
 
         if memory_info.success:
+            used_history = history.History(name='memory-usage')
+            if not args.toggle:
+                used_history.add((memory_info.total - memory_info.available) * 100 / memory_info.total if memory_info.total > 0 else 0.0)
             pct_total = f'{memory_info.pct_total}%'
             pct_used  = f'{memory_info.pct_used}%'
             pct_free  = f'{memory_info.pct_free}%'
@@ -242,8 +347,22 @@ def main():
             elif mode == 2:
                 output = f'{util.color_title(glyphs.fa_memory)} {used} used / {free} free'
             elif mode == 3:
-                output = f'{util.color_title(glyphs.fa_memory)} {len(memory_info.memory_type.info)} x {util.byte_converter(memory_info.memory_type.info[0].size, unit='G', use_int=True)} {memory_info.memory_type.info[0].data_width}bit {memory_info.memory_type.info[0].form_factor} @ {memory_info.memory_type.info[0].speed}'
+                memory_info = memory_info._replace(memory_type=load_memory_type())
+                memory_type = memory_info.memory_type
+                if memory_type is None:
+                    start_inventory()
+                    output = f'{util.color_title(glyphs.fa_memory)} reading the memory inventory...'
+                elif not memory_type.success:
+                    output = f'{util.color_title(glyphs.fa_memory)} {util.color_error(memory_type.error)}'
+                elif len(memory_type.info) == 0:
+                    output = f'{util.color_title(glyphs.fa_memory)} {util.color_error("no information found about installed memory")}'
+                else:
+                    output = f'{util.color_title(glyphs.fa_memory)} {len(memory_type.info)} x {util.byte_converter(memory_type.info[0].size, unit='G', use_int=True)} {memory_type.info[0].data_width}bit {memory_type.info[0].form_factor} @ {memory_type.info[0].speed}'
+            elif mode == 4:
+                stats = used_history.get_stats()
+                output = f'{util.color_title(glyphs.fa_memory)} {used_history.sparkline(braille=args.braille)} {pct_used} avg {round(stats["mean"])}% p95 {round(stats["p95"])}%'
             print(output)
+            lastknown.save(module='memory-usage', output=output, values=memory_info._asdict())
             sys.exit(0)
         else:
             output = f'{util.color_title(glyphs.fa_memory)} {util.color_error(memory_info.error)}'
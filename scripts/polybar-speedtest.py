@@ -1,13 +1,20 @@
 #!/usr/bin/env python3
 
+import os
+import sys
+
+# hook-0 runs "show" on every refresh; answer it before importing click,
+# speedtest, configuring logging or checking requirements
+if __name__ == '__main__' and sys.argv[1:2] == ['show']:
+    from polybar import show
+    show.show(script='polybar-speedtest', args=sys.argv[2:])
+
 from pathlib import Path
-from polybar import glyphs, util
+from polybar import glyphs, lastknown, spawns, util
 from typing import Optional, NamedTuple
 import logging
-import os
 import signal
 import subprocess
-import sys
 import time
 import traceback
 
@@ -43,6 +50,12 @@ logging.basicConfig(
 )
 
 # Helpers
+def get_placeholder(interval: int=300) -> str:
+    """
+    Return the last known result, or the loading message if there isn't one
+    """
+    return lastknown.get_output(module='polybar-speedtest', max_age=interval * 2, default=LOADING)
+
 def get_icon(speed: int = 0) -> str:
     if speed < 100_000_000:
         return glyphs.md_speedometer_slow
@@ -98,13 +111,14 @@ def run_speedtest(download: bool=True, upload: bool=True, bytes: bool=False):
     try:
         module_output = parse_speedtest_output(output=output, download=download, upload=upload, bytes=bytes)
         TMPFILE.write_text(module_output)
+        lastknown.save(module='polybar-speedtest', output=module_output, values=output._asdict())
         logging.info(f'[run_speedtest] success! output={module_output}')
     except Exception as e:
         logging.error(f'[run_speedtest] parse/write failed: {e}\n{traceback.format_exc()}')
         TMPFILE.write_text(f'{glyphs.oct_alert} {util.color_error(e)}')
     finally:
         # Notify Polybar
-        subprocess.run(['polybar-msg', 'action', '#polybar-speedtest.hook.0'])
+        util.run_piped_command(['polybar-msg', 'action', '#polybar-speedtest.hook.0'])
 
 def cleanup_lockfile():
     if LOCKFILE.exists():
@@ -147,7 +161,7 @@ def show():
 @click.option('-i', '--interval', type=int, default=300, show_default=True, help='The update interval (in seconds)')
 def run(download, upload, bytes, background, interval):
     util.network_is_reachable()
-    TMPFILE.write_text(LOADING)
+    TMPFILE.write_text(get_placeholder(interval=interval) if background else LOADING)
 
     if not upload and not download:
         upload = download = True
@@ -159,18 +173,20 @@ def run(download, upload, bytes, background, interval):
             logging.info('[worker] worker already running, exiting')
             return
 
-        subprocess.run(['polybar-msg', 'action', f'#polybar-speedtest.send.{LOADING}'])
+        util.run_piped_command(['polybar-msg', 'action', f'#polybar-speedtest.send.{get_placeholder(interval=interval)}'])
         logging.info('[run] launching background worker')
+        command = [__file__, 'worker', str(int(download)), str(int(upload)), str(int(bytes)), str(int(background)), str(interval)]
         subprocess.Popen(
-            [__file__, 'worker', str(int(download)), str(int(upload)), str(int(bytes)), str(int(background)), str(interval)],
+            command,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             stdin=subprocess.DEVNULL,
             start_new_session=True
         )
-        subprocess.run(['polybar-msg', 'action', '#polybar-speedtest.hook.0'])
+        spawns.record(command=[command])
+        util.run_piped_command(['polybar-msg', 'action', '#polybar-speedtest.hook.0'])
     else:
-        subprocess.run(['polybar-msg', 'action', f'#polybar-speedtest.send.{LOADING}'])
+        util.run_piped_command(['polybar-msg', 'action', f'#polybar-speedtest.send.{LOADING}'])
         logging.info('[run] running in foreground')
         run_speedtest(download=download, upload=upload, bytes=bytes)
 
@@ -187,7 +203,7 @@ def worker(download, upload, bytes, background=1, interval=300):
 
     try:
         while True:
-            subprocess.run(['polybar-msg', 'action', f'#polybar-speedtest.send.{LOADING}'])
+            util.run_piped_command(['polybar-msg', 'action', f'#polybar-speedtest.send.{get_placeholder(interval=interval)}'])
             logging.info('[worker] entered main loop iteration')
             if not util.polybar_is_running():
                 logging.info('[worker] polybar not running, shutting down')
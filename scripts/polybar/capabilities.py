@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+
+# What the scripts can use on this machine: which binaries are on PATH,
+# which optional Python modules are importable and which kernel files can
+# be read directly instead of running a binary. The answers don't change
+# until the next boot or until PATH or the interpreter changes, so they're
+# probed once and shared by every hook through the boot cache. Only what
+# was found is kept that long; anything missing is looked for again after
+# NEGATIVE_TTL seconds.
+
+BINARIES = [
+    'apt', 'blkid', 'brew', 'dmidecode', 'dnf', 'findmnt', 'flatpak', 'free',
+    'iw', 'iwconfig', 'iwgetid', 'mintupdate-cli', 'mpstat', 'pacman', 'pgrep',
+    'polybar', 'polybar-msg', 'snap', 'sudo', 'uptime', 'yay', 'yum',
+]
+
+MODULES = ['click', 'psutil', 'speedtest']
+
+# name: the file a native reader parses
+READERS = {
+    'cpufreq'   : '/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq',
+    'cpuinfo'   : '/proc/cpuinfo',
+    'loadavg'   : '/proc/loadavg',
+    'meminfo'   : '/proc/meminfo',
+    'mountinfo' : '/proc/self/mountinfo',
+    'pressure'  : '/proc/pressure/cpu',
+    'schedstat' : '/proc/schedstat',
+    'stat'      : '/proc/stat',
+    'wireless'  : '/proc/net/wireless',
+}
+
+# Something found missing is looked for again once this many seconds have
+# passed, so installing it mid-session is noticed without a reboot
+NEGATIVE_TTL = 60
+
+# Every capability by 'kind/name', e.g., 'binaries/iw', as loaded from the
+# boot cache at LOADED; a worker loads it again after NEGATIVE_TTL so it sees
+# what other processes found
+CAPABILITIES : dict | None = None
+LOADED = 0.0
+
+def get_key() -> dict:
+    """
+    Return what the cache is only valid for besides the current boot
+    """
+    return {
+        'path'       : os.environ.get('PATH', ''),
+        'executable' : sys.executable,
+    }
+
+def probe_binary(binary: str=None) -> str | None:
+    import shutil
+    return shutil.which(binary)
+
+def probe_module(module: str=None) -> bool:
+    import importlib.util
+
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
+
+def probe_reader(name: str=None) -> bool:
+    return name in READERS and os.access(READERS[name], os.R_OK)
+
+PROBES = {
+    'binaries' : probe_binary,
+    'modules'  : probe_module,
+    'readers'  : probe_reader,
+}
+
+def probe() -> dict:
+    """
+    Look for every binary, module and reader and return what was found
+    """
+    return {
+        **{f'binaries/{binary}': probe_binary(binary) for binary in BINARIES},
+        **{f'modules/{module}': probe_module(module) for module in MODULES},
+        **{f'readers/{name}': probe_reader(name) for name in READERS},
+    }
+
+def save(capabilities: dict={}):
+    """
+    Add capabilities to the boot cache, keeping the missing ones for
+    NEGATIVE_TTL seconds only
+    """
+    from . import util
+
+    key = get_key()
+    found = {entry: value for entry, value in capabilities.items() if value}
+    missing = {entry: value for entry, value in capabilities.items() if not value}
+    if len(found) > 0:
+        util.write_boot_cache_entries(name='capabilities', entries=found, key=key)
+    if len(missing) > 0:
+        util.write_boot_cache_entries(name='capabilities', entries=missing, key=key, ttl=NEGATIVE_TTL)
+
+def get(refresh: bool=False) -> dict:
+    """
+    Return the cached capabilities, probing again if the cache is missing,
+    unreadable or was written for a different boot, PATH or interpreter
+    """
+    global CAPABILITIES, LOADED
+    from . import util
+
+    if CAPABILITIES is not None and not refresh and 0 <= time.time() - LOADED <= NEGATIVE_TTL:
+        return CAPABILITIES
+
+    LOADED = time.time()
+    CAPABILITIES = util.read_boot_cache_entries(name='capabilities', key=get_key()) if not refresh else {}
+    if len(CAPABILITIES) == 0:
+        CAPABILITIES = probe()
+        save(CAPABILITIES)
+
+    return CAPABILITIES
+
+def lookup(kind: str=None, name: str=None) -> str | bool | None:
+    """
+    Return a cached capability, looking for it again if it isn't in the
+    cache, e.g., because it was missing more than NEGATIVE_TTL seconds ago
+    """
+    capabilities = get()
+    entry = f'{kind}/{name}'
+    if entry in capabilities:
+        return capabilities[entry]
+
+    found = PROBES[kind](name)
+    capabilities[entry] = found
+    save({entry: found})
+    return found
+
+def has_binary(binary: str=None) -> str | None:
+    """
+    Return the full path to binary if it's on PATH, otherwise None
+    """
+    return lookup(kind='binaries', name=binary)
+
+def has_module(module: str=None) -> bool:
+    """
+    Return True if the Python module can be imported
+    """
+    return lookup(kind='modules', name=module)
+
+def has_reader(name: str=None) -> bool:
+    """
+    Return True if the file behind the named native reader is readable
+    """
+    return lookup(kind='readers', name=name)
+
+def main():
+    import json
+    print(json.dumps(get(refresh=True), indent=4))
+
+if __name__ == '__main__':
+    main()
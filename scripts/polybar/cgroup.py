@@ -0,0 +1,160 @@
+import os
+import time
+
+# What a single cgroup v2 group -- a user's slice, a systemd service -- is
+# using, from the accounting files the kernel keeps for it. They're small
+# flat files, so sampling a group costs a handful of small reads; the
+# counters are cumulative, so rates come from the change since the previous
+# sample, which is kept per group in the runtime directory like cpu-usage's
+# /proc/stat baseline.
+
+# Pure v2 systems mount the hierarchy here; hybrid ones under unified/
+CGROUP_DIRECTORIES = ['/sys/fs/cgroup', '/sys/fs/cgroup/unified']
+
+# The memory.stat fields worth keeping
+MEMORY_FIELDS = ['anon', 'file', 'kernel', 'shmem', 'sock', 'pgmajfault']
+
+def get_root() -> str | None:
+    """
+    Return where the cgroup v2 hierarchy is mounted, or None without one
+    """
+    for directory in CGROUP_DIRECTORIES:
+        if os.path.exists(os.path.join(directory, 'cgroup.controllers')):
+            return directory
+
+    return None
+
+def resolve(name: str=None, root: str=None) -> str | None:
+    """
+    Return the directory of a cgroup given as a path below the root, e.g.,
+    system.slice/docker.service, or as one of these shorthands:
+    - user: the calling user's slice, user.slice/user-<uid>.slice
+    - a bare unit name, e.g., docker.service, looked up in system.slice and
+      then in the calling user's app.slice
+    """
+    root = root or get_root()
+    if root is None or not name:
+        return None
+
+    uid = os.getuid()
+    if name == 'user':
+        candidates = [f'user.slice/user-{uid}.slice']
+    elif '/' in name:
+        candidates = [name.strip('/')]
+    else:
+        candidates = [
+            f'system.slice/{name}',
+            f'user.slice/user-{uid}.slice/user@{uid}.service/app.slice/{name}',
+            f'user.slice/user-{uid}.slice/user@{uid}.service/{name}',
+            name,
+        ]
+
+    for candidate in candidates:
+        directory = os.path.join(root, candidate)
+        if os.path.isdir(directory):
+            return directory
+
+    return None
+
+def read(directory: str=None, filename: str=None) -> str | None:
+    """
+    Read one of a cgroup's files, or return None if the controller isn't
+    enabled
+    """
+    try:
+        with open(os.path.join(directory, filename), 'r') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def parse_flat(text: str='') -> dict:
+    """
+    Parse a flat keyed file, e.g., cpu.stat or memory.stat
+    """
+    values = {}
+    for line in (text or '').splitlines():
+        key, _, value = line.partition(' ')
+        if value.strip().isdigit():
+            values[key] = int(value)
+
+    return values
+
+def parse_io(text: str='') -> dict:
+    """
+    Parse io.stat and return its counters summed across devices
+    """
+    totals = {'rbytes': 0, 'wbytes': 0, 'rios': 0, 'wios': 0}
+    for line in (text or '').splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition('=')
+            if key in totals and value.isdigit():
+                totals[key] += int(value)
+
+    return totals
+
+def sample(directory: str=None) -> dict | None:
+    """
+    Return a cgroup's cpu, memory and io counters along with when they were
+    read, or None if the cgroup is gone
+    """
+    cpu = read(directory, 'cpu.stat')
+    if cpu is None:
+        return None
+
+    memory = read(directory, 'memory.current')
+    memory_stat = parse_flat(read(directory, 'memory.stat'))
+    return {
+        'time'   : time.monotonic(),
+        'cpu'    : parse_flat(cpu),
+        'memory' : int(memory) if memory and memory.strip().isdigit() else None,
+        'stat'   : {field: memory_stat[field] for field in MEMORY_FIELDS if field in memory_stat},
+        'io'     : parse_io(read(directory, 'io.stat')),
+    }
+
+def get_samples(name: str=None, directory: str=None) -> tuple[dict | None, dict | None]:
+    """
+    Return the previous and current samples of a cgroup and save the
+    current one as the next invocation's baseline. Without a usable
+    baseline, two samples procstat.SAMPLE_INTERVAL apart are taken instead.
+    """
+    from . import procstat, util
+
+    previous = util.read_boot_cache(name=f'cgroup-{name}', key=directory)
+    current = sample(directory=directory)
+    if current is None:
+        return previous, None
+
+    if previous is None or not (procstat.SAMPLE_INTERVAL / 2 <= current['time'] - previous['time'] <= procstat.MAX_BASELINE_AGE):
+        previous = current
+        time.sleep(procstat.SAMPLE_INTERVAL)
+        current = sample(directory=directory) or previous
+
+    util.write_boot_cache(name=f'cgroup-{name}', data=current, key=directory)
+    return previous, current
+
+def get_rates(previous: dict={}, current: dict={}) -> dict:
+    """
+    Return the cpu usage (as a percentage of one cpu), the share of
+    scheduling periods that were throttled and the io throughput between
+    two samples
+    """
+    rates = {'cpu': 0.0, 'user': 0.0, 'system': 0.0, 'throttled': 0.0, 'throttled_usec': 0, 'read': 0.0, 'write': 0.0}
+    elapsed = current['time'] - previous['time']
+    if elapsed <= 0:
+        return rates
+
+    def delta(section: str, key: str) -> int:
+        # A restarted service gets a new cgroup whose counters start over
+        return max(current[section].get(key, 0) - previous[section].get(key, 0), 0)
+
+    periods = delta('cpu', 'nr_periods')
+    rates.update({
+        'cpu'            : delta('cpu', 'usage_usec') * 100 / (elapsed * 1000000),
+        'user'           : delta('cpu', 'user_usec') * 100 / (elapsed * 1000000),
+        'system'         : delta('cpu', 'system_usec') * 100 / (elapsed * 1000000),
+        'throttled'      : delta('cpu', 'nr_throttled') * 100 / periods if periods > 0 else 0.0,
+        'throttled_usec' : delta('cpu', 'throttled_usec'),
+        'read'           : delta('io', 'rbytes') / elapsed,
+        'write'          : delta('io', 'wbytes') / elapsed,
+    })
+    return rates
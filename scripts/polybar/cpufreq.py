@@ -0,0 +1,109 @@
+import os
+
+# Current frequencies of every cpu from each one's scaling_cur_freq. The
+# hardware limits don't change until the next boot, so they're read once
+# and kept in the runtime directory along with the list of cpus; the online
+# mask is part of the cache key, so hotplugging a cpu probes them again.
+
+CPU_DIRECTORY = '/sys/devices/system/cpu'
+
+LIMITS : dict | None = None
+
+def read_khz(filename: str=None) -> int | None:
+    try:
+        with open(filename, 'r') as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def probe_limits(root: str=CPU_DIRECTORY) -> dict:
+    """
+    Find every cpu with cpufreq and return its cpuinfo_min_freq and
+    cpuinfo_max_freq in kHz
+    """
+    import re
+
+    cpus = {}
+    try:
+        names = os.listdir(root)
+    except OSError:
+        names = []
+
+    for name in names:
+        match = re.fullmatch(r'cpu(\d+)', name)
+        if match and os.path.exists(os.path.join(root, name, 'cpufreq', 'scaling_cur_freq')):
+            cpus[int(match.group(1))] = {
+                'min' : read_khz(os.path.join(root, name, 'cpufreq', 'cpuinfo_min_freq')),
+                'max' : read_khz(os.path.join(root, name, 'cpufreq', 'cpuinfo_max_freq')),
+            }
+
+    return {cpu: cpus[cpu] for cpu in sorted(cpus)}
+
+def get_limits(root: str=CPU_DIRECTORY) -> dict:
+    """
+    Return the per-cpu limits, probing them only once per boot and set of
+    online cpus
+    """
+    global LIMITS
+    from . import util
+
+    if LIMITS is not None:
+        return LIMITS
+
+    try:
+        with open(os.path.join(root, 'online'), 'r') as f:
+            online = f.read().strip()
+    except OSError:
+        online = None
+
+    key = [root, online]
+    cached = util.read_boot_cache(name='cpufreq-limits', key=key)
+    if cached is not None:
+        # JSON turns the cpu numbers into strings
+        LIMITS = {int(cpu): limits for cpu, limits in cached.items()}
+        return LIMITS
+
+    LIMITS = probe_limits(root=root)
+    util.write_boot_cache(name='cpufreq-limits', data=LIMITS, key=key)
+    return LIMITS
+
+def sample(root: str=CPU_DIRECTORY) -> dict:
+    """
+    Return the current frequency of every cpu in kHz
+    """
+    freqs = {}
+    for cpu in get_limits(root=root):
+        khz = read_khz(os.path.join(root, f'cpu{cpu}', 'cpufreq', 'scaling_cur_freq'))
+        if khz is not None:
+            freqs[cpu] = khz
+
+    return freqs
+
+def summarize(freqs: dict={}, limits: dict={}, bins: int=8) -> dict:
+    """
+    Return the lowest, average and highest current frequency in kHz, the
+    lowest and highest limits, and a histogram of the current frequencies
+    over the range between the limits
+    """
+    values = list(freqs.values())
+    if len(values) == 0:
+        return {'low': -1, 'avg': -1, 'high': -1, 'min': -1, 'max': -1, 'histogram': []}
+
+    mins = [limit['min'] for limit in limits.values() if limit.get('min')]
+    maxes = [limit['max'] for limit in limits.values() if limit.get('max')]
+    lowest = min(mins) if mins else min(values)
+    highest = max(maxes) if maxes else max(values)
+
+    histogram = [0] * bins
+    width = max(highest - lowest, 1)
+    for value in values:
+        histogram[min(max((value - lowest) * bins // width, 0), bins - 1)] += 1
+
+    return {
+        'low'       : min(values),
+        'avg'       : sum(values) // len(values),
+        'high'      : max(values),
+        'min'       : lowest,
+        'max'       : highest,
+        'histogram' : histogram,
+    }
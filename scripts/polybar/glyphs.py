@@ -1,107 +1,121 @@
-from polybar import util
+# Generated by tools/generate-glyphs.py from the NerdFonts surrogate pairs
+# listed there; edit that file and re-run it rather than editing this one.
 
 # Weather
-fa_wind                             = util.surrogatepass('\uef16')
-md_weather_cloudy                   = util.surrogatepass('\udb81\udd90')
-md_weather_hazy                     = util.surrogatepass('\udb83\udf30')
-md_weather_night                    = util.surrogatepass('\udb81\udd94')
-md_weather_night_partly_cloudy      = util.surrogatepass('\udb83\udf31')
-md_weather_partly_cloudy            = util.surrogatepass('\udb81\udd95')
-md_weather_partly_rainy             = util.surrogatepass('\udb83\udf33')
-md_weather_partly_snowy             = util.surrogatepass('\udb83\udf34')
-md_weather_partly_snowy_rainy       = util.surrogatepass('\udb83\udf35')
-md_weather_snowy                    = util.surrogatepass('\udb81\udd98')
-md_weather_snowy_heavy              = util.surrogatepass('\udb83\udf36')
-md_weather_snowy_rainy              = util.surrogatepass('\udb81\ude7f')
-md_weather_sunny                    = util.surrogatepass('\uf185')
-weather_day_cloudy                  = util.surrogatepass('\ue302')
-weather_day_rain                    = util.surrogatepass('\ue308')
-weather_day_showers                 = util.surrogatepass('\ue309')
-weather_day_sleet                   = util.surrogatepass('\ue3aa')
-weather_day_sleet_storm             = util.surrogatepass('\ue362')
-weather_day_snow                    = util.surrogatepass('\ue30a')
-weather_day_snow_thunderstorm       = util.surrogatepass('\ue365')
-weather_day_snow_wind               = util.surrogatepass('\ue35f')
-weather_day_storm_showers           = util.surrogatepass('\ue30e')
-weather_day_sunny_overcast          = util.surrogatepass('\ue30c')
-weather_day_thunderstorm            = util.surrogatepass('\ue30f')
-weather_moonrise                    = util.surrogatepass('\ue3c1')
-weather_moonset                     = util.surrogatepass('\ue3c2')
-weather_night_alt_sleet             = util.surrogatepass('\ue3ac')
-weather_night_alt_sleet_storm       = util.surrogatepass('\ue364')
-weather_night_alt_snow              = util.surrogatepass('\ue327')
-weather_night_alt_snow_thunderstorm = util.surrogatepass('\ue367')
-weather_night_alt_snow_wind         = util.surrogatepass('\ue361')
-weather_night_cloudy                = util.surrogatepass('\ue32e')
-weather_night_rain                  = util.surrogatepass('\ue333')
-weather_night_showers               = util.surrogatepass('\ue334')
-weather_night_sleet                 = util.surrogatepass('\ue3ab')
-weather_night_sleet_storm           = util.surrogatepass('\ue363')
-weather_night_snow                  = util.surrogatepass('\ue335')
-weather_night_snow_thunderstorm     = util.surrogatepass('\ue366')
-weather_night_snow_wind             = util.surrogatepass('\ue360')
-weather_night_storm_showers         = util.surrogatepass('\ue337')
-weather_night_thunderstorm          = util.surrogatepass('\ue338')
-weather_sleet                       = util.surrogatepass('\ue3ad')
-weather_snow_wind                   = util.surrogatepass('\ue35e')
-weather_sunrise                     = util.surrogatepass('\ue34c')
-weather_sunset                      = util.surrogatepass('\ue34d')
+fa_wind                             = '\uef16'
+md_weather_cloudy                   = '\U000f0590'
+md_weather_hazy                     = '\U000f0f30'
+md_weather_night                    = '\U000f0594'
+md_weather_night_partly_cloudy      = '\U000f0f31'
+md_weather_partly_cloudy            = '\U000f0595'
+md_weather_partly_rainy             = '\U000f0f33'
+md_weather_partly_snowy             = '\U000f0f34'
+md_weather_partly_snowy_rainy       = '\U000f0f35'
+md_weather_snowy                    = '\U000f0598'
+md_weather_snowy_heavy              = '\U000f0f36'
+md_weather_snowy_rainy              = '\U000f067f'
+md_weather_sunny                    = '\uf185'
+weather_day_cloudy                  = '\ue302'
+weather_day_rain                    = '\ue308'
+weather_day_showers                 = '\ue309'
+weather_day_sleet                   = '\ue3aa'
+weather_day_sleet_storm             = '\ue362'
+weather_day_snow                    = '\ue30a'
+weather_day_snow_thunderstorm       = '\ue365'
+weather_day_snow_wind               = '\ue35f'
+weather_day_storm_showers           = '\ue30e'
+weather_day_sunny_overcast          = '\ue30c'
+weather_day_thunderstorm            = '\ue30f'
+weather_moonrise                    = '\ue3c1'
+weather_moonset                     = '\ue3c2'
+weather_night_alt_sleet             = '\ue3ac'
+weather_night_alt_sleet_storm       = '\ue364'
+weather_night_alt_snow              = '\ue327'
+weather_night_alt_snow_thunderstorm = '\ue367'
+weather_night_alt_snow_wind         = '\ue361'
+weather_night_cloudy                = '\ue32e'
+weather_night_rain                  = '\ue333'
+weather_night_showers               = '\ue334'
+weather_night_sleet                 = '\ue3ab'
+weather_night_sleet_storm           = '\ue363'
+weather_night_snow                  = '\ue335'
+weather_night_snow_thunderstorm     = '\ue366'
+weather_night_snow_wind             = '\ue360'
+weather_night_storm_showers         = '\ue337'
+weather_night_thunderstorm          = '\ue338'
+weather_sleet                       = '\ue3ad'
+weather_snow_wind                   = '\ue35e'
+weather_sunrise                     = '\ue34c'
+weather_sunset                      = '\ue34d'
 
 # WiFi
-md_wifi_strength_1                  = util.surrogatepass('\udb82\udd1f')
-md_wifi_strength_1_alert            = util.surrogatepass('\udb82\udd20')
-md_wifi_strength_1_lock             = util.surrogatepass('\udb82\udd21')
-md_wifi_strength_1_lock_open        = util.surrogatepass('\udb85\udecb')
-md_wifi_strength_2                  = util.surrogatepass('\udb82\udd22')
-md_wifi_strength_2_alert            = util.surrogatepass('\udb82\udd23')
-md_wifi_strength_2_lock             = util.surrogatepass('\udb82\udd24')
-md_wifi_strength_2_lock_open        = util.surrogatepass('\udb85\udecc')
-md_wifi_strength_3                  = util.surrogatepass('\udb82\udd25')
-md_wifi_strength_3_alert            = util.surrogatepass('\udb82\udd26')
-md_wifi_strength_3_lock             = util.surrogatepass('\udb82\udd27')
-md_wifi_strength_3_lock_open        = util.surrogatepass('\udb85\udecd')
-md_wifi_strength_4                  = util.surrogatepass('\udb82\udd28')
-md_wifi_strength_4_alert            = util.surrogatepass('\udb82\udd29')
-md_wifi_strength_4_lock             = util.surrogatepass('\udb82\udd2a')
-md_wifi_strength_4_lock_open        = util.surrogatepass('\udb85\udece')
-md_wifi_strength_alert_outline      = util.surrogatepass('\udb82\udd2b')
-md_wifi_strength_lock_open_outline  = util.surrogatepass('\udb85\udecf')
-md_wifi_strength_lock_outline       = util.surrogatepass('\udb82\udd2c')
-md_wifi_strength_off                = util.surrogatepass('\udb82\udd2d')
-md_wifi_strength_off_outline        = util.surrogatepass('\udb82\udd2e')
-md_wifi_strength_outline            = util.surrogatepass('\udb82\udd2f')
+md_wifi_strength_1                 = '\U000f091f'
+md_wifi_strength_1_alert           = '\U000f0920'
+md_wifi_strength_1_lock            = '\U000f0921'
+md_wifi_strength_1_lock_open       = '\U000f16cb'
+md_wifi_strength_2                 = '\U000f0922'
+md_wifi_strength_2_alert           = '\U000f0923'
+md_wifi_strength_2_lock            = '\U000f0924'
+md_wifi_strength_2_lock_open       = '\U000f16cc'
+md_wifi_strength_3                 = '\U000f0925'
+md_wifi_strength_3_alert           = '\U000f0926'
+md_wifi_strength_3_lock            = '\U000f0927'
+md_wifi_strength_3_lock_open       = '\U000f16cd'
+md_wifi_strength_4                 = '\U000f0928'
+md_wifi_strength_4_alert           = '\U000f0929'
+md_wifi_strength_4_lock            = '\U000f092a'
+md_wifi_strength_4_lock_open       = '\U000f16ce'
+md_wifi_strength_alert_outline     = '\U000f092b'
+md_wifi_strength_lock_open_outline = '\U000f16cf'
+md_wifi_strength_lock_outline      = '\U000f092c'
+md_wifi_strength_off               = '\U000f092d'
+md_wifi_strength_off_outline       = '\U000f092e'
+md_wifi_strength_outline           = '\U000f092f'
 
 # Weather
-cod_arrow_small_down = util.surrogatepass('\uea9d')
-cod_arrow_small_up   = arrow_up = util.surrogatepass('\ueaa0')
-cod_graph_line       = util.surrogatepass('\uebe2')
+cod_arrow_small_down = '\uea9d'
+cod_arrow_small_up   = '\ueaa0'
+cod_graph_line       = '\uebe2'
 
 # CPU
-oct_cpu       = util.surrogatepass('\uf4bc')
-md_cpu_32_bit = util.surrogatepass('\udb83\udedf')
-md_cpu_64_bit = util.surrogatepass('\udb83\udee0')
+oct_cpu       = '\uf4bc'
+md_cpu_32_bit = '\U000f0edf'
+md_cpu_64_bit = '\U000f0ee0'
 
 # Disk
-md_harddisk = util.surrogatepass('\udb80\udeca')
+md_harddisk = '\U000f02ca'
 
 # Memory
-cod_arrow_swap = util.surrogatepass('\uebcb')
-fa_memory      = util.surrogatepass('\uefc5')
-md_memory      = util.surrogatepass('\udb80\udf5b')
+cod_arrow_swap = '\uebcb'
+fa_memory      = '\uefc5'
+md_memory      = '\U000f035b'
+
+# Power
+md_flash = '\U000f0241'
+
+# Pressure
+md_gauge = '\U000f029a'
+
+# Temperature
+md_thermometer       = '\U000f050f'
+md_thermometer_alert = '\U000f0e01'
 
 # Speedtest
-md_speedometer_slow   = util.surrogatepass('\udb83\udf86')
-md_speedometer_medium = util.surrogatepass('\udb83\udf85')
-md_speedometer_fast   = util.surrogatepass('\udb81\udcc5')
+md_speedometer_slow   = '\U000f0f86'
+md_speedometer_medium = '\U000f0f85'
+md_speedometer_fast   = '\U000f04c5'
 
 # Others
-cod_package           = util.surrogatepass('\ueb29')
-fa_arrow_rotate_right = util.surrogatepass('\uf01e')
-md_package_variant    = util.surrogatepass('\udb80\udfd6')
-md_timer_outline      = util.surrogatepass('\udb81\udd1b')
+cod_package           = '\ueb29'
+fa_arrow_rotate_right = '\uf01e'
+md_package_variant    = '\U000f03d6'
+md_timer_outline      = '\U000f051b'
 
 # Alerts
-md_alert               = util.surrogatepass('\udb80\udc26')
-md_network_off         = util.surrogatepass('\udb83\udc9b')
-md_network_off_outline = util.surrogatepass('\udb83\udc9c')
-oct_alert              = util.surrogatepass('\uf421')
+md_alert               = '\U000f0026'
+md_network_off         = '\U000f0c9b'
+md_network_off_outline = '\U000f0c9c'
+oct_alert              = '\uf421'
+
+# Aliases
+arrow_up = cod_arrow_small_up
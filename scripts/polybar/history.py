@@ -0,0 +1,147 @@
+import fcntl
+import mmap
+import os
+import struct
+
+# A fixed-size ring buffer of samples for one metric, kept in a memory
+# mapped file in the runtime directory so successive hook invocations add
+# to the same history. Alongside the samples it keeps a running sum and a
+# histogram of the window, updated as samples enter and leave it, so the
+# mean, min, max and 95th percentile never need a pass over the samples;
+# min, max and p95 are exact to the width of a histogram bin. A timer
+# hook and a click hook can run at the same time, so anything that writes
+# to the file holds an exclusive flock on it.
+
+MAGIC = b'PBH1'
+
+# magic, size, bins, next index, count, (padding), sum, low, high; the
+# padding keeps the samples that follow 8-byte aligned
+HEADER = struct.Struct('<4sIIII4xddd')
+
+SIZE = 120
+BINS = 200
+
+class History:
+    def __init__(self, name: str=None, low: float=0.0, high: float=100.0, size: int=SIZE, bins: int=BINS, directory: str=None):
+        """
+        Open (or create) the history called name, holding the last size
+        samples between low and high; samples outside the range are kept as
+        they are but counted in the first or last bin
+        """
+        if directory is None:
+            from . import util
+            directory = util.get_runtime_directory()
+
+        self.filename = os.path.join(directory, f'history-{name}.bin')
+        self.low = float(low)
+        self.high = float(high)
+        self.size = size
+        self.bins = bins
+
+        length = HEADER.size + (size * 8) + (bins * 4)
+        self.fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.fd).st_size != length:
+                os.ftruncate(self.fd, 0)
+                os.ftruncate(self.fd, length)
+            self.map = mmap.mmap(self.fd, length)
+
+            magic, stored_size, stored_bins, _, _, _, stored_low, stored_high = HEADER.unpack_from(self.map, 0)
+            if (magic, stored_size, stored_bins, stored_low, stored_high) != (MAGIC, size, bins, self.low, self.high):
+                self.map[:] = bytes(length)
+                HEADER.pack_into(self.map, 0, MAGIC, size, bins, 0, 0, 0.0, self.low, self.high)
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+        view = memoryview(self.map)
+        self.values = view[HEADER.size:HEADER.size + (size * 8)].cast('d')
+        self.counts = view[HEADER.size + (size * 8):].cast('I')
+
+    def get_bin(self, value: float=0.0) -> int:
+        position = int((value - self.low) * self.bins / (self.high - self.low)) if self.high > self.low else 0
+        return min(max(position, 0), self.bins - 1)
+
+    def get_state(self) -> tuple[int, int, float]:
+        _, _, _, index, count, total, _, _ = HEADER.unpack_from(self.map, 0)
+        return index, count, total
+
+    def add(self, value: float=0.0):
+        """
+        Add a sample, dropping the oldest one once the buffer is full
+        """
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            index, count, total = self.get_state()
+            if count == self.size:
+                oldest = self.values[index]
+                total -= oldest
+                # A file written without the lock may be off by one here
+                if self.counts[self.get_bin(oldest)] > 0:
+                    self.counts[self.get_bin(oldest)] -= 1
+            else:
+                count += 1
+
+            self.values[index] = value
+            self.counts[self.get_bin(value)] += 1
+            total += value
+            HEADER.pack_into(self.map, 0, MAGIC, self.size, self.bins, (index + 1) % self.size, count, total, self.low, self.high)
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return self.get_state()[1]
+
+    def get_percentile(self, percentile: float=95) -> float:
+        """
+        Return the upper edge of the bin holding the given percentile
+        """
+        count = len(self)
+        if count == 0:
+            return 0.0
+
+        target = count * percentile / 100
+        seen = 0
+        for position, bin_count in enumerate(self.counts):
+            seen += bin_count
+            if seen >= target:
+                return self.low + (position + 1) * (self.high - self.low) / self.bins
+
+        return self.high
+
+    def get_stats(self) -> dict:
+        """
+        Return the count, mean, min, max and p95 of the samples in the window
+        """
+        _, count, total = self.get_state()
+        if count == 0:
+            return {'count': 0, 'mean': 0.0, 'min': 0.0, 'max': 0.0, 'p95': 0.0}
+
+        width = (self.high - self.low) / self.bins
+        occupied = [position for position, bin_count in enumerate(self.counts) if bin_count > 0]
+        return {
+            'count' : count,
+            'mean'  : total / count,
+            'min'   : self.low + occupied[0] * width,
+            'max'   : self.low + (occupied[-1] + 1) * width,
+            'p95'   : self.get_percentile(95),
+        }
+
+    def get_latest(self, count: int=0) -> list[float]:
+        """
+        Return up to count of the newest samples, oldest first
+        """
+        index, stored, _ = self.get_state()
+        count = min(count, stored)
+        return [self.values[(index - count + i) % self.size] for i in range(count)]
+
+    def sparkline(self, cells: int=16, braille: bool=False) -> str:
+        """
+        Render the newest samples, scaled between low and high, as block or
+        braille characters; only the samples that fit in cells are read
+        """
+        from . import util
+
+        samples = self.get_latest(cells * 2 if braille else cells)
+        span = (self.high - self.low) or 1.0
+        return util.heat_bar([(sample - self.low) * 100 / span for sample in samples], cells=cells, braille=braille)
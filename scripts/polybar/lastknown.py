@@ -0,0 +1,53 @@
+import os
+import time
+
+# Every module keeps its last rendered output, and the raw values behind it,
+# in $HOME so launch.py can put something on the bar the moment polybar
+# starts instead of waiting for each hook to run.
+
+def get_filename(module: str=None) -> str:
+    """
+    Return the path of the file holding a module's last output
+    """
+    return os.path.join(os.path.expanduser('~'), f'.polybar-{module}-last.json')
+
+def save(module: str=None, output: str=None, values: dict=None):
+    """
+    Persist a module's rendered output and the values it was rendered from
+    """
+    import json
+    from . import util
+
+    try:
+        util.write_file_atomic(get_filename(module=module), json.dumps({'time': int(time.time()), 'output': output, 'values': values or {}}, default=str))
+    except OSError:
+        pass
+
+def load(module: str=None) -> dict | None:
+    """
+    Return the last saved output and values for a module, or None
+    """
+    import json
+
+    try:
+        with open(get_filename(module=module), 'r') as f:
+            data = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+    return data if isinstance(data, dict) and data.get('output') else None
+
+def get_output(module: str=None, max_age: int=0, default: str=None) -> str | None:
+    """
+    Return a module's last output, marked as stale if it's older than
+    max_age seconds, or default if there isn't one
+    """
+    data = load(module=module)
+    if data is None:
+        return default
+
+    if max_age > 0 and time.time() - data.get('time', 0) > max_age:
+        from . import util
+        return f'{data["output"]} {util.color_error("(stale)")}'
+
+    return data['output']
@@ -0,0 +1,55 @@
+# Memory and swap usage from /proc/meminfo, which is all free(1) reads.
+# The values come back in bytes with the same meaning as free -b -w's
+# columns.
+
+MEMINFO = '/proc/meminfo'
+
+def read(filename: str=MEMINFO) -> bytes:
+    with open(filename, 'rb') as f:
+        return f.read()
+
+def parse(data: bytes=b'') -> dict:
+    """
+    Parse /proc/meminfo into bytes, e.g., {'MemTotal': 16658608128, ...}
+    """
+    values = {}
+    for line in data.decode().splitlines():
+        name, _, value = line.partition(':')
+        fields = value.split()
+        if len(fields) > 0 and fields[0].isdigit():
+            values[name] = int(fields[0]) * 1024 if len(fields) > 1 and fields[1] == 'kB' else int(fields[0])
+
+    return values
+
+def get(filename: str=MEMINFO) -> dict:
+    """
+    Return memory and swap usage in bytes, computed the way free(1) does
+    """
+    values = parse(read(filename=filename))
+    total = values.get('MemTotal', 0)
+    free = values.get('MemFree', 0)
+    buffers = values.get('Buffers', 0)
+    # free counts reclaimable slab as cache
+    cache = values.get('Cached', 0) + values.get('SReclaimable', 0)
+    # Kernels before 3.14 don't estimate MemAvailable
+    available = values.get('MemAvailable', free + buffers + cache)
+    swap_total = values.get('SwapTotal', 0)
+    swap_free = values.get('SwapFree', 0)
+
+    return {
+        'total'      : total,
+        'free'       : free,
+        'shared'     : values.get('Shmem', 0),
+        'buffers'    : buffers,
+        'cache'      : cache,
+        'available'  : available,
+        'swap_total' : swap_total,
+        'swap_free'  : swap_free,
+        'swap_used'  : swap_total - swap_free,
+    }
+
+def get_pct_used(used: int=0, total: int=0) -> int:
+    """
+    Return used as a rounded percentage of total, or 0 if total is 0
+    """
+    return round(used * 100 / total) if total > 0 else 0
@@ -0,0 +1,167 @@
+import os
+import time
+
+# Power from the RAPL energy counters in /sys/class/powercap, and how long
+# the cpus spend in each idle state from cpuidle. Both are cumulative
+# counters, so what's shown is the change since the previous sample, kept
+# in the runtime directory like cpu-usage's /proc/stat baseline. Which
+# files exist doesn't change until the next boot, so they're found once
+# and cached; a refresh then only reads them. The energy counters wrap at
+# max_energy_range_uj, and since Linux 5.10 only root can read them.
+
+POWERCAP_DIRECTORY = '/sys/class/powercap'
+CPU_DIRECTORY = '/sys/devices/system/cpu'
+
+FILES : dict | None = None
+
+def read_text(filename: str=None) -> str | None:
+    try:
+        with open(filename, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def read_counter(filename: str=None) -> int | None:
+    text = read_text(filename)
+    return int(text) if text and text.isdigit() else None
+
+def probe_rapl(root: str=POWERCAP_DIRECTORY) -> list[dict]:
+    """
+    Return every RAPL domain, e.g., package-0, core or dram, with its
+    energy counter and the value it wraps at
+    """
+    domains = []
+    try:
+        zones = sorted(name for name in os.listdir(root) if name.startswith('intel-rapl:'))
+    except OSError:
+        return domains
+
+    for zone in zones:
+        directory = os.path.join(root, zone)
+        name = read_text(os.path.join(directory, 'name'))
+        maximum = read_text(os.path.join(directory, 'max_energy_range_uj'))
+        if name is None or not os.path.exists(os.path.join(directory, 'energy_uj')):
+            continue
+        # Subzones, e.g., intel-rapl:0:0, belong to a package
+        package = zone.split(':')[1]
+        domains.append({
+            'name'    : name if zone.count(':') == 1 else f'{name}-{package}',
+            'path'    : os.path.join(directory, 'energy_uj'),
+            'max'     : int(maximum) if maximum and maximum.isdigit() else 0,
+        })
+
+    return domains
+
+def probe_cpuidle(root: str=CPU_DIRECTORY) -> dict:
+    """
+    Return the residency counter of every idle state of every cpu, grouped
+    by state name
+    """
+    states = {}
+    try:
+        cpus = sorted((name for name in os.listdir(root) if name.startswith('cpu') and name[3:].isdigit()), key=lambda name: int(name[3:]))
+    except OSError:
+        return states
+
+    for cpu in cpus:
+        directory = os.path.join(root, cpu, 'cpuidle')
+        try:
+            names = sorted((name for name in os.listdir(directory) if name.startswith('state')), key=lambda name: int(name[5:]))
+        except OSError:
+            continue
+        for state in names:
+            name = read_text(os.path.join(directory, state, 'name')) or state
+            states.setdefault(name, []).append(os.path.join(directory, state, 'time'))
+
+    return states
+
+def get_files(powercap: str=POWERCAP_DIRECTORY, cpu: str=CPU_DIRECTORY) -> dict:
+    """
+    Return the RAPL domains, the idle state counters and the number of
+    cpus with cpuidle, probing them only once per boot
+    """
+    global FILES
+    from . import util
+
+    if FILES is not None:
+        return FILES
+
+    key = [powercap, cpu]
+    FILES = util.read_boot_cache(name='power', key=key)
+    if FILES is None:
+        idle = probe_cpuidle(root=cpu)
+        FILES = {
+            'rapl' : probe_rapl(root=powercap),
+            'idle' : idle,
+            'cpus' : max((len(counters) for counters in idle.values()), default=0),
+        }
+        util.write_boot_cache(name='power', data=FILES, key=key)
+
+    return FILES
+
+def sample(files: dict={}) -> dict:
+    """
+    Return the energy counters in microjoules and the idle residency of
+    each state summed across cpus in microseconds, leaving out counters
+    that can't be read
+    """
+    energy = {}
+    for domain in files.get('rapl', []):
+        value = read_counter(domain['path'])
+        if value is not None:
+            energy[domain['name']] = value
+
+    idle = {}
+    for name, counters in files.get('idle', {}).items():
+        values = [read_counter(counter) for counter in counters]
+        if any(value is not None for value in values):
+            idle[name] = sum(value for value in values if value is not None)
+
+    return {'time': time.monotonic(), 'energy': energy, 'idle': idle}
+
+def get_samples(name: str=None, files: dict={}) -> tuple[dict, dict]:
+    """
+    Return the previous and current samples for name and save the current
+    one as the next invocation's baseline. Without a usable baseline, two
+    samples procstat.SAMPLE_INTERVAL apart are taken instead.
+    """
+    from . import procstat, util
+
+    previous = util.read_boot_cache(name=f'power-{name}')
+    current = sample(files=files)
+    if previous is None or not (procstat.SAMPLE_INTERVAL / 2 <= current['time'] - previous['time'] <= procstat.MAX_BASELINE_AGE):
+        previous = current
+        time.sleep(procstat.SAMPLE_INTERVAL)
+        current = sample(files=files)
+
+    util.write_boot_cache(name=f'power-{name}', data=current)
+    return previous, current
+
+def get_watts(previous: dict={}, current: dict={}, domains: list=[]) -> dict:
+    """
+    Return the average power of each RAPL domain between two samples
+    """
+    elapsed = current['time'] - previous['time']
+    limits = {domain['name']: domain['max'] for domain in domains}
+    watts = {}
+    for name, energy in current['energy'].items():
+        if name not in previous['energy'] or elapsed <= 0:
+            continue
+        delta = energy - previous['energy'][name]
+        if delta < 0:
+            # The counter wrapped
+            delta += limits.get(name, 0)
+        watts[name] = max(delta, 0) / elapsed / 1000000
+
+    return watts
+
+def get_residency(previous: dict={}, current: dict={}, cpus: int=1) -> dict:
+    """
+    Return the percentage of time the cpus spent in each idle state between
+    two samples
+    """
+    elapsed = (current['time'] - previous['time']) * 1000000 * max(cpus, 1)
+    if elapsed <= 0:
+        return {}
+
+    return {name: min(max(value - previous['idle'].get(name, value), 0) * 100 / elapsed, 100.0) for name, value in current['idle'].items()}
@@ -0,0 +1,127 @@
+import os
+
+# Pressure stall information: the share of wall time in which some (or
+# all) runnable tasks were stalled waiting on cpu, memory or io. Besides
+# the averages in /proc/pressure, the kernel lets a process register a
+# trigger on one of those files -- a stall threshold within a time window
+# -- and then signals POLLPRI on that descriptor whenever the threshold is
+# crossed, so a worker can sleep in poll() until pressure actually builds.
+
+PRESSURE_DIRECTORY = '/proc/pressure'
+
+RESOURCES = ['cpu', 'memory', 'io']
+
+# The kernel accepts windows of 500ms to 10s; unprivileged processes
+# (Linux 6.5 and later) need a multiple of 2s
+MIN_WINDOW = 500
+MAX_WINDOW = 10000
+
+FDS : dict = {}
+
+def parse(data: bytes=b'') -> dict:
+    """
+    Parse a pressure file into its some and full lines, e.g.,
+    {'some': {'avg10': 0.12, 'avg60': 0.05, 'avg300': 0.01, 'total': 123456}}
+    where the averages are percentages and total is in microseconds
+    """
+    pressure = {}
+    for line in data.decode().splitlines():
+        kind, _, fields = line.partition(' ')
+        values = {}
+        for field in fields.split():
+            name, _, value = field.partition('=')
+            values[name] = int(value) if name == 'total' else float(value)
+        pressure[kind] = values
+
+    return pressure
+
+def read(resource: str=None, root: str=PRESSURE_DIRECTORY) -> dict:
+    """
+    Return the parsed pressure of one resource, read through a descriptor
+    kept open for the life of the process
+    """
+    filename = os.path.join(root, resource)
+    fd = FDS.get(filename)
+    if fd is None:
+        fd = FDS[filename] = os.open(filename, os.O_RDONLY)
+
+    return parse(os.pread(fd, 4096, 0))
+
+def sample(root: str=PRESSURE_DIRECTORY) -> dict:
+    """
+    Return the pressure of every resource the kernel reports on
+    """
+    pressures = {}
+    for resource in RESOURCES:
+        try:
+            pressures[resource] = read(resource=resource, root=root)
+        except OSError:
+            # Not built with CONFIG_PSI, booted with psi=0 or an older kernel
+            # without this resource
+            continue
+
+    return pressures
+
+def open_trigger(resource: str=None, kind: str='some', stall: int=100, window: int=2000, root: str=PRESSURE_DIRECTORY) -> int | None:
+    """
+    Register a trigger that fires when resource is stalled for stall ms
+    within any window ms and return its descriptor, or None if the kernel
+    refused it, e.g., for lack of privileges
+    """
+    window = min(max(window, MIN_WINDOW), MAX_WINDOW)
+    stall = min(max(stall, 1), window)
+    try:
+        fd = os.open(os.path.join(root, resource), os.O_RDWR | os.O_NONBLOCK)
+    except OSError:
+        return None
+
+    try:
+        # The trigger lives as long as the descriptor stays open
+        os.write(fd, f'{kind} {stall * 1000} {window * 1000}\0'.encode())
+    except OSError:
+        os.close(fd)
+        return None
+
+    return fd
+
+def open_triggers(kind: str='some', stall: int=100, window: int=2000, root: str=PRESSURE_DIRECTORY) -> dict:
+    """
+    Register a trigger on every resource and return the descriptors that
+    were accepted, keyed by resource
+    """
+    triggers = {}
+    for resource in RESOURCES:
+        fd = open_trigger(resource=resource, kind=kind, stall=stall, window=window, root=root)
+        if fd is not None:
+            triggers[resource] = fd
+
+    return triggers
+
+def wait(triggers: dict={}, timeout: float | None=None) -> list[str]:
+    """
+    Sleep until one or more triggers fire or timeout seconds pass, and
+    return the resources whose triggers fired. A trigger that reports an
+    error, e.g., because its cgroup went away, is closed and dropped.
+    """
+    import select
+
+    poller = select.poll()
+    resources = {}
+    for resource, fd in triggers.items():
+        poller.register(fd, select.POLLPRI)
+        resources[fd] = resource
+
+    fired = []
+    try:
+        events = poller.poll(None if timeout is None else int(timeout * 1000))
+    except InterruptedError:
+        return fired
+
+    for fd, event in events:
+        if event & (select.POLLERR | select.POLLNVAL):
+            os.close(fd)
+            triggers.pop(resources[fd], None)
+        elif event & select.POLLPRI:
+            fired.append(resources[fd])
+
+    return fired
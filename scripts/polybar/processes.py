@@ -0,0 +1,127 @@
+import heapq
+import os
+import time
+
+# The busiest processes by cpu and by memory, from /proc/<pid>/stat. A
+# Sampler is meant to live as long as a worker does: it keeps a descriptor
+# open on every process's stat file and a cpu time from the last sample,
+# so each sample only lists /proc to find processes that started or
+# exited, preads every known descriptor into one reused buffer and keeps
+# the top few in a bounded heap. A descriptor outlives its process's pid,
+# so a reused pid shows up as a read error and a new process, not as a
+# jump in the old one's counters.
+
+PROC = '/proc'
+
+# A stat line is a few hundred bytes; comm is at most 16 of them
+BUFFER_SIZE = 1024
+
+# Fields after the command name, counted from 0: state is 0
+UTIME = 11
+STIME = 12
+RSS = 21
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def raise_file_limit():
+    """
+    Let the worker keep a descriptor per process by raising its soft limit
+    on open files to the hard limit
+    """
+    import resource
+
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ValueError, OSError):
+        pass
+
+class Sampler:
+    def __init__(self, root: str=PROC):
+        self.root = root
+        self.buffer = bytearray(BUFFER_SIZE)
+        # pid: [descriptor or None, cpu ticks at the last sample]
+        self.processes = {}
+        self.time = None
+
+    def read(self, pid: int=0, fd: int | None=None) -> int | None:
+        """
+        Read a process's stat line into the shared buffer and return its
+        length, opening and closing the file if there's no descriptor to
+        reuse
+        """
+        try:
+            if fd is None:
+                fd = os.open(os.path.join(self.root, str(pid), 'stat'), os.O_RDONLY)
+                try:
+                    length = os.preadv(fd, [self.buffer], 0)
+                finally:
+                    os.close(fd)
+            else:
+                length = os.preadv(fd, [self.buffer], 0)
+        except OSError:
+            return None
+
+        return length
+
+    def open(self, pid: int=0) -> int | None:
+        try:
+            return os.open(os.path.join(self.root, str(pid), 'stat'), os.O_RDONLY)
+        except OSError:
+            # Gone already, or out of descriptors; read it the slow way
+            return None
+
+    def forget(self, pid: int=0):
+        fd = self.processes.pop(pid, [None])[0]
+        if fd is not None:
+            os.close(fd)
+
+    def close(self):
+        for pid in list(self.processes):
+            self.forget(pid)
+
+    def get_name(self, pid: int=0) -> str:
+        length = self.read(pid=pid, fd=self.processes.get(pid, [None])[0])
+        if length is None:
+            return str(pid)
+        return self.buffer[self.buffer.find(b'(', 0, length) + 1:self.buffer.rfind(b')', 0, length)].decode(errors='replace')
+
+    def sample(self, count: int=3) -> dict:
+        """
+        Return the count processes that used the most cpu since the last
+        sample, as a percentage of one cpu, and the count with the largest
+        resident set in bytes
+        """
+        now = time.monotonic()
+        elapsed = now - self.time if self.time is not None else 0
+        self.time = now
+
+        pids = set(int(name) for name in os.listdir(self.root) if name.isdigit())
+        for pid in set(self.processes) - pids:
+            self.forget(pid)
+        for pid in pids - set(self.processes):
+            self.processes[pid] = [self.open(pid), None]
+
+        cpu = []
+        memory = []
+        for pid, process in list(self.processes.items()):
+            length = self.read(pid=pid, fd=process[0])
+            if length is None:
+                self.forget(pid)
+                continue
+
+            # The command name can hold spaces and parentheses, so the
+            # fields are counted from the last closing parenthesis
+            fields = self.buffer[self.buffer.rfind(b')', 0, length) + 2:length].split(None, RSS + 1)
+            ticks = int(fields[UTIME]) + int(fields[STIME])
+            if process[1] is not None and elapsed > 0:
+                cpu.append(((ticks - process[1]) * 100 / (elapsed * CLOCK_TICKS), pid))
+            process[1] = ticks
+            memory.append((int(fields[RSS]) * PAGE_SIZE, pid))
+
+        return {
+            'cpu'    : [{'pid': pid, 'name': self.get_name(pid), 'value': value} for value, pid in heapq.nlargest(count, cpu)],
+            'memory' : [{'pid': pid, 'name': self.get_name(pid), 'value': value} for value, pid in heapq.nlargest(count, memory)],
+        }
@@ -0,0 +1,166 @@
+import os
+import time
+
+# CPU usage is the change in /proc/stat's tick counters between two
+# samples. Hooks are one-shot processes, so the previous sample is kept in
+# the runtime directory and the next invocation measures against it; the
+# usage shown is then the usage since the last refresh rather than since
+# boot, which is what mpstat without an interval reports.
+
+STAT = '/proc/stat'
+
+# The columns of the cpu lines; user and nice already include guest and
+# guest_nice, so those two are left out of the total
+FIELDS = ['user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq', 'steal', 'guest', 'guest_nice']
+TOTAL_FIELDS = 8
+
+# iowait is time a cpu sat idle with I/O outstanding, so it counts as idle
+# both in the aggregate busy percentage and in the per-cpu ones
+IDLE = 3
+IOWAIT = 4
+
+# How long to wait between samples when there's no usable baseline
+SAMPLE_INTERVAL = 0.25
+
+# Baselines older than this say little about current usage
+MAX_BASELINE_AGE = 300
+
+# How recent another module's sample has to be to be used instead of
+# reading /proc/stat again
+MAX_SHARED_AGE = 5
+
+def read(filename: str=STAT) -> bytes:
+    """
+    Read a whole proc file
+    """
+    with open(filename, 'rb') as f:
+        return f.read()
+
+def parse(data: bytes=b'') -> dict:
+    """
+    Parse /proc/stat into the aggregate cpu counters, the per-cpu counters
+    indexed by cpu number and the scalar counters, e.g., ctxt and processes
+    """
+    stat = {'cpu': [], 'cpus': {}}
+    for line in data.decode().splitlines():
+        name, _, values = line.partition(' ')
+        if name == 'cpu':
+            stat['cpu'] = [int(value) for value in values.split()]
+        elif name.startswith('cpu'):
+            stat['cpus'][int(name[3:])] = [int(value) for value in values.split()]
+        elif name in ('intr', 'softirq'):
+            # Only the total; the per-source counts aren't used
+            stat[name] = int(values.split(None, 1)[0])
+        elif values.strip().isdigit():
+            stat[name] = int(values)
+
+    return stat
+
+def sample() -> dict:
+    """
+    Return a parsed /proc/stat along with when it was read
+    """
+    stat = parse(read())
+    stat['time'] = time.monotonic()
+    return stat
+
+def get_baseline_filename(name: str=None) -> str:
+    from . import util
+    return os.path.join(util.get_runtime_directory(), f'procstat-{name}.json')
+
+def load_baseline(name: str=None) -> dict | None:
+    """
+    Return the sample the last invocation of name saved, or None if there
+    isn't a usable one
+    """
+    import json
+    from . import util
+
+    try:
+        with open(get_baseline_filename(name=name), 'r') as f:
+            baseline = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(baseline, dict) or baseline.get('boot_id') != util.get_boot_id():
+        return None
+
+    # JSON turns the cpu numbers into strings
+    baseline['cpus'] = {int(cpu): values for cpu, values in baseline.get('cpus', {}).items()}
+    return baseline
+
+def save_baseline(name: str=None, stat: dict=None):
+    import json
+    from . import util
+
+    try:
+        util.write_file_atomic(get_baseline_filename(name=name), json.dumps(dict(stat, boot_id=util.get_boot_id())))
+    except OSError:
+        pass
+
+def get_samples(name: str=None, source: str=None) -> tuple[dict, dict]:
+    """
+    Return the previous and current samples for name and save the current
+    one as the next invocation's baseline. Without a usable baseline, two
+    samples SAMPLE_INTERVAL apart are taken instead.
+
+    With source, the sample the module called source saved last, e.g.,
+    cpu-usage, is used as the current one if it's recent and newer than
+    the baseline, so modules refreshing side by side share one read.
+    """
+    previous = load_baseline(name=name)
+    current = None
+    if source is not None and previous is not None:
+        shared = load_baseline(name=source)
+        if shared is not None and shared['time'] - previous['time'] >= SAMPLE_INTERVAL / 2 and time.monotonic() - shared['time'] <= MAX_SHARED_AGE:
+            current = shared
+
+    if current is None:
+        current = sample()
+
+    if previous is None or not (SAMPLE_INTERVAL / 2 <= current['time'] - previous['time'] <= MAX_BASELINE_AGE):
+        previous = current
+        time.sleep(SAMPLE_INTERVAL)
+        current = sample()
+
+    save_baseline(name=name, stat=current)
+    return previous, current
+
+def get_percentages(previous: list=[], current: list=[]) -> dict:
+    """
+    Return the percentage of time spent in each of FIELDS between two
+    samples of a cpu line
+    """
+    deltas = [max(after - before, 0) for before, after in zip(previous, current)]
+    total = sum(deltas[:TOTAL_FIELDS])
+    if total == 0:
+        return {field: 0.0 for field in FIELDS}
+
+    return {field: deltas[i] * 100 / total if i < len(deltas) else 0.0 for i, field in enumerate(FIELDS)}
+
+def get_busy(idle: float=0.0, iowait: float=0.0) -> float:
+    """
+    Return the busy percentage given the idle and iowait percentages
+    """
+    return max(100 - idle - iowait, 0.0)
+
+def get_core_percentages(previous: dict={}, current: dict={}) -> list[float]:
+    """
+    Return the busy percentage of every cpu in current, in cpu order. The
+    counters are packed into flat arrays so the work per cpu is a few
+    slice sums regardless of how many there are.
+    """
+    from array import array
+
+    cpus = sorted(current.get('cpus', {}))
+    zeros = [0] * TOTAL_FIELDS
+    before = array('q', [value for cpu in cpus for value in (previous.get('cpus', {}).get(cpu, zeros) + zeros)[:TOTAL_FIELDS]])
+    after = array('q', [value for cpu in cpus for value in (current['cpus'][cpu] + zeros)[:TOTAL_FIELDS]])
+
+    percentages = []
+    for base in range(0, len(after), TOTAL_FIELDS):
+        total = sum(after[base:base + TOTAL_FIELDS]) - sum(before[base:base + TOTAL_FIELDS])
+        idle = (after[base + IDLE] + after[base + IOWAIT]) - (before[base + IDLE] + before[base + IOWAIT])
+        percentages.append((total - idle) * 100 / total if total > 0 else 0.0)
+
+    return percentages
@@ -0,0 +1,66 @@
+import time
+
+# How long tasks wait on each cpu's run queue before they get to run, from
+# /proc/schedstat, which only exists on kernels built with
+# CONFIG_SCHEDSTATS. Each cpu line ends with three cumulative counters:
+# nanoseconds spent running, nanoseconds spent waiting to run and the
+# number of timeslices run, so the average wait per timeslice between two
+# samples is the run-queue latency.
+
+SCHEDSTAT = '/proc/schedstat'
+
+def parse(data: bytes=b'') -> dict:
+    """
+    Return the running and waiting nanoseconds and the timeslices of every
+    cpu, indexed by cpu number
+    """
+    cpus = {}
+    for line in data.decode().splitlines():
+        name, _, values = line.partition(' ')
+        if name.startswith('cpu') and name[3:].isdigit():
+            fields = values.split()
+            if len(fields) >= 9:
+                cpus[int(name[3:])] = [int(fields[6]), int(fields[7]), int(fields[8])]
+
+    return cpus
+
+def sample(filename: str=SCHEDSTAT) -> dict:
+    """
+    Return a parsed /proc/schedstat along with when it was read
+    """
+    from . import procstat
+
+    return {'cpus': parse(procstat.read(filename=filename)), 'time': time.monotonic()}
+
+def get_samples(name: str=None) -> tuple[dict | None, dict]:
+    """
+    Return the previous and current samples for name and save the current
+    one as the next invocation's baseline. The previous sample is None if
+    there isn't a usable one, by procstat's rule: missing, too recent or
+    older than procstat.MAX_BASELINE_AGE.
+    """
+    from . import procstat, util
+
+    current = sample()
+    previous = util.read_boot_cache(name=f'schedstat-{name}')
+    util.write_boot_cache(name=f'schedstat-{name}', data=current)
+    if previous is None or not (procstat.SAMPLE_INTERVAL / 2 <= current['time'] - previous['time'] <= procstat.MAX_BASELINE_AGE):
+        return None, current
+
+    # JSON turns the cpu numbers into strings
+    previous['cpus'] = {int(cpu): values for cpu, values in previous['cpus'].items()}
+    return previous, current
+
+def get_latencies(previous: dict={}, current: dict={}) -> list[float]:
+    """
+    Return the average run-queue wait per timeslice of every cpu in
+    microseconds, in cpu order
+    """
+    latencies = []
+    for cpu in sorted(current.get('cpus', {})):
+        before = previous.get('cpus', {}).get(cpu, current['cpus'][cpu])
+        after = current['cpus'][cpu]
+        slices = after[2] - before[2]
+        latencies.append(max(after[1] - before[1], 0) / slices / 1000 if slices > 0 else 0.0)
+
+    return latencies
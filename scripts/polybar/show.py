@@ -0,0 +1,67 @@
+import os
+import sys
+
+# The worker-backed modules (weather, speedtest, system updates) point hook-0
+# at "<script> show", which only prints the result file their worker last
+# wrote. Polybar runs it on every refresh, so this module deliberately avoids
+# importing anything beyond what the interpreter has already loaded.
+
+# script: (result file in $HOME, option naming the file, loading message)
+RESULTS = {
+    'polybar-speedtest' : ('.polybar-speedtest-result.txt', None, 'Speedtest running...'),
+    'system-updates'    : ('.polybar-system-update-{}.result.txt', ('-t', '--type'), 'Checking updates...'),
+    'weather'           : ('.polybar-weather-{}-result.txt', ('--label',), 'Fetching weather...'),
+}
+
+def get_option(args: list=[], names: tuple=()) -> str | None:
+    """
+    Return the value of the first matching option in args, e.g.,
+    get_option(['--type', 'apt'], ('-t', '--type')) returns 'apt'
+    """
+    for i, arg in enumerate(args):
+        for name in names:
+            if arg == name and i + 1 < len(args):
+                return args[i + 1]
+            if arg.startswith(f'{name}='):
+                return arg.split('=', 1)[1]
+
+    return None
+
+def get_result_file(script: str=None, args: list=[]) -> str | None:
+    """
+    Return the path of the result file for script given its "show"
+    arguments, or None if they can't be handled here, e.g., --help or a
+    missing option, so the caller can fall back to its own parser
+    """
+    if script not in RESULTS or '-h' in args or '--help' in args:
+        return None
+
+    filename, names, _ = RESULTS[script]
+    if names:
+        value = get_option(args, names)
+        if not value:
+            return None
+        filename = filename.format(value)
+    elif len(args) > 0:
+        return None
+
+    return os.path.join(os.path.expanduser('~'), filename)
+
+def show(script: str=None, args: list=[]):
+    """
+    Print the last result written by the worker for script, or its loading
+    message if there isn't one yet, and exit. Returns without printing
+    anything if args can't be handled here.
+    """
+    filename = get_result_file(script=script, args=args)
+    if filename is None:
+        return
+
+    try:
+        with open(filename, 'r') as f:
+            print(f.read().strip())
+    except FileNotFoundError:
+        from . import glyphs, util
+        print(f'{util.color_title(glyphs.md_timer_outline)} {RESULTS[script][2]}')
+
+    sys.exit(0)
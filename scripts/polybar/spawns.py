@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+
+# Every process the scripts start is recorded as one tab-separated line in
+# the runtime directory: time, calling module, processes spawned, wall
+# time, child CPU time, exit code and command. Lines are appended with a
+# single write so concurrent hooks don't interleave, and the file is
+# rotated once it passes MAX_SIZE so it never needs trimming.
+
+MAX_SIZE = 1024 * 1024
+
+def get_filename() -> str:
+    """
+    Return the path of the spawn log
+    """
+    from . import util
+    return os.path.join(util.get_runtime_directory(), 'spawns.log')
+
+def get_module() -> str:
+    """
+    Return the name of the running script, e.g., cpu-usage
+    """
+    return os.path.splitext(os.path.basename(sys.argv[0]))[0] if sys.argv and sys.argv[0] else 'unknown'
+
+def record(command: list=[], processes: int=1, duration: float=0.0, cpu: float=0.0, rc: int | None=None):
+    """
+    Append a spawn to the log; command is a list of argv lists
+    """
+    text = ' | '.join(' '.join(stage) for stage in command).replace('\t', ' ').replace('\n', ' ')
+    line = f'{time.time():.3f}\t{get_module()}\t{processes}\t{duration:.6f}\t{cpu:.6f}\t{"" if rc is None else rc}\t{text}\n'
+    try:
+        filename = get_filename()
+        fd = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line.encode())
+            if os.fstat(fd).st_size > MAX_SIZE:
+                os.replace(filename, f'{filename}.1')
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+def load(since: float=0) -> list[dict]:
+    """
+    Return every spawn recorded since the given unix time, oldest first
+    """
+    filename = get_filename()
+    spawns = []
+    for path in [f'{filename}.1', filename]:
+        try:
+            with open(path, 'r', errors='replace') as f:
+                for line in f:
+                    bits = line.rstrip('\n').split('\t', 6)
+                    if len(bits) != 7:
+                        continue
+                    try:
+                        spawn = {
+                            'time'      : float(bits[0]),
+                            'module'    : bits[1],
+                            'processes' : int(bits[2]),
+                            'duration'  : float(bits[3]),
+                            'cpu'       : float(bits[4]),
+                            'rc'        : int(bits[5]) if bits[5] != '' else None,
+                            'command'   : bits[6],
+                        }
+                    except ValueError:
+                        continue
+                    if spawn['time'] >= since:
+                        spawns.append(spawn)
+        except OSError:
+            continue
+
+    return spawns
@@ -1,6 +1,3 @@
-import inspect
-import os
-
 def read_state(statefile=None):
     """
     Read state from file, default to 0 if missing or invalid.
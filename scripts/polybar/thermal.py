@@ -0,0 +1,226 @@
+import errno
+import os
+
+# Which temperature sensors matter -- cpu package, cpu cores and NVMe
+# drives -- is worked out by walking /sys/class/hwmon and
+# /sys/class/thermal, which only changes between boots, so the walk is done
+# once and cached in the runtime directory. After that each refresh only
+# reads the chosen sensors. Reloading a driver renumbers the hwmon
+# devices, so sensors are cached by their resolved device path, which goes
+# away rather than pointing at another chip, and a missing sensor makes the
+# next sample walk sysfs again.
+
+HWMON_DIRECTORY = '/sys/class/hwmon'
+THERMAL_DIRECTORY = '/sys/class/thermal'
+CPU_DIRECTORY = '/sys/devices/system/cpu'
+
+# hwmon chips whose sensors are kept, and the labels that say what each
+# sensor measures; Tdie is Tctl without the offset some Ryzens add to it
+PACKAGE_LABELS = ('Package id', 'Tdie', 'Tctl', 'CPU')
+CORE_LABELS = ('Core', 'Tccd')
+CPU_CHIPS = ('coretemp', 'k10temp', 'zenpower', 'cpu_thermal', 'soc_thermal')
+
+# The limit a sensor's reading is measured against when it reports neither
+# a critical nor a high threshold
+DEFAULT_LIMIT = 100.0
+
+SENSORS : dict | None = None
+
+def read_text(filename: str=None) -> str | None:
+    try:
+        with open(filename, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def read_millidegrees(filename: str=None) -> float | None:
+    text = read_text(filename)
+    return int(text) / 1000 if text and text.lstrip('-').isdigit() else None
+
+def classify(chip: str=None, label: str=None) -> str | None:
+    """
+    Return package, core or nvme for the sensors worth showing, otherwise
+    None
+    """
+    if chip == 'nvme':
+        return 'nvme' if label == 'Composite' else None
+
+    if chip in CPU_CHIPS:
+        if label is None or label.startswith(PACKAGE_LABELS):
+            return 'package'
+        if label.startswith(CORE_LABELS):
+            return 'core'
+
+    return None
+
+def probe_hwmon(root: str=HWMON_DIRECTORY) -> list[dict]:
+    import re
+
+    sensors = []
+    try:
+        chips = sorted(os.listdir(root))
+    except OSError:
+        return sensors
+
+    for chip_directory in chips:
+        # e.g., /sys/devices/platform/coretemp.0/hwmon/hwmon3
+        directory = os.path.realpath(os.path.join(root, chip_directory))
+        chip = read_text(os.path.join(directory, 'name'))
+        try:
+            inputs = sorted(name for name in os.listdir(directory) if re.fullmatch(r'temp\d+_input', name))
+        except OSError:
+            continue
+
+        # NVMe drives are told apart by the controller the chip belongs to
+        device = os.path.basename(os.path.realpath(os.path.join(directory, 'device')))
+        name = device if chip == 'nvme' and device.startswith('nvme') else chip
+
+        labels = {filename: read_text(os.path.join(directory, filename.replace('_input', '_label'))) for filename in inputs}
+        for filename in inputs:
+            label = labels[filename]
+            if label == 'Tctl' and 'Tdie' in labels.values():
+                continue
+            kind = classify(chip=chip, label=label)
+            if kind is None:
+                continue
+            sensors.append({
+                'kind'  : kind,
+                'name'  : name,
+                'label' : label or chip,
+                'path'  : os.path.join(directory, filename),
+                'high'  : read_millidegrees(os.path.join(directory, filename.replace('_input', '_max'))),
+                'crit'  : read_millidegrees(os.path.join(directory, filename.replace('_input', '_crit'))),
+            })
+
+    return sensors
+
+def probe_thermal_zones(root: str=THERMAL_DIRECTORY) -> list[dict]:
+    """
+    Return the cpu package temperature from the thermal zones, for
+    machines whose cpu has no hwmon driver
+    """
+    sensors = []
+    try:
+        zones = sorted(name for name in os.listdir(root) if name.startswith('thermal_zone'))
+    except OSError:
+        return sensors
+
+    for zone in zones:
+        directory = os.path.realpath(os.path.join(root, zone))
+        zone_type = read_text(os.path.join(directory, 'type')) or ''
+        if zone_type != 'x86_pkg_temp' and not zone_type.startswith(('cpu', 'soc')):
+            continue
+
+        trips = {}
+        for name in os.listdir(directory):
+            if name.startswith('trip_point_') and name.endswith('_type'):
+                trips[read_text(os.path.join(directory, name))] = read_millidegrees(os.path.join(directory, name.replace('_type', '_temp')))
+
+        sensors.append({
+            'kind'  : 'package',
+            'name'  : zone_type,
+            'label' : zone_type,
+            'path'  : os.path.join(directory, 'temp'),
+            'high'  : trips.get('passive') or trips.get('hot'),
+            'crit'  : trips.get('critical'),
+        })
+
+    return sensors
+
+def probe_throttle(root: str=CPU_DIRECTORY) -> list[str]:
+    """
+    Return the thermal throttle counters, which only Intel cpus have
+    """
+    counters = []
+    try:
+        cpus = sorted(name for name in os.listdir(root) if name.startswith('cpu') and name[3:].isdigit())
+    except OSError:
+        return counters
+
+    for cpu in cpus:
+        for counter in ('core_throttle_count', 'package_throttle_count'):
+            filename = os.path.join(root, cpu, 'thermal_throttle', counter)
+            if os.path.exists(filename):
+                counters.append(filename)
+
+    return counters
+
+def probe(hwmon: str=HWMON_DIRECTORY, thermal: str=THERMAL_DIRECTORY, cpu: str=CPU_DIRECTORY) -> dict:
+    """
+    Walk sysfs and return the sensors worth showing and the throttle
+    counters
+    """
+    sensors = probe_hwmon(root=hwmon)
+    if not any(sensor['kind'] == 'package' for sensor in sensors):
+        sensors.extend(probe_thermal_zones(root=thermal))
+
+    return {
+        'sensors'  : sensors,
+        'throttle' : probe_throttle(root=cpu),
+    }
+
+def get(hwmon: str=HWMON_DIRECTORY, thermal: str=THERMAL_DIRECTORY, cpu: str=CPU_DIRECTORY, rescan: bool=False) -> dict:
+    """
+    Return the sensors and throttle counters, walking sysfs only once per
+    boot unless rescan is set
+    """
+    global SENSORS
+    from . import util
+
+    if SENSORS is not None and not rescan:
+        return SENSORS
+
+    key = [hwmon, thermal, cpu]
+    SENSORS = util.read_boot_cache(name='thermal', key=key) if not rescan else None
+    if SENSORS is None:
+        SENSORS = probe(hwmon=hwmon, thermal=thermal, cpu=cpu)
+        util.write_boot_cache(name='thermal', data=SENSORS, key=key)
+
+    return SENSORS
+
+def read_counter(filename: str=None) -> int | None:
+    text = read_text(filename)
+    return int(text) if text and text.lstrip('-').isdigit() else None
+
+def sample(sensors: list=[]) -> list[dict] | None:
+    """
+    Return each sensor with its current temperature in degrees Celsius,
+    leaving out sensors that can't be read, or None if one of them is gone,
+    e.g., its driver was reloaded or the drive was removed, and the sensors
+    need to be found again
+    """
+    readings = []
+    for sensor in sensors:
+        try:
+            with open(sensor['path'], 'r') as f:
+                readings.append(dict(sensor, temp=int(f.read().strip()) / 1000))
+        except OSError as e:
+            if e.errno in (errno.ENOENT, errno.ENODEV):
+                return None
+        except ValueError:
+            continue
+
+    return readings
+
+def get_throttle_count(counters: list=[]) -> int:
+    """
+    Return the sum of the throttle counters; only whether it grows matters
+    """
+    return sum(count for count in (read_counter(counter) for counter in counters) if count is not None)
+
+def get_pct_of_limit(reading: dict={}) -> float:
+    """
+    Return a reading as a percentage of its critical threshold, or of its
+    high one, or of DEFAULT_LIMIT if it has neither
+    """
+    limit = reading.get('crit') or reading.get('high') or DEFAULT_LIMIT
+    return reading['temp'] * 100 / limit
+
+def is_hot(reading: dict={}, margin: float=5.0) -> bool:
+    """
+    Return True if a reading has reached its high threshold, or is within
+    margin degrees of its critical one
+    """
+    if reading.get('high') and reading['temp'] >= reading['high']:
+        return True
+    return bool(reading.get('crit')) and reading['temp'] >= reading['crit'] - margin
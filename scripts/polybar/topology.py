@@ -0,0 +1,114 @@
+import os
+
+# How the online cpus map onto cores and sockets, read from sysfs rather
+# than /proc/cpuinfo: "cpu cores" there is per socket, so it undercounts on
+# multi-socket machines. None of it changes until the next boot or until a
+# cpu is hotplugged, so it's probed once and cached in the runtime directory.
+
+CPU_DIRECTORY = '/sys/devices/system/cpu'
+CPUINFO = '/proc/cpuinfo'
+
+TOPOLOGY : dict | None = None
+
+def read_text(filename: str=None) -> str | None:
+    try:
+        with open(filename, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def parse_cpu_list(text: str='') -> list[int]:
+    """
+    Expand a kernel cpu list, e.g., "0-3,8,10-11", into cpu numbers
+    """
+    cpus = []
+    for part in (text or '').split(','):
+        if '-' in part:
+            first, last = part.split('-', 1)
+            cpus.extend(range(int(first), int(last) + 1))
+        elif part.strip().isdigit():
+            cpus.append(int(part))
+    return cpus
+
+def get_model(cpuinfo: str=CPUINFO) -> str:
+    """
+    Return the cpu model, which sysfs doesn't expose, from /proc/cpuinfo
+    """
+    text = read_text(cpuinfo) or ''
+    for field in ('model name', 'Model', 'Hardware', 'cpu model'):
+        for line in text.splitlines():
+            name, _, value = line.partition(':')
+            if name.strip() == field and value.strip():
+                return value.strip()
+
+    return 'Unknown CPU model'
+
+def get_caches(root: str=CPU_DIRECTORY, cpu: int=0) -> list[dict]:
+    """
+    Return the level, type and size of each cache cpu can use
+    """
+    caches = []
+    directory = os.path.join(root, f'cpu{cpu}', 'cache')
+    try:
+        indexes = sorted(name for name in os.listdir(directory) if name.startswith('index'))
+    except OSError:
+        return caches
+
+    for index in indexes:
+        level = read_text(os.path.join(directory, index, 'level'))
+        caches.append({
+            'level' : int(level) if level and level.isdigit() else 0,
+            'type'  : read_text(os.path.join(directory, index, 'type')) or 'Unknown',
+            'size'  : read_text(os.path.join(directory, index, 'size')) or 'Unknown',
+        })
+
+    return caches
+
+def probe(root: str=CPU_DIRECTORY, cpuinfo: str=CPUINFO) -> dict:
+    """
+    Walk the online cpus and count their sockets, cores and threads
+    """
+    online = parse_cpu_list(read_text(os.path.join(root, 'online')))
+    if len(online) == 0:
+        online = sorted(int(name[3:]) for name in os.listdir(root) if name[3:].isdigit() and name.startswith('cpu')) if os.path.isdir(root) else []
+
+    cores = set()
+    sockets = set()
+    for cpu in online:
+        topology = os.path.join(root, f'cpu{cpu}', 'topology')
+        package = read_text(os.path.join(topology, 'physical_package_id'))
+        core = read_text(os.path.join(topology, 'core_id'))
+        # Without topology files, every cpu counts as its own core in one socket
+        package = int(package) if package and package.lstrip('-').isdigit() else 0
+        core = int(core) if core and core.lstrip('-').isdigit() else cpu
+        sockets.add(package)
+        cores.add((package, core))
+
+    return {
+        'model'   : get_model(cpuinfo=cpuinfo),
+        'sockets' : len(sockets),
+        'cores'   : len(cores),
+        'threads' : len(online),
+        'smt'     : len(online) // len(cores) if len(cores) > 0 else 1,
+        'online'  : online,
+        'caches'  : get_caches(root=root, cpu=online[0]) if len(online) > 0 else [],
+    }
+
+def get(root: str=CPU_DIRECTORY, cpuinfo: str=CPUINFO) -> dict:
+    """
+    Return the cpu topology, probing it only once per boot
+    """
+    global TOPOLOGY
+    from . import util
+
+    if TOPOLOGY is not None:
+        return TOPOLOGY
+
+    # Include the online mask so hotplugging a cpu invalidates the cache
+    key = [root, cpuinfo, read_text(os.path.join(root, 'online'))]
+    TOPOLOGY = util.read_boot_cache(name='topology', key=key)
+    if TOPOLOGY is None:
+        TOPOLOGY = probe(root=root, cpuinfo=cpuinfo)
+        util.write_boot_cache(name='topology', data=TOPOLOGY, key=key)
+
+    return TOPOLOGY
@@ -1,76 +1,421 @@
-from datetime import datetime
-from pathlib import Path
-from pprint import pprint as pp
-from typing import List, Tuple, Optional, Union
-import importlib.util
-import json
 import os
-import psutil
-import re
-import shlex
-import shutil
-import socket
-import subprocess
 import sys
 import time
 
+# Every hook imports this module, so anything that isn't needed by most
+# of them (psutil, subprocess, json, socket, datetime, pathlib, re, ...)
+# is imported inside the function that uses it rather than at module load.
+
 def pprint(input):
+    from pprint import pprint as pp
     pp(input)
 
-def run_piped_command(command: str=None, background: bool=False) -> Union[
-    Tuple[int, bytes, bytes],  # blocking mode
-    List[subprocess.Popen]     # background mode
-]:
+# Callers running a command that can hang, e.g., iw on a wedged driver, pass
+# this as the timeout. Nothing is timed out by default: killing a package
+# manager mid-transaction does more harm than waiting for it.
+COMMAND_TIMEOUT = 10
+
+# Seconds to wait for a killed pipeline to be reaped before giving up on it
+KILL_TIMEOUT = 1
+
+# Boot caches holding one entry per device, binary, etc. keep at most this
+# many, dropping the ones written longest ago
+BOOT_CACHE_MAX_ENTRIES = 64
+
+def run_piped_command(command: str | list=None, background: bool=False, timeout: float | None=None) -> (
+    tuple[int, str, str] |       # blocking mode
+    list['subprocess.Popen']     # background mode
+):
     """
-    Run a shell-like command with pipes using subprocess.
+    Run a shell-like command with pipes without a shell.
+
+    Trailing tail, head, sed -n and grep stages are applied in-process
+    rather than spawned, as is a leading cat or grep that reads a file when
+    nothing else in the pipeline needs spawning. With a timeout, the stages
+    that are spawned share a new process group so the whole pipeline can be
+    killed if it runs past it; without one they stay in the caller's, so
+    an interactive sudo can still prompt on the terminal.
 
     Args:
-        command (str): The pipeline command, e.g. "echo hi | grep h".
+        command (str | list): The pipeline, either as a string, e.g.
+            'echo hi | grep h', as one argv list, or as a list of argv lists.
         background (bool): If True, run in background (detached).
+        timeout (float): Seconds to wait in blocking mode; None, the
+            default, waits forever.
 
     Returns:
-        - If background=False: (return_code, stdout, stderr)
+        - If background=False: (return_code, stdout, stderr); return_code
+          is 124 if the pipeline timed out
         - If background=True : list of Popen objects (pipeline)
     """
-    # Split pipeline into stages
-    parts = [shlex.split(cmd.strip()) for cmd in command.split('|')]
+    import subprocess
+    from . import spawns
+
+    stages = parse_pipeline(command)
+    filters = []
+    while len(stages) > 1 and get_filter(stages[-1]) is not None:
+        filters.insert(0, get_filter(stages.pop()))
+
+    if background:
+        # Nothing reads the output, so there's no point filtering it
+        processes = spawn_pipeline(stages=stages, background=True)
+        spawns.record(command=stages, processes=len(stages))
+        return processes
+
+    reader = get_reader(stages[0]) if len(stages) == 1 else None
+    if reader is not None:
+        rc, lines, stderr = reader()
+    else:
+        start, times = time.perf_counter(), os.times()
+        try:
+            processes = spawn_pipeline(stages=stages, background=False, new_group=timeout is not None)
+        except (FileNotFoundError, PermissionError) as e:
+            spawns.record(command=stages, processes=len(stages), rc=127)
+            return 1, None, e
+
+        try:
+            stdout, stderr = processes[-1].communicate(timeout=timeout)
+            for proc in processes[:-1]:
+                proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_pipeline(processes)
+            spawns.record(command=stages, processes=len(stages), duration=time.perf_counter() - start, cpu=get_child_cpu_time(times), rc=124)
+            return 124, '', f'"{" ".join(stages[0])}" timed out after {timeout} seconds'
+
+        rc = processes[-1].returncode
+        spawns.record(command=stages, processes=len(stages), duration=time.perf_counter() - start, cpu=get_child_cpu_time(times), rc=rc)
+        lines = stdout.decode().splitlines()
+        stderr = stderr.decode().strip()
+
+    for apply_filter in filters:
+        rc, lines = apply_filter(lines)
+
+    return rc, '\n'.join(lines).strip(), stderr
+
+#==========================================================
+#  Command pipelines
+#==========================================================
+
+def get_child_cpu_time(before: 'os.times_result'=None) -> float:
+    """
+    Return the CPU time used by children reaped since before was taken
+    """
+    after = os.times()
+    return (after.children_user - before.children_user) + (after.children_system - before.children_system)
+
+def parse_pipeline(command: str | list=None) -> list[list[str]]:
+    """
+    Return a pipeline as a list of argv lists; pipes inside quotes are
+    left alone
+    """
+    import shlex
+
+    if isinstance(command, (list, tuple)):
+        if len(command) > 0 and all(isinstance(stage, (list, tuple)) for stage in command):
+            return [list(stage) for stage in command]
+        return [list(command)]
+
+    lexer = shlex.shlex(command, posix=True, punctuation_chars='|')
+    lexer.whitespace_split = True
+    stages = [[]]
+    for token in lexer:
+        if token == '|':
+            stages.append([])
+        else:
+            stages[-1].append(token)
+
+    return [stage for stage in stages if len(stage) > 0]
+
+def spawn_pipeline(stages: list=[], background: bool=False, new_group: bool=False) -> list['subprocess.Popen']:
+    """
+    Start every stage of a pipeline, in a single new process group if it's
+    run in the background or new_group is set. Using process_group rather
+    than a preexec_fn lets subprocess use vfork.
+    """
+    import subprocess
+
     processes = []
     prev_stdout = None
+    for i, stage in enumerate(stages):
+        proc = subprocess.Popen(
+            stage,
+            stdin=prev_stdout,
+            stdout=subprocess.PIPE if not background else subprocess.DEVNULL,
+            stderr=subprocess.PIPE if not background and i == len(stages) - 1 else subprocess.DEVNULL,
+            process_group=(processes[0].pid if len(processes) > 0 else 0) if background or new_group else None,
+        )
+
+        if prev_stdout:
+            prev_stdout.close()
+        prev_stdout = proc.stdout
+        processes.append(proc)
+
+    return processes
+
+def kill_pipeline(processes: list=[]):
+    """
+    Kill a pipeline's process group and reap its processes. A stage this
+    user can't kill, e.g., one run through sudo, is left behind with its
+    pipes closed rather than waited on forever.
+    """
+    import signal
+    import subprocess
 
-    for i, part in enumerate(parts):
+    try:
+        os.killpg(processes[0].pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        for proc in processes:
+            try:
+                proc.kill()
+            except PermissionError:
+                pass
+
+    for proc in processes:
+        for pipe in (proc.stdout, proc.stderr):
+            if pipe is not None:
+                pipe.close()
         try:
-            proc = subprocess.Popen(
-                part,
-                stdin=prev_stdout,
-                stdout=subprocess.PIPE if not background else subprocess.DEVNULL,
-                stderr=subprocess.PIPE if not background and i == len(parts) - 1 else subprocess.DEVNULL,
-                preexec_fn=os.setpgrp if background else None
-            )
-
-            if prev_stdout:
-                prev_stdout.close()
-            prev_stdout = proc.stdout
-            processes.append(proc)
-        except FileNotFoundError as e:
-            return 1, None, e
+            proc.wait(timeout=KILL_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            pass
 
-    if background:
-        # Don't wait; return process list so caller can manage if needed
-        return processes
+def get_grep_matcher(args: list=[]):
+    """
+    Parse grep arguments into (match, max_count, count, files), or return
+    None if they use anything not handled here. Only literal patterns are
+    matched in-process, optionally anchored with a leading ^ or trailing $;
+    anything else is left to grep itself.
+    """
+    fixed = invert = count = ignore_case = False
+    max_count = None
+    pattern = None
+    files = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if pattern is None and arg in ('-m', '--max-count') and i + 1 < len(args) and args[i + 1].isdigit():
+            max_count = int(args[i + 1])
+            i += 1
+        elif pattern is None and arg.startswith('-') and len(arg) > 1 and set(arg[1:]) <= set('EFciv'):
+            fixed |= 'F' in arg
+            count |= 'c' in arg
+            invert |= 'v' in arg
+            ignore_case |= 'i' in arg
+        elif pattern is None and not arg.startswith('-'):
+            pattern = arg
+        elif pattern is not None and not arg.startswith('-'):
+            files.append(arg)
+        else:
+            return None
+        i += 1
+
+    # A newline separates several patterns
+    if pattern is None or '\n' in pattern:
+        return None
 
-    # Foreground (blocking) mode
-    stdout, stderr = processes[-1].communicate()
-    for p in processes[:-1]:
-        p.wait()
+    anchor_start = anchor_end = False
+    if not fixed:
+        anchor_start = pattern.startswith('^')
+        anchor_end = pattern.endswith('$') and len(pattern) > int(anchor_start)
+        pattern = pattern[int(anchor_start):len(pattern) - int(anchor_end)]
+        if any(char in pattern for char in '.[]\\*^$+?(){}|'):
+            return None
+
+    # Case folding beyond ASCII depends on the locale
+    if ignore_case:
+        if not pattern.isascii():
+            return None
+        pattern = pattern.lower()
+
+    def match(line: str) -> bool:
+        if ignore_case:
+            line = line.lower()
+        if anchor_start and anchor_end:
+            found = line == pattern
+        elif anchor_start:
+            found = line.startswith(pattern)
+        elif anchor_end:
+            found = line.endswith(pattern)
+        else:
+            found = pattern in line
+        return found != invert
+
+    return match, max_count, count, files
+
+def grep_lines(lines: list=[], match=None, max_count: int | None=None, count: bool=False) -> tuple[int, list]:
+    """
+    Filter lines like grep and return its exit code and output
+    """
+    matched = []
+    for line in lines:
+        if max_count is not None and len(matched) >= max_count:
+            break
+        if match(line):
+            matched.append(line)
+
+    rc = 0 if len(matched) > 0 else 1
+    return rc, [str(len(matched))] if count else matched
+
+def get_line_count(args: list=[]) -> tuple[int, bool] | None:
+    """
+    Parse the line count of head or tail, returning (count, from_start) for
+    "+N" or None if the arguments aren't handled here
+    """
+    if len(args) == 0:
+        return 10, False
+    if len(args) == 2 and args[0] == '-n':
+        value = args[1]
+    elif len(args) == 1 and args[0].startswith('-n'):
+        value = args[0][2:]
+    elif len(args) == 1 and args[0][1:].isdigit() and args[0].startswith('-'):
+        value = args[0][1:]
+    else:
+        return None
+
+    if value.startswith('+') and value[1:].isdigit():
+        return int(value[1:]), True
+    return (int(value), False) if value.isdigit() else None
 
-    return processes[-1].returncode, stdout.decode().strip(), stderr.decode().strip()
+def get_filter(stage: list=[]):
+    """
+    Return a function applying stage to a list of lines in-process and
+    returning (return_code, lines), or None if stage has to be spawned
+    """
+    import re
+
+    name, args = stage[0], stage[1:]
+    if name in ('head', 'tail'):
+        parsed = get_line_count(args)
+        if parsed is None:
+            return None
+        n, from_start = parsed
+        if name == 'head':
+            return None if from_start else lambda lines: (0, lines[:n])
+        if from_start:
+            return lambda lines: (0, lines[max(n - 1, 0):])
+        return lambda lines: (0, lines[-n:] if n > 0 else [])
+    elif name == 'sed' and len(args) == 2 and args[0] == '-n':
+        match = re.fullmatch(r'(\d+)(?:,(\d+))?p', args[1])
+        if match:
+            first = int(match.group(1))
+            last = int(match.group(2)) if match.group(2) else first
+            return lambda lines: (0, lines[first - 1:last])
+    elif name == 'grep':
+        matcher = get_grep_matcher(args)
+        if matcher is not None and len(matcher[3]) == 0:
+            match, max_count, count, _ = matcher
+            return lambda lines: grep_lines(lines, match, max_count, count)
+
+    return None
+
+def get_reader(stage: list=[]):
+    """
+    Return a function reading the file(s) named by a lone "cat FILE" or
+    "grep PATTERN FILE" stage in-process and returning
+    (return_code, lines, stderr), or None if stage has to be spawned
+    """
+    def read_lines(filename: str=None) -> list:
+        with open(filename, 'r', errors='replace') as f:
+            return f.read().splitlines()
+
+    name, args = stage[0], stage[1:]
+    if name == 'cat' and len(args) == 1 and not args[0].startswith('-'):
+        def cat():
+            try:
+                return 0, read_lines(args[0]), ''
+            except OSError as e:
+                return 1, [], f'cat: {args[0]}: {e.strerror}'
+        return cat
+    elif name == 'grep':
+        matcher = get_grep_matcher(args)
+        if matcher is not None and len(matcher[3]) == 1:
+            match, max_count, count, files = matcher
+            def grep():
+                try:
+                    return (*grep_lines(read_lines(files[0]), match, max_count, count), '')
+                except OSError as e:
+                    return 2, [], f'grep: {files[0]}: {e.strerror}'
+            return grep
+
+    return None
+
+#==========================================================
+#  Boot cache
+#==========================================================
+
+def has_expired(written: float=0, ttl: float | None=None) -> bool:
+    """
+    Return True if something written at time written has outlived ttl
+    seconds; without a ttl it never expires
+    """
+    return ttl is not None and not (0 <= time.time() - written <= ttl)
+
+def read_boot_cache(name: str=None, key: object=None) -> dict | list | None:
+    """
+    Return the data saved under name during this boot with the same key,
+    or None if there isn't any or it has outlived its ttl
+    """
+    import json
+
+    try:
+        with open(os.path.join(get_runtime_directory(), f'{name}.json'), 'r') as f:
+            cache = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(cache, dict) or cache.get('boot_id') != get_boot_id() or cache.get('key') != key:
+        return None
+
+    if has_expired(written=cache.get('time', 0), ttl=cache.get('ttl')):
+        return None
+
+    return cache.get('data')
+
+def write_boot_cache(name: str=None, data: dict | list=None, key: object=None, ttl: float | None=None):
+    """
+    Save data under name until the next boot, or for ttl seconds if given;
+    key is anything else the data depends on, e.g., a sysfs root
+    """
+    import json
+
+    try:
+        write_file_atomic(os.path.join(get_runtime_directory(), f'{name}.json'), json.dumps({'boot_id': get_boot_id(), 'key': key, 'time': time.time(), 'ttl': ttl, 'data': data}))
+    except OSError:
+        pass
+
+def read_boot_cache_entries(name: str=None, key: object=None) -> dict:
+    """
+    Return the entries saved under name with write_boot_cache_entries,
+    leaving out the ones that have outlived their ttl
+    """
+    entries = read_boot_cache(name=name, key=key)
+    if not isinstance(entries, dict):
+        return {}
+
+    return {entry: record['data'] for entry, record in entries.items() if not has_expired(written=record.get('time', 0), ttl=record.get('ttl'))}
+
+def write_boot_cache_entries(name: str=None, entries: dict={}, key: object=None, ttl: float | None=None, max_entries: int=BOOT_CACHE_MAX_ENTRIES):
+    """
+    Add entries to the ones saved under name, each kept until the next boot
+    or for ttl seconds; past max_entries, the oldest entries are dropped
+    """
+    records = read_boot_cache(name=name, key=key)
+    if not isinstance(records, dict):
+        records = {}
+    records = {entry: record for entry, record in records.items() if not has_expired(written=record.get('time', 0), ttl=record.get('ttl'))}
+    for entry, data in entries.items():
+        records.pop(entry, None)
+        records[entry] = {'time': time.time(), 'ttl': ttl, 'data': data}
+    # Entries are kept in the order they were written
+    records = dict(list(records.items())[-max_entries:])
+    write_boot_cache(name=name, data=records, key=key)
 
 #==========================================================
 #  Process management
 #==========================================================
 
 def polybar_is_running() -> bool:
-    rc, stdout, _ = run_piped_command('pgrep -x polybar')
+    rc, stdout, _ = run_piped_command(['pgrep', '-x', 'polybar'])
     return True if rc == 0 and stdout != '' else False
 
 def process_is_running(name: str=None, full: bool=False):
@@ -83,10 +428,11 @@ def process_is_running(name: str=None, full: bool=False):
     else:
         return False, []
 
-def is_worker_running(lockfile: Path) -> bool:
+def is_worker_running(lockfile: 'Path') -> bool:
     """
     Determine if a worker for a given module is running
     """
+    import psutil
 
     if not lockfile.exists():
         return False
@@ -137,7 +483,7 @@ def processor_speed(number: int=0) -> str:
             return f'{pad_float(number)} {unit}{suffix}'
         number = number / 1000
 
-def byte_converter(number: int=0, unit: Optional[str] = None, use_int: bool=False) -> str:
+def byte_converter(number: int=0, unit: str | None = None, use_int: bool=False) -> str:
     """
     Convert bytes to the given unit.
     """
@@ -171,6 +517,9 @@ def byte_converter(number: int=0, unit: Optional[str] = None, use_int: bool=Fals
 #==========================================================
 
 def to_unix_time(input: str=None) -> int:
+    from datetime import datetime
+    import re
+
     pattern = r'^(0[1-9]|1[0-2]):[0-5][0-9] (AM|PM)$'
     if re.match(pattern, input):
         try:
@@ -189,6 +538,8 @@ def to_unix_time(input: str=None) -> int:
         return 0
 
 def to_24hour_time(input: int=0):
+    from datetime import datetime
+
     try:
         # Convert to datetime (local time)
         dt = datetime.fromtimestamp(input)
@@ -218,9 +569,11 @@ def file_is_executable(filename: str='') -> bool:
     return True if os.access(filename, os.X_OK) else False
 
 def get_home_directory() -> str:
+    from pathlib import Path
     return Path.home()
 
 def get_config_directory() -> str:
+    from pathlib import Path
     return os.path.join(
         Path.home(),
         '.config',
@@ -233,11 +586,53 @@ def get_script_directory() -> str:
         'scripts',
     )
 
+def write_file_atomic(filename: str=None, text: str=''):
+    """
+    Replace a file's contents so a reader sees either the old file or the
+    new one; the temporary file is named after the process, so hooks
+    writing the same file at once don't clobber each other's
+    """
+    temporary = f'{filename}.{os.getpid()}.tmp'
+    try:
+        with open(temporary, 'w') as f:
+            f.write(text)
+        os.replace(temporary, filename)
+    except OSError:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+
+def get_runtime_directory() -> str:
+    """
+    Return a per-user directory for state that only lives until the next
+    reboot, creating it if needed
+    """
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        directory = os.path.join(os.environ['XDG_RUNTIME_DIR'], 'polybar')
+    else:
+        directory = f'/tmp/polybar-{os.getuid()}'
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return directory
+
+def get_boot_id() -> str:
+    """
+    Return the kernel's boot ID, which changes on every boot
+    """
+    try:
+        with open('/proc/sys/kernel/random/boot_id', 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
 #==========================================================
 #  Dependencies and validation
 #==========================================================
 
 def parse_config_file(filename: str='', required_keys: list=[]):
+    import json
+
     # Does the file exist?
     if not file_exists(filename):
         return {}, f'{filename} does not exist'
@@ -261,6 +656,8 @@ def parse_config_file(filename: str='', required_keys: list=[]):
     return config, ''
 
 def parse_json_string(input: str=''):
+    import json
+
     try:
         json_data = json.loads(input)
         return json_data, None
@@ -268,7 +665,8 @@ def parse_json_string(input: str=''):
         return None, err, 
 
 def is_binary_installed(binary_name: str) -> bool:
-    return shutil.which(binary_name)
+    from . import capabilities
+    return capabilities.has_binary(binary_name)
 
 def missing_binaries(binaries: list=[]):
     missing = []
@@ -278,6 +676,8 @@ def missing_binaries(binaries: list=[]):
     return missing
 
 def network_is_reachable():
+    import socket
+
     host = '8.8.8.8'
     port = 53
     timeout = 3
@@ -290,23 +690,21 @@ def network_is_reachable():
 
 def check_network():
     if not network_is_reachable():
-        # How to immport glyphs?
+        from . import glyphs
         error_exit(
-            icon    = surrogatepass('\udb83\udc9c'),
+            icon    = glyphs.md_network_off_outline,
             message = 'the network is unreachable',
         )
 
 def validate_requirements(required: list=[]):
-    missing = []
+    from . import capabilities
 
-    for module in required:
-        if importlib.util.find_spec(module) is None:
-            missing.append(module)
+    missing = [module for module in required if not capabilities.has_module(module)]
 
     if missing:
-        icon = surrogatepass('\udb80\udc26')
+        from . import glyphs
         error_exit(
-            icon    = icon,
+            icon    = glyphs.md_alert,
             message = f'Please install via pip: {", ".join(missing)}',
         )
 
@@ -344,7 +742,45 @@ def pad_float(number: int=0) -> str:
     else:
         return f'{number:.2f}'
 
+BLOCKS = '\u2581\u2582\u2583\u2584\u2585\u2586\u2587\u2588'
+
+# Braille dots filling the left and right columns of a cell from the bottom up;
+# the bottom dot is always drawn so an idle value is still visible
+BRAILLE_LEFT = [0x40, 0x04, 0x02, 0x01]
+BRAILLE_RIGHT = [0x80, 0x20, 0x10, 0x08]
+
+def group_max(values: list=[], groups: int=0) -> list:
+    """
+    Split values into at most groups contiguous groups and return the
+    largest value of each, so one busy item still stands out in a group
+    """
+    if groups <= 0 or len(values) <= groups:
+        return list(values)
+
+    size = -(-len(values) // groups)
+    return [max(values[i:i + size]) for i in range(0, len(values), size)]
+
+def heat_bar(values: list=[], cells: int=32, braille: bool=False) -> str:
+    """
+    Render percentages as a bar of block characters, one per value, or of
+    braille characters holding two values each. Values are grouped to fit
+    in cells characters, and zero is drawn at the lowest level rather than
+    left blank so every value is visible.
+    """
+    if braille:
+        levels = [min(max(round(value * 3 / 100), 0), 3) + 1 for value in group_max(values, cells * 2)]
+        if len(levels) % 2:
+            levels.append(0)
+        return ''.join(
+            chr(0x2800 + sum(BRAILLE_LEFT[:left]) + sum(BRAILLE_RIGHT[:right]))
+            for left, right in zip(levels[0::2], levels[1::2])
+        )
+
+    return ''.join(BLOCKS[min(max(round(value * 7 / 100), 0), 7)] for value in group_max(values, cells))
+
 def to_snake_case(s: str) -> str:
+    import re
+
     # Replace anything that's not a letter or number with underscore
     s = re.sub(r'[^0-9a-zA-Z]+', '_', s)
     # Add underscore between camelCase or PascalCase boundaries
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+from polybar import glyphs, lastknown, power, state, util
+from typing import Dict, Optional, NamedTuple
+import argparse
+import os
+import sys
+import time
+
+class PowerInfo(NamedTuple):
+    success   : Optional[bool] = False
+    error     : Optional[str]  = None
+    rapl      : Optional[bool] = False
+    watts     : Optional[Dict[str, float]] = None
+    residency : Optional[Dict[str, float]] = None
+
+def get_statefile() -> str:
+    statefile = os.path.basename(__file__)
+    statefile_no_ext = os.path.splitext(statefile)[0]
+    return Path.home() / f'.polybar-{statefile_no_ext}-state'
+
+def get_power_info() -> PowerInfo:
+    """
+    Return the power of each RAPL domain and the idle state residency since
+    the last refresh
+    """
+    files = power.get_files()
+    if len(files['rapl']) == 0 and len(files['idle']) == 0:
+        return PowerInfo(
+            success = False,
+            error   = 'no RAPL or cpuidle counters found',
+        )
+
+    previous, current = power.get_samples(name='power-usage', files=files)
+    return PowerInfo(
+        success   = True,
+        rapl      = len(files['rapl']) > 0,
+        watts     = power.get_watts(previous=previous, current=current, domains=files['rapl']),
+        residency = power.get_residency(previous=previous, current=current, cpus=files['cpus']),
+    )
+
+def get_domain_label(name: str=None, packages: int=1) -> str:
+    """
+    Shorten a RAPL domain name, e.g., package-0 to pkg, or pkg0 with more
+    than one package
+    """
+    label = name.replace('package', 'pkg')
+    if packages <= 1:
+        label = label.removesuffix('-0')
+    return label.replace('-', '')
+
+def main():
+    mode_count = 2
+    parser = argparse.ArgumentParser(description='Get power from RAPL and idle state residency from cpuidle')
+    parser.add_argument('-t', '--toggle', action='store_true', help='Toggle the output format', required=False)
+    parser.add_argument('-i', '--interval', help='The update interval (in seconds)', required=False, default=2, type=int)
+    parser.add_argument('-b', '--background', action='store_true', help='Run this script in the background', required=False)
+    args = parser.parse_args()
+
+    # Background mode: periodic updates
+    if args.background:
+        # Wait a bit to let Polybar fully initialize
+        time.sleep(1)
+        while True:
+            if not util.polybar_is_running():
+                sys.exit(0)
+            _, _, _ = util.run_piped_command(['polybar-msg', 'action', 'power-usage', 'hook', '0'])
+            time.sleep(args.interval)
+        sys.exit(0)
+    else:
+        if args.toggle:
+            mode = state.next_state(statefile=get_statefile(), mode_count=mode_count)
+        else:
+            mode = state.read_state(statefile=get_statefile())
+
+        power_info = get_power_info()
+
+        if power_info.success:
+            if mode == 0:
+                if power_info.watts:
+                    packages = len([name for name in power_info.watts if name.startswith('package-')])
+                    output = f'{util.color_title(glyphs.md_flash)} {", ".join(f"{get_domain_label(name, packages)} {watts:.1f} W" for name, watts in power_info.watts.items())}'
+                elif power_info.rapl:
+                    output = f'{util.color_title(glyphs.md_flash)} {util.color_error("the RAPL counters are only readable by root")}'
+                else:
+                    output = f'{util.color_title(glyphs.md_flash)} {util.color_error("no RAPL counters found")}'
+            elif mode == 1:
+                if power_info.residency:
+                    active = max(100 - sum(power_info.residency.values()), 0)
+                    states = [f'{name} {round(percent)}%' for name, percent in power_info.residency.items() if name != 'POLL']
+                    output = f'{util.color_title(glyphs.md_flash)} active {round(active)}%, {", ".join(states)}'
+                else:
+                    output = f'{util.color_title(glyphs.md_flash)} {util.color_error("no cpuidle counters found")}'
+            print(output)
+            lastknown.save(module='power-usage', output=output, values=power_info._asdict())
+            sys.exit(0)
+        else:
+            output = f'{util.color_title(glyphs.md_flash)} {util.color_error(power_info.error)}'
+            print(output)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
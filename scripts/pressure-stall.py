@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+from polybar import capabilities, glyphs, lastknown, pressure, state, util
+from typing import Dict, Optional, NamedTuple
+import argparse
+import os
+import sys
+import time
+
+class PressureInfo(NamedTuple):
+    success : Optional[bool] = False
+    error   : Optional[str]  = None
+    cpu     : Optional[Dict[str, Dict[str, float]]] = None
+    memory  : Optional[Dict[str, Dict[str, float]]] = None
+    io      : Optional[Dict[str, Dict[str, float]]] = None
+
+# How often the worker makes sure polybar is still running while it waits
+# for a trigger; nothing else wakes it while the system is calm
+LIVENESS_INTERVAL = 60
+
+def get_statefile() -> str:
+    statefile = os.path.basename(__file__)
+    statefile_no_ext = os.path.splitext(statefile)[0]
+    return Path.home() / f'.polybar-{statefile_no_ext}-state'
+
+def get_pressure_info() -> PressureInfo:
+    """
+    Read /proc/pressure and return the pressure of each resource
+    """
+    if not capabilities.has_reader('pressure'):
+        return PressureInfo(
+            success = False,
+            error   = 'PSI is not available',
+        )
+
+    pressures = pressure.sample()
+    if len(pressures) == 0:
+        return PressureInfo(
+            success = False,
+            error   = f'failed to read {pressure.PRESSURE_DIRECTORY}',
+        )
+
+    return PressureInfo(
+        success = True,
+        cpu     = pressures.get('cpu'),
+        memory  = pressures.get('memory'),
+        io      = pressures.get('io'),
+    )
+
+def get_peak(pressures: dict={}) -> float:
+    """
+    Return the highest 10 second average of the some lines
+    """
+    return max([resource.get('some', {}).get('avg10', 0.0) for resource in pressures.values()], default=0.0)
+
+def format_pressures(pressure_info: PressureInfo=None, kind: str='some', average: str='avg10', resources: list=pressure.RESOURCES) -> str:
+    labels = {'cpu': 'cpu', 'memory': 'mem', 'io': 'io'}
+    parts = []
+    for resource in resources:
+        values = getattr(pressure_info, resource)
+        if values and kind in values:
+            parts.append(f'{labels[resource]} {values[kind][average]:.2f}%')
+    return ' '.join(parts)
+
+def main():
+    mode_count = 3
+    parser = argparse.ArgumentParser(description='Get pressure stall information from /proc/pressure')
+    parser.add_argument('-t', '--toggle', action='store_true', help='Toggle the output format', required=False)
+    parser.add_argument('-i', '--interval', help='How often to refresh while under pressure, or always if triggers are unavailable (in seconds)', required=False, default=2, type=int)
+    parser.add_argument('-s', '--stall', help='Refresh when tasks are stalled this long within a window (in milliseconds)', required=False, default=100, type=int)
+    parser.add_argument('-w', '--window', help='The trigger window (in milliseconds)', required=False, default=2000, type=int)
+    parser.add_argument('-b', '--background', action='store_true', help='Run this script in the background', required=False)
+    args = parser.parse_args()
+
+    # Background mode: updates when pressure crosses the threshold
+    if args.background:
+        # Wait a bit to let Polybar fully initialize
+        time.sleep(1)
+        triggers = pressure.open_triggers(stall=args.stall, window=args.window)
+        threshold = args.stall * 100 / args.window
+        busy = True
+        while True:
+            if not util.polybar_is_running():
+                sys.exit(0)
+            if len(triggers) > 0:
+                # Once a trigger fires, keep refreshing until the averages
+                # decay below the threshold, then go back to waiting
+                fired = pressure.wait(triggers=triggers, timeout=args.interval if busy else LIVENESS_INTERVAL)
+                if len(fired) == 0 and not busy:
+                    continue
+                busy = len(fired) > 0 or get_peak(pressure.sample()) >= threshold
+            else:
+                time.sleep(args.interval)
+            _, _, _ = util.run_piped_command(['polybar-msg', 'action', 'pressure-stall', 'hook', '0'])
+        sys.exit(0)
+    else:
+        if args.toggle:
+            mode = state.next_state(statefile=get_statefile(), mode_count=mode_count)
+        else:
+            mode = state.read_state(statefile=get_statefile())
+
+        pressure_info = get_pressure_info()
+
+        if pressure_info.success:
+            if mode == 0:
+                output = f'{util.color_title(glyphs.md_gauge)} {format_pressures(pressure_info, average="avg10")}'
+            elif mode == 1:
+                output = f'{util.color_title(glyphs.md_gauge)} 5m {format_pressures(pressure_info, average="avg300")}'
+            elif mode == 2:
+                output = f'{util.color_title(glyphs.md_gauge)} full {format_pressures(pressure_info, kind="full", resources=["memory", "io"])}'
+            print(output)
+            lastknown.save(module='pressure-stall', output=output, values=pressure_info._asdict())
+            sys.exit(0)
+        else:
+            output = f'{util.color_title(glyphs.md_gauge)} {util.color_error(pressure_info.error)}'
+            print(output)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
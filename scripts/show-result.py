@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+
+# A minimal hook-0 entry point for the worker-backed modules, e.g.,
+#   hook-0 = ~/.config/polybar/scripts/show-result.py weather --label san-diego
+# It prints the same thing as "weather.py show --label san-diego" but doesn't
+# make Python compile the whole module script just to print a result file.
+
+from polybar import show
+import os
+import sys
+
+if len(sys.argv) > 1:
+    show.show(script=sys.argv[1], args=sys.argv[2:])
+
+print(f'usage: {os.path.basename(sys.argv[0])} ({"|".join(sorted(show.RESULTS))}) [OPTIONS]')
+sys.exit(1)
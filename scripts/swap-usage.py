@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 from pathlib import Path
-from polybar import glyphs, state, util
+from polybar import capabilities, glyphs, history, lastknown, meminfo, state, util
 from typing import Any, Dict, List, Optional, NamedTuple
 import argparse
 import os
@@ -26,7 +26,40 @@ def get_statefile() -> str:
 
 def get_swap_usage():
     """
-    Execute free -b -w and return a namedtuple with its values
+    Gather swap usage and return it to main()
+    """
+    if capabilities.has_reader('meminfo'):
+        return get_swap_usage_from_proc()
+
+    return get_swap_usage_from_free()
+
+def get_swap_usage_from_proc():
+    """
+    Read /proc/meminfo and return a namedtuple with its values
+    """
+    try:
+        values = meminfo.get()
+    except (OSError, ValueError) as e:
+        return SwapInfo(
+            success = False,
+            error   = f'failed to read {meminfo.MEMINFO}: {e}',
+        )
+
+    pct_used = meminfo.get_pct_used(used=values['swap_used'], total=values['swap_total'])
+    return SwapInfo(
+        success   = True,
+        total     = values['swap_total'],
+        used      = values['swap_used'],
+        free      = values['swap_free'],
+        pct_total = 100,
+        pct_used  = pct_used,
+        pct_free  = 100 - pct_used,
+    )
+
+def get_swap_usage_from_free():
+    """
+    Execute free -b -w when /proc/meminfo can't be read and return a
+    namedtuple with its values
     """
 
     command = 'free -b -w | sed -n "3p"'
@@ -38,7 +71,7 @@ def get_swap_usage():
             used      = int(values[2])
             free      = int(values[3])
             pct_total = 100
-            pct_used  = int(used / total) * 100
+            pct_used  = meminfo.get_pct_used(used=used, total=total)
             pct_free  = pct_total - pct_used
 
             swap_info = SwapInfo(
@@ -65,12 +98,13 @@ def get_swap_usage():
     return swap_info
 
 def main():
-    mode_count = 3
-    parser = argparse.ArgumentParser(description='Get swap usage from free(1)')
+    mode_count = 4
+    parser = argparse.ArgumentParser(description='Get swap usage from /proc/meminfo')
     parser.add_argument('-u', '--unit', help='The unit to use for display', choices=util.get_valid_units(), required=False)
     parser.add_argument('-t', '--toggle', action='store_true', help='Toggle the output format', required=False)
     parser.add_argument('-i', '--interval', help='The update interval (in seconds)', required=False, default=2, type=int)
     parser.add_argument('-b', '--background', action='store_true', help='Run this script in the background', required=False)
+    parser.add_argument('--braille', action='store_true', help='Draw the sparkline with braille, two samples per character', required=False)
     args = parser.parse_args()
 
     # Background mode: periodic updates
@@ -80,7 +114,7 @@ def main():
         while True:
             if not util.polybar_is_running():
                 sys.exit(0)
-            _, _, _ = util.run_piped_command('polybar-msg action swap-usage hook 0')
+            _, _, _ = util.run_piped_command(['polybar-msg', 'action', 'swap-usage', 'hook', '0'])
             time.sleep(args.interval)
         sys.exit(0)
 
@@ -93,6 +127,9 @@ def main():
         swap_info = get_swap_usage()
 
         if swap_info.success:
+            used_history = history.History(name='swap-usage')
+            if not args.toggle:
+                used_history.add(swap_info.used * 100 / swap_info.total if swap_info.total > 0 else 0.0)
             pct_total = f'{swap_info.pct_total}%'
             pct_used  = f'{swap_info.pct_used}%'
             pct_free  = f'{swap_info.pct_free}%'
@@ -106,7 +143,11 @@ def main():
                 output = f'{util.color_title(glyphs.cod_arrow_swap)} {pct_used} used'
             elif mode == 2:
                 output = f'{util.color_title(glyphs.cod_arrow_swap)} {used} used / {free} free'
+            elif mode == 3:
+                stats = used_history.get_stats()
+                output = f'{util.color_title(glyphs.cod_arrow_swap)} {used_history.sparkline(braille=args.braille)} {pct_used} avg {round(stats["mean"])}% p95 {round(stats["p95"])}%'
             print(output)
+            lastknown.save(module='swap-usage', output=output, values=swap_info._asdict())
             sys.exit(0)
         else:
             output = f'{util.color_title(glyphs.cod_arrow_swap)} {util.color_error(swap_info.error)}'
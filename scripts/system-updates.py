@@ -1,15 +1,22 @@
 #!/usr/bin/env python3
 
+import os
+import sys
+
+# hook-0 runs "show" on every refresh; answer it before importing click,
+# configuring logging or checking requirements
+if __name__ == '__main__' and sys.argv[1:2] == ['show']:
+    from polybar import show
+    show.show(script='system-updates', args=sys.argv[2:])
+
 from pathlib import Path
-from polybar import glyphs, util
+from polybar import capabilities, glyphs, lastknown, spawns, util
 from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 import inspect
 import logging
-import os
 import re
 import signal
 import subprocess
-import sys
 import time
 import json
 
@@ -25,6 +32,7 @@ class SystemUpdates(NamedTuple):
 
 CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 VALID_TYPES = ['apt', 'brew', 'dnf', 'flatpak', 'mintupdate', 'pacman', 'snap', 'yay', 'yay-aur', 'yum']
+BINARIES = {'mintupdate': 'mintupdate-cli', 'yay-aur': 'yay'}
 LOGFILE = Path.home() / '.polybar-system-update-result.log'
 LOADING = f'{util.color_title(glyphs.md_timer_outline)} Checking updates...'
 
@@ -60,6 +68,12 @@ def read_tempfile(filename: str = None) -> str:
     with open(filename, 'r') as f:
         return f.read()
 
+def get_placeholder(package_type: str=None, interval: int=300) -> str:
+    """
+    Return the last known result for package_type, or the loading message if there isn't one
+    """
+    return lastknown.get_output(module=f'system-updates-{package_type}', max_age=interval * 2, default=LOADING)
+
 def find_apt_updates(package_type: str = None):
     """
     Execute apt to search for new updates
@@ -406,6 +420,10 @@ def find_updates(package_type: str = ''):
     }
 
     func = dispatch.get(package_type)
+    binary = BINARIES.get(package_type, package_type)
+    if func and not capabilities.has_binary(binary):
+        logging.info(f'[find_updates] {binary} is not installed')
+        func = None
     data = func(package_type=package_type) if func else None
     
     if data:
@@ -417,7 +435,9 @@ def find_updates(package_type: str = ''):
     logging.info(f'[find_updates] data received - output message={message}')
 
     write_tempfile(tempfile, message)
-    subprocess.run(['polybar-msg', 'action', f'#system-updates-{package_type}.hook.0'])
+    if data:
+        lastknown.save(module=f'system-updates-{package_type}', output=message, values=data._asdict())
+    util.run_piped_command(['polybar-msg', 'action', f'#system-updates-{package_type}.hook.0'])
 
 @click.group(context_settings=CONTEXT_SETTINGS)
 def cli():
@@ -450,7 +470,7 @@ def run(type, background, interval):
     """
     util.network_is_reachable()
     tempfile = get_tempfile_name(package_type=type)
-    write_tempfile(tempfile, LOADING)
+    write_tempfile(tempfile, get_placeholder(package_type=type, interval=interval) if background else LOADING)
     logging.info(f'[run] Starting - package_type={type}, background={background}, interval={interval}')
 
     lockfile = get_lockfile(type)
@@ -460,22 +480,24 @@ def run(type, background, interval):
             logging.info(f'[run] worker already running for {type}, exiting')
             return
 
-        subprocess.run(['polybar-msg', 'action', f'#system-updates-{type}.send.{LOADING}'])
+        util.run_piped_command(['polybar-msg', 'action', f'#system-updates-{type}.send.{get_placeholder(package_type=type, interval=interval)}'])
         logging.info(f'[run] launching background worker - package_type={type}, interval={interval}')
 
+        command = [__file__, 'worker', type, '1', str(interval)]
         subprocess.Popen(
-            [__file__, 'worker', type, '1', str(interval)],
+            command,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             stdin=subprocess.DEVNULL,
             start_new_session=True
         )
-        subprocess.run(['polybar-msg', 'action', f'#system-updates-{type}.hook.0'])
+        spawns.record(command=[command])
+        util.run_piped_command(['polybar-msg', 'action', f'#system-updates-{type}.hook.0'])
     else:
-        subprocess.run(['polybar-msg', 'action', f'#system-updates-{type}.send.{LOADING}'])
+        util.run_piped_command(['polybar-msg', 'action', f'#system-updates-{type}.send.{LOADING}'])
         logging.info(f'[run] running in foreground - package_type={type}')
         find_updates(package_type=type)
-        subprocess.run(['polybar-msg', 'action', f'#system-updates-{type}.hook.0'])
+        util.run_piped_command(['polybar-msg', 'action', f'#system-updates-{type}.hook.0'])
 
 @cli.command(name='worker')
 @click.argument('package_type', type=str, required=True)
@@ -513,7 +535,7 @@ def worker(package_type, background, interval):
                         logging.info(f'[worker] polybar not running, shutting down {package_type}')
                         break
                     logging.info(f'[worker] running find_updates - package_type={package_type}, interval={interval}')
-                    subprocess.run(['polybar-msg', 'action', f'#system-updates-{package_type}.send.{LOADING}'])
+                    util.run_piped_command(['polybar-msg', 'action', f'#system-updates-{package_type}.send.{get_placeholder(package_type=package_type, interval=interval)}'])
                     find_updates(package_type=package_type)
                     time.sleep(interval)
             else:
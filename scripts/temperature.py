@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+from polybar import glyphs, lastknown, state, thermal, util
+from typing import Dict, List, Optional, NamedTuple
+import argparse
+import os
+import sys
+import time
+
+class TemperatureInfo(NamedTuple):
+    success   : Optional[bool]  = False
+    error     : Optional[str]   = None
+    package   : Optional[float] = None
+    core      : Optional[float] = None
+    nvme      : Optional[float] = None
+    cores     : Optional[List[float]] = None
+    cores_pct : Optional[List[float]] = None
+    drives    : Optional[Dict[str, float]] = None
+    hot       : Optional[bool]  = False
+    throttled : Optional[bool]  = False
+
+def get_statefile() -> str:
+    statefile = os.path.basename(__file__)
+    statefile_no_ext = os.path.splitext(statefile)[0]
+    return Path.home() / f'.polybar-{statefile_no_ext}-state'
+
+def get_throttled(counters: list=[]) -> bool:
+    """
+    Return True if the cpu was throttled since the last refresh
+    """
+    if len(counters) == 0:
+        return False
+
+    count = thermal.get_throttle_count(counters=counters)
+    previous = util.read_boot_cache(name='thermal-throttle')
+    util.write_boot_cache(name='thermal-throttle', data={'count': count})
+    return previous is not None and count > previous.get('count', count)
+
+def get_temperature_info() -> TemperatureInfo:
+    """
+    Read the cached sensors and return the hottest reading of each kind
+    """
+    sensors = thermal.get()
+    if len(sensors['sensors']) == 0:
+        return TemperatureInfo(
+            success = False,
+            error   = 'no temperature sensors found',
+        )
+
+    readings = thermal.sample(sensors=sensors['sensors'])
+    if readings is None:
+        sensors = thermal.get(rescan=True)
+        readings = thermal.sample(sensors=sensors['sensors']) or []
+
+    if len(readings) == 0:
+        return TemperatureInfo(
+            success = False,
+            error   = 'failed to read the temperature sensors',
+        )
+
+    hottest = {}
+    for reading in readings:
+        hottest[reading['kind']] = max(hottest.get(reading['kind'], reading['temp']), reading['temp'])
+
+    return TemperatureInfo(
+        success   = True,
+        package   = hottest.get('package'),
+        core      = hottest.get('core'),
+        nvme      = hottest.get('nvme'),
+        cores     = [reading['temp'] for reading in readings if reading['kind'] == 'core'],
+        cores_pct = [thermal.get_pct_of_limit(reading) for reading in readings if reading['kind'] == 'core'],
+        drives    = {reading['name']: reading['temp'] for reading in readings if reading['kind'] == 'nvme'},
+        hot       = any(thermal.is_hot(reading) for reading in readings),
+        throttled = get_throttled(counters=sensors['throttle']),
+    )
+
+def format_temp(temp: float=0.0) -> str:
+    return f'{round(temp)}°C'
+
+def main():
+    mode_count = 3
+    parser = argparse.ArgumentParser(description='Get CPU and NVMe temperatures from sysfs')
+    parser.add_argument('-t', '--toggle', action='store_true', help='Toggle the output format', required=False)
+    parser.add_argument('-i', '--interval', help='The update interval (in seconds)', required=False, default=5, type=int)
+    parser.add_argument('-b', '--background', action='store_true', help='Run this script in the background', required=False)
+    parser.add_argument('-c', '--cells', help='The most characters the per-core bar may use', required=False, default=32, type=int)
+    parser.add_argument('--braille', action='store_true', help='Draw the per-core bar with braille, two cores per character', required=False)
+    args = parser.parse_args()
+
+    # Background mode: periodic updates
+    if args.background:
+        # Wait a bit to let Polybar fully initialize
+        time.sleep(1)
+        while True:
+            if not util.polybar_is_running():
+                sys.exit(0)
+            _, _, _ = util.run_piped_command(['polybar-msg', 'action', 'temperature', 'hook', '0'])
+            time.sleep(args.interval)
+        sys.exit(0)
+    else:
+        if args.toggle:
+            mode = state.next_state(statefile=get_statefile(), mode_count=mode_count)
+        else:
+            mode = state.read_state(statefile=get_statefile())
+
+        temperature_info = get_temperature_info()
+
+        if temperature_info.success:
+            icon = util.color_title(glyphs.md_thermometer_alert if temperature_info.hot or temperature_info.throttled else glyphs.md_thermometer)
+            if mode == 0:
+                parts = [f'{label} {format_temp(temp)}' for label, temp in [('pkg', temperature_info.package), ('core', temperature_info.core), ('nvme', temperature_info.nvme)] if temp is not None]
+                output = f'{icon} {" ".join(parts)}'
+            elif mode == 1:
+                if temperature_info.cores:
+                    output = f'{icon} cores {util.heat_bar(temperature_info.cores_pct, cells=args.cells, braille=args.braille)} {format_temp(min(temperature_info.cores))} - {format_temp(max(temperature_info.cores))}'
+                else:
+                    output = f'{icon} {util.color_error("no per-core sensors")}'
+            elif mode == 2:
+                if temperature_info.drives:
+                    output = f'{icon} {" ".join(f"{drive} {format_temp(temp)}" for drive, temp in sorted(temperature_info.drives.items()))}'
+                else:
+                    output = f'{icon} {util.color_error("no NVMe sensors")}'
+            if temperature_info.throttled:
+                output += ' throttled'
+            print(output)
+            lastknown.save(module='temperature', output=output, values=temperature_info._asdict())
+            sys.exit(0)
+        else:
+            output = f'{util.color_title(glyphs.md_thermometer)} {util.color_error(temperature_info.error)}'
+            print(output)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
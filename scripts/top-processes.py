@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+from polybar import glyphs, lastknown, processes, procstat, state, util
+from typing import Any, Dict, List, Optional, NamedTuple
+import argparse
+import json
+import os
+import sys
+import time
+
+class TopProcesses(NamedTuple):
+    success : Optional[bool] = False
+    error   : Optional[str]  = None
+    cpu     : Optional[List[Dict[str, Any]]] = None
+    memory  : Optional[List[Dict[str, Any]]] = None
+
+# The worker's ranking is shown as long as it's this recent; without one the
+# hook measures for procstat.SAMPLE_INTERVAL itself
+MAX_AGE = 30
+
+# The worker ranks at least this many processes, so hooks with any smaller
+# --count can use the same ranking
+MAX_COUNT = 10
+
+def get_statefile() -> str:
+    statefile = os.path.basename(__file__)
+    statefile_no_ext = os.path.splitext(statefile)[0]
+    return Path.home() / f'.polybar-{statefile_no_ext}-state'
+
+def get_ranking_file() -> str:
+    return os.path.join(util.get_runtime_directory(), 'top-processes.json')
+
+def load_ranking(count: int=3) -> dict | None:
+    """
+    Return the ranking the worker saved last if it's recent and long enough
+    for count, or None
+    """
+    try:
+        with open(get_ranking_file(), 'r') as f:
+            ranking = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(ranking, dict) or not (0 <= time.time() - ranking.get('time', 0) <= MAX_AGE) or ranking.get('count', 0) < count:
+        return None
+
+    return ranking
+
+def save_ranking(ranking: dict=None, count: int=3):
+    """
+    Save the worker's ranking with its time and length; it's rewritten
+    every interval, so it's kept out of the boot cache
+    """
+    try:
+        util.write_file_atomic(get_ranking_file(), json.dumps(dict(ranking, count=count, time=time.time())))
+    except OSError:
+        pass
+
+def get_top_processes(count: int=3) -> TopProcesses:
+    """
+    Return the ranking the worker saved last, or measure one now if the
+    worker isn't running
+    """
+    ranking = load_ranking(count=count)
+    if ranking is None:
+        try:
+            sampler = processes.Sampler()
+            sampler.sample(count=count)
+            time.sleep(procstat.SAMPLE_INTERVAL)
+            ranking = sampler.sample(count=count)
+            sampler.close()
+        except OSError as e:
+            return TopProcesses(
+                success = False,
+                error   = f'failed to read {processes.PROC}: {e}',
+            )
+
+    return TopProcesses(
+        success = True,
+        cpu     = ranking['cpu'][:count],
+        memory  = ranking['memory'][:count],
+    )
+
+def main():
+    mode_count = 2
+    parser = argparse.ArgumentParser(description='Get the busiest processes from /proc')
+    parser.add_argument('-n', '--count', help='The number of processes to show', required=False, default=3, type=int)
+    parser.add_argument('-u', '--unit', help='The unit to use for display', choices=util.get_valid_units(), required=False)
+    parser.add_argument('-t', '--toggle', action='store_true', help='Toggle the output format', required=False)
+    parser.add_argument('-i', '--interval', help='The update interval (in seconds)', required=False, default=2, type=int)
+    parser.add_argument('-b', '--background', action='store_true', help='Run this script in the background', required=False)
+    args = parser.parse_args()
+
+    # Background mode: the worker does the sampling, since its descriptors
+    # and counters are what make each sample cheap, and the hook only shows
+    # what it saved
+    if args.background:
+        # Wait a bit to let Polybar fully initialize
+        time.sleep(1)
+        processes.raise_file_limit()
+        count = max(args.count, MAX_COUNT)
+        sampler = processes.Sampler()
+        sampler.sample(count=count)
+        while True:
+            time.sleep(args.interval)
+            if not util.polybar_is_running():
+                sys.exit(0)
+            ranking = sampler.sample(count=count)
+            save_ranking(ranking=ranking, count=count)
+            _, _, _ = util.run_piped_command(['polybar-msg', 'action', 'top-processes', 'hook', '0'])
+        sys.exit(0)
+    else:
+        if args.toggle:
+            mode = state.next_state(statefile=get_statefile(), mode_count=mode_count)
+        else:
+            mode = state.read_state(statefile=get_statefile())
+
+        top_processes = get_top_processes(count=args.count)
+
+        if top_processes.success:
+            if mode == 0:
+                parts = [f'{process["name"]} {round(process["value"])}%' for process in top_processes.cpu]
+            elif mode == 1:
+                parts = [f'{process["name"]} {util.byte_converter(number=process["value"], unit=args.unit)}' for process in top_processes.memory]
+            output = f'{util.color_title(glyphs.cod_graph_line)} {" · ".join(parts)}'
+            print(output)
+            lastknown.save(module='top-processes', output=output, values=top_processes._asdict())
+            sys.exit(0)
+        else:
+            output = f'{util.color_title(glyphs.cod_graph_line)} {util.color_error(top_processes.error)}'
+            print(output)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
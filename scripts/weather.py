@@ -1,16 +1,23 @@
 #!/usr/bin/env python3
 
+import os
+import sys
+
+# hook-0 runs "show" on every refresh; answer it before importing click,
+# configuring logging or checking requirements
+if __name__ == '__main__' and sys.argv[1:2] == ['show']:
+    from polybar import show
+    show.show(script='weather', args=sys.argv[2:])
+
 from pathlib import Path
-from polybar import glyphs, state, util
+from polybar import glyphs, lastknown, spawns, state, util
 from urllib.parse import quote, urlunparse
 from typing import Any, Dict, List, Optional, NamedTuple
 from urllib.request import urlopen, Request
 import json
 import logging
-import os
 import signal
 import subprocess
-import sys
 import time
 import urllib.request
 
@@ -85,6 +92,12 @@ def set_globals(label: str=None, location: str=None):
     TEMPFILE  = Path.home() / f'.polybar-{module_no_ext}-{LABEL}-result.txt'
     LOCKFILE  = Path.home() / f'.polybar-{module_no_ext}-{LABEL}.lock'
 
+def get_placeholder(label: str=None, interval: int=300) -> str:
+    """
+    Return the last known weather for label, or the loading message if there isn't any
+    """
+    return lastknown.get_output(module=f'weather-{label}', max_age=interval * 2, default=LOADING)
+
 def get_weather_icon(condition_code, is_day):
     # https://www.weatherapi.com/docs/weather_conditions.json
     if condition_code == 1000: # Sunny
@@ -280,17 +293,20 @@ def get_weather(api_key: str=None, location: str=None, use_celsius: bool=False,
         logging.info('[get_weather] - writing output to TEMPFILE')
 
         if mode == 0:
-            TEMPFILE.write_text(f'{util.color_title(icon)} {location} {current_temp}')
+            output = f'{util.color_title(icon)} {location} {current_temp}'
         elif mode == 1:
-            TEMPFILE.write_text(f'{util.color_title(icon)} {location} {glyphs.cod_arrow_small_up}{high_temp} {glyphs.cod_arrow_small_down}{low_temp}')
+            output = f'{util.color_title(icon)} {location} {glyphs.cod_arrow_small_up}{high_temp} {glyphs.cod_arrow_small_down}{low_temp}'
         elif mode == 2:
-            TEMPFILE.write_text(f'{util.color_title(glyphs.fa_wind)} {location} {wind_speed} @ {wind_degree}°')
+            output = f'{util.color_title(glyphs.fa_wind)} {location} {wind_speed} @ {wind_degree}°'
         elif mode == 3:
-            TEMPFILE.write_text(f'{util.color_title(glyphs.md_weather_sunny)} {location}  {glyphs.weather_sunrise}  {sunrise} {glyphs.weather_sunset}  {sunset}')
+            output = f'{util.color_title(glyphs.md_weather_sunny)} {location}  {glyphs.weather_sunrise}  {sunrise} {glyphs.weather_sunset}  {sunset}'
         elif mode == 4:
-            TEMPFILE.write_text(f'{util.color_title(glyphs.md_weather_sunny)} {location} {glyphs.weather_moonrise} {moonrise} {glyphs.weather_moonset} {moonset}')
+            output = f'{util.color_title(glyphs.md_weather_sunny)} {location} {glyphs.weather_moonrise} {moonrise} {glyphs.weather_moonset} {moonset}'
         elif mode == 5:
-            TEMPFILE.write_text(f'{util.color_title(glyphs.md_weather_sunny)} {location} humidity {weather_data.humidity}')
+            output = f'{util.color_title(glyphs.md_weather_sunny)} {location} humidity {weather_data.humidity}'
+
+        TEMPFILE.write_text(output)
+        lastknown.save(module=f'weather-{label}', output=output, values=weather_data._asdict())
     else:
         TEMPFILE.write_text(f'{util.color_title(glyphs.md_alert)} {util.color_error(weather_data.error)}')
 
@@ -365,21 +381,23 @@ def run(api_key, location, use_celsius, label, toggle, background, interval):
             logging.info('[worker] worker already running, exiting')
             return
 
-        subprocess.run(['polybar-msg', 'action', f'#weather-{label}.send.{LOADING}'])
+        util.run_piped_command(['polybar-msg', 'action', f'#weather-{label}.send.{get_placeholder(label=label, interval=interval)}'])
         logging.info('[run] launching background worker')
+        command = [__file__, 'worker', api_key, location, str(int(use_celsius)), label, str(mode), str(int(background)), str(interval)]
         subprocess.Popen(
-            [__file__, 'worker', api_key, location, str(int(use_celsius)), label, str(mode), str(int(background)), str(interval)],
+            command,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             stdin=subprocess.DEVNULL,
             start_new_session=True
         )
-        subprocess.run(['polybar-msg', 'action', f'#weather-{label}.hook.0'])
+        spawns.record(command=[command])
+        util.run_piped_command(['polybar-msg', 'action', f'#weather-{label}.hook.0'])
     else:
-        subprocess.run(['polybar-msg', 'action', f'#weather-{label}.send.{LOADING}'])
+        util.run_piped_command(['polybar-msg', 'action', f'#weather-{label}.send.{LOADING}'])
         logging.info('[run] running in foreground')
         get_weather(api_key=api_key, location=location, use_celsius=use_celsius, label=label, mode=mode)
-        subprocess.run(['polybar-msg', 'action', f'#weather-{label}.hook.0'])
+        util.run_piped_command(['polybar-msg', 'action', f'#weather-{label}.hook.0'])
 
 @cli.command()
 @click.argument('api_key', type=str, required=True)
@@ -399,7 +417,7 @@ def worker(api_key, location, use_celsius, label, mode, background=1, interval=3
 
     try:
         while True:
-            subprocess.run(['polybar-msg', 'action', f'#weather-{label}.send.{LOADING}'])
+            util.run_piped_command(['polybar-msg', 'action', f'#weather-{label}.send.{get_placeholder(label=label, interval=interval)}'])
             logging.info('[worker] entered main loop iteration')
             if not util.polybar_is_running():
                 logging.info('[worker] polybar not running, shutting down')
@@ -407,7 +425,7 @@ def worker(api_key, location, use_celsius, label, mode, background=1, interval=3
 
             get_weather(api_key=api_key, location=location, use_celsius=bool(use_celsius), label=label, mode=mode)
             logging.info('[worker] returned from get_weather')
-            subprocess.run(['polybar-msg', 'action', f'#weather-{label}.hook.0'])
+            util.run_piped_command(['polybar-msg', 'action', f'#weather-{label}.hook.0'])
 
             if interval > 0:
                 logging.info(f'[worker] sleeping for {interval} seconds before next run')
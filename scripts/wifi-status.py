@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 from pathlib import Path
-from polybar import glyphs, state, util
+from polybar import capabilities, glyphs, lastknown, state, util
 from typing import Any, Dict, List, Optional, NamedTuple
 import os
 import re
@@ -66,7 +66,7 @@ def get_status_icon(signal):
 
 def get_signal(interface: str=None) -> int:
     command = f'iwconfig {interface}'
-    rc, stdout, stderr = util.run_piped_command(command)
+    rc, stdout, stderr = util.run_piped_command(command, timeout=util.COMMAND_TIMEOUT)
     if rc == 0:
         if stdout != '':
             match = re.search(r"Signal level=(-?\d+)\s*dBm", stdout)
@@ -77,16 +77,23 @@ def get_signal(interface: str=None) -> int:
 
 def get_ssid():
     command = f'iwgetid -r'
-    rc, stdout, stderr = util.run_piped_command(command)
+    rc, stdout, stderr = util.run_piped_command(command, timeout=util.COMMAND_TIMEOUT)
     if rc == 0 and stdout != '':
         return stdout
     
     return None
 
 def get_wifi_status(interface: str=None):
+    if not capabilities.has_binary('iw'):
+        return WifiStatus(
+            success   = False,
+            interface = interface,
+            error     = 'iw is not installed',
+        )
+
     output_dict = {}
     command = f'iw dev {interface} link'
-    rc, stdout, stderr = util.run_piped_command(command)
+    rc, stdout, stderr = util.run_piped_command(command, timeout=util.COMMAND_TIMEOUT)
     
     if rc == 0:
         if stdout != '':
@@ -109,7 +116,7 @@ def get_wifi_status(interface: str=None):
         )
 
     command = f'iw dev {interface} info'
-    rc, stdout, stderr = util.run_piped_command(command)
+    rc, stdout, stderr = util.run_piped_command(command, timeout=util.COMMAND_TIMEOUT)
     if rc == 0:
         if stdout != '':
             # channel 48 (5240 MHz), width: 160 MHz, center1: 5250 MHz
@@ -177,7 +184,7 @@ def run(interface, toggle, background, interval):
         while True:
             if not util.polybar_is_running():
                 sys.exit(0)
-            _, _, _ = util.run_piped_command(f'polybar-msg action wifi-status-{INTERFACE_LABEL} hook 0')
+            _, _, _ = util.run_piped_command(['polybar-msg', 'action', f'wifi-status-{INTERFACE_LABEL}', 'hook', '0'])
             time.sleep(interval)
         sys.exit(0)
     else:
@@ -195,6 +202,7 @@ def run(interface, toggle, background, interval):
             elif mode == 1:
                 output = f'{util.color_title(wifi_icon)} {wifi_status.interface} channel {wifi_status.channel} ({wifi_status.frequency} MHz) {wifi_status.bandwidth} MHz width'
             print(output)
+            lastknown.save(module=f'wifi-status-{INTERFACE_LABEL}', output=output, values=wifi_status._asdict())
             sys.exit(0)
         else:
             wifi_icon = glyphs.md_wifi_strength_alert_outline
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+"""
+Build scripts/polybar-scripts.pyz, a zipapp holding every script in scripts/
+and the polybar package as precompiled bytecode.
+
+Running a script from source makes Python compile the whole script on every
+invocation (scripts run as __main__ never get a cached .pyc) and walk the
+filesystem to find the polybar package. The bundle is a single file with
+everything compiled ahead of time and polybar pinned to the copy inside it.
+
+Usage:
+    tools/build-bundle.py              build the bundle
+    tools/build-bundle.py --compare    build it and compare its startup time
+                                       with the source layout
+
+Hooks and launch.py call the bundle with the script name as the first
+argument, e.g., "polybar-scripts.pyz cpu-usage --toggle".
+"""
+
+from pathlib import Path
+import argparse
+import os
+import py_compile
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipapp
+
+SCRIPT_DIRECTORY = Path(__file__).resolve().parent.parent / 'scripts'
+PACKAGE_DIRECTORY = SCRIPT_DIRECTORY / 'polybar'
+BUNDLE_NAME = 'polybar-scripts.pyz'
+INTERPRETER = '/usr/bin/env python3'
+
+# Invocations used by --compare; they import everything a hook would but
+# neither collect anything nor talk to polybar
+COMPARE_COMMANDS = [
+    ['cgroup-usage', '--help'],
+    ['cpu-usage', '--help'],
+    ['filesystem-usage', '--help'],
+    ['kernel-activity', '--help'],
+    ['memory-usage', '--help'],
+    ['power-usage', '--help'],
+    ['pressure-stall', '--help'],
+    ['show-result', 'weather', '--label', 'bundle-compare'],
+    ['stock-quotes', '--help'],
+    ['swap-usage', '--help'],
+    ['temperature', '--help'],
+    ['top-processes', '--help'],
+    ['weather', 'show', '--label', 'bundle-compare'],
+]
+
+MAIN_TEMPLATE = '''\
+# Generated by tools/build-bundle.py
+import marshal
+import os
+import sys
+
+CACHE_TAG = {cache_tag!r}
+SCRIPTS = {scripts!r}
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in SCRIPTS:
+        print(f'usage: {{os.path.basename(sys.argv[0])}} <script> [OPTIONS]; valid scripts are: {{", ".join(SCRIPTS)}}')
+        sys.exit(1)
+
+    if sys.implementation.cache_tag != CACHE_TAG:
+        print(f'{{sys.argv[0]}} was built for {{CACHE_TAG}}; please rebuild it with tools/build-bundle.py')
+        sys.exit(1)
+
+    # Scripts name their state files after __file__ and re-execute it to
+    # start their workers, so make it look like they were run from source
+    name = sys.argv[1]
+    filename = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), f'{{name}}.py')
+    code = marshal.loads(__loader__.get_data(os.path.join(os.path.dirname(__file__), 'scripts', f'{{name}}.pyc'))[16:])
+
+    sys.argv = [filename] + sys.argv[2:]
+    exec(code, {{'__name__': '__main__', '__file__': filename, '__builtins__': __builtins__}})
+
+main()
+'''
+
+def compile_file(source: Path=None, target: Path=None, dfile: str=None):
+    """
+    Write an unchecked hash-based .pyc so zipimport never looks at the source
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    py_compile.compile(
+        str(source),
+        cfile             = str(target),
+        dfile             = dfile,
+        doraise           = True,
+        invalidation_mode = py_compile.PycInvalidationMode.UNCHECKED_HASH,
+    )
+
+def build(target: Path=None) -> Path:
+    """
+    Stage the package and scripts in a temporary directory and zip it up
+    """
+    scripts = sorted(path for path in SCRIPT_DIRECTORY.glob('*.py'))
+
+    with tempfile.TemporaryDirectory() as staging:
+        staging = Path(staging)
+
+        # An explicit __init__ makes polybar a regular package inside the
+        # bundle, so a namespace portion elsewhere on sys.path can't shadow it
+        (staging / 'polybar').mkdir()
+        (staging / 'polybar' / '__init__.py').write_text('')
+        compile_file(staging / 'polybar' / '__init__.py', staging / 'polybar' / '__init__.pyc', 'polybar/__init__.py')
+        for module in sorted(PACKAGE_DIRECTORY.glob('*.py')):
+            shutil.copy2(module, staging / 'polybar' / module.name)
+            compile_file(module, staging / 'polybar' / f'{module.stem}.pyc', f'polybar/{module.name}')
+
+        for script in scripts:
+            compile_file(script, staging / 'scripts' / f'{script.stem}.pyc', script.name)
+
+        (staging / '__main__.py').write_text(MAIN_TEMPLATE.format(
+            cache_tag = sys.implementation.cache_tag,
+            scripts   = [script.stem for script in scripts],
+        ))
+
+        zipapp.create_archive(staging, target=target, interpreter=INTERPRETER)
+
+    return target
+
+def time_command(command: list=[], runs: int=10) -> float:
+    """
+    Return the median wall clock time of command in milliseconds
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings)
+
+def compare(bundle: Path=None, runs: int=10):
+    """
+    Print the startup time of each compare command from source and from the bundle
+    """
+    baseline = time_command([sys.executable, '-c', 'pass'], runs=runs)
+    width = max(len(' '.join(command)) for command in COMPARE_COMMANDS)
+
+    print(f'interpreter startup: {baseline:.1f} ms (median of {runs} runs)')
+    print(f'{"command":<{width}}  {"source":>8}  {"bundle":>8}  {"saved":>8}')
+    for name, *args in COMPARE_COMMANDS:
+        source = time_command([sys.executable, str(SCRIPT_DIRECTORY / f'{name}.py'), *args], runs=runs)
+        bundled = time_command([sys.executable, str(bundle), name, *args], runs=runs)
+        print(f'{" ".join([name, *args]):<{width}}  {source:>6.1f}ms  {bundled:>6.1f}ms  {source - bundled:>6.1f}ms')
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a precompiled bundle of the polybar scripts')
+    parser.add_argument('-o', '--output', help='Where to write the bundle', required=False, default=str(SCRIPT_DIRECTORY / BUNDLE_NAME))
+    parser.add_argument('-c', '--compare', action='store_true', help='Compare startup time with the source layout', required=False)
+    parser.add_argument('-r', '--runs', help='The number of runs per command for --compare', required=False, default=10, type=int)
+    args = parser.parse_args()
+
+    bundle = build(target=Path(args.output))
+    print(f'wrote {bundle} ({os.path.getsize(bundle)} bytes)')
+
+    if args.compare:
+        compare(bundle=bundle, runs=args.runs)
+
+if __name__ == '__main__':
+    main()
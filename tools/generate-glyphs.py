@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+"""
+Generate scripts/polybar/glyphs.py from the surrogate pair definitions below.
+
+NerdFonts documents its code points as UTF-16 surrogate pairs, which is how
+they're listed here. Decoding them at import time costs every hook a round
+trip through the UTF-16 codec for each glyph, so this script decodes them
+once and writes the result out as plain string literals instead.
+
+Usage:
+    tools/generate-glyphs.py            rewrite scripts/polybar/glyphs.py
+    tools/generate-glyphs.py --check    exit non-zero if glyphs.py is stale
+"""
+
+from pathlib import Path
+import argparse
+import importlib.util
+import sys
+
+GLYPHS_FILE = Path(__file__).resolve().parent.parent / 'scripts' / 'polybar' / 'glyphs.py'
+
+# (section, [(name, surrogate pair)])
+GLYPHS = [
+    ('Weather', [
+        ('fa_wind', '\uef16'),
+        ('md_weather_cloudy', '\udb81\udd90'),
+        ('md_weather_hazy', '\udb83\udf30'),
+        ('md_weather_night', '\udb81\udd94'),
+        ('md_weather_night_partly_cloudy', '\udb83\udf31'),
+        ('md_weather_partly_cloudy', '\udb81\udd95'),
+        ('md_weather_partly_rainy', '\udb83\udf33'),
+        ('md_weather_partly_snowy', '\udb83\udf34'),
+        ('md_weather_partly_snowy_rainy', '\udb83\udf35'),
+        ('md_weather_snowy', '\udb81\udd98'),
+        ('md_weather_snowy_heavy', '\udb83\udf36'),
+        ('md_weather_snowy_rainy', '\udb81\ude7f'),
+        ('md_weather_sunny', '\uf185'),
+        ('weather_day_cloudy', '\ue302'),
+        ('weather_day_rain', '\ue308'),
+        ('weather_day_showers', '\ue309'),
+        ('weather_day_sleet', '\ue3aa'),
+        ('weather_day_sleet_storm', '\ue362'),
+        ('weather_day_snow', '\ue30a'),
+        ('weather_day_snow_thunderstorm', '\ue365'),
+        ('weather_day_snow_wind', '\ue35f'),
+        ('weather_day_storm_showers', '\ue30e'),
+        ('weather_day_sunny_overcast', '\ue30c'),
+        ('weather_day_thunderstorm', '\ue30f'),
+        ('weather_moonrise', '\ue3c1'),
+        ('weather_moonset', '\ue3c2'),
+        ('weather_night_alt_sleet', '\ue3ac'),
+        ('weather_night_alt_sleet_storm', '\ue364'),
+        ('weather_night_alt_snow', '\ue327'),
+        ('weather_night_alt_snow_thunderstorm', '\ue367'),
+        ('weather_night_alt_snow_wind', '\ue361'),
+        ('weather_night_cloudy', '\ue32e'),
+        ('weather_night_rain', '\ue333'),
+        ('weather_night_showers', '\ue334'),
+        ('weather_night_sleet', '\ue3ab'),
+        ('weather_night_sleet_storm', '\ue363'),
+        ('weather_night_snow', '\ue335'),
+        ('weather_night_snow_thunderstorm', '\ue366'),
+        ('weather_night_snow_wind', '\ue360'),
+        ('weather_night_storm_showers', '\ue337'),
+        ('weather_night_thunderstorm', '\ue338'),
+        ('weather_sleet', '\ue3ad'),
+        ('weather_snow_wind', '\ue35e'),
+        ('weather_sunrise', '\ue34c'),
+        ('weather_sunset', '\ue34d'),
+    ]),
+    ('WiFi', [
+        ('md_wifi_strength_1', '\udb82\udd1f'),
+        ('md_wifi_strength_1_alert', '\udb82\udd20'),
+        ('md_wifi_strength_1_lock', '\udb82\udd21'),
+        ('md_wifi_strength_1_lock_open', '\udb85\udecb'),
+        ('md_wifi_strength_2', '\udb82\udd22'),
+        ('md_wifi_strength_2_alert', '\udb82\udd23'),
+        ('md_wifi_strength_2_lock', '\udb82\udd24'),
+        ('md_wifi_strength_2_lock_open', '\udb85\udecc'),
+        ('md_wifi_strength_3', '\udb82\udd25'),
+        ('md_wifi_strength_3_alert', '\udb82\udd26'),
+        ('md_wifi_strength_3_lock', '\udb82\udd27'),
+        ('md_wifi_strength_3_lock_open', '\udb85\udecd'),
+        ('md_wifi_strength_4', '\udb82\udd28'),
+        ('md_wifi_strength_4_alert', '\udb82\udd29'),
+        ('md_wifi_strength_4_lock', '\udb82\udd2a'),
+        ('md_wifi_strength_4_lock_open', '\udb85\udece'),
+        ('md_wifi_strength_alert_outline', '\udb82\udd2b'),
+        ('md_wifi_strength_lock_open_outline', '\udb85\udecf'),
+        ('md_wifi_strength_lock_outline', '\udb82\udd2c'),
+        ('md_wifi_strength_off', '\udb82\udd2d'),
+        ('md_wifi_strength_off_outline', '\udb82\udd2e'),
+        ('md_wifi_strength_outline', '\udb82\udd2f'),
+    ]),
+    ('Weather', [
+        ('cod_arrow_small_down', '\uea9d'),
+        ('cod_arrow_small_up', '\ueaa0'),
+        ('cod_graph_line', '\uebe2'),
+    ]),
+    ('CPU', [
+        ('oct_cpu', '\uf4bc'),
+        ('md_cpu_32_bit', '\udb83\udedf'),
+        ('md_cpu_64_bit', '\udb83\udee0'),
+    ]),
+    ('Disk', [
+        ('md_harddisk', '\udb80\udeca'),
+    ]),
+    ('Memory', [
+        ('cod_arrow_swap', '\uebcb'),
+        ('fa_memory', '\uefc5'),
+        ('md_memory', '\udb80\udf5b'),
+    ]),
+    ('Power', [
+        ('md_flash', '\udb80\ude41'),
+    ]),
+    ('Pressure', [
+        ('md_gauge', '\udb80\ude9a'),
+    ]),
+    ('Temperature', [
+        ('md_thermometer', '\udb81\udd0f'),
+        ('md_thermometer_alert', '\udb83\ude01'),
+    ]),
+    ('Speedtest', [
+        ('md_speedometer_slow', '\udb83\udf86'),
+        ('md_speedometer_medium', '\udb83\udf85'),
+        ('md_speedometer_fast', '\udb81\udcc5'),
+    ]),
+    ('Others', [
+        ('cod_package', '\ueb29'),
+        ('fa_arrow_rotate_right', '\uf01e'),
+        ('md_package_variant', '\udb80\udfd6'),
+        ('md_timer_outline', '\udb81\udd1b'),
+    ]),
+    ('Alerts', [
+        ('md_alert', '\udb80\udc26'),
+        ('md_network_off', '\udb83\udc9b'),
+        ('md_network_off_outline', '\udb83\udc9c'),
+        ('oct_alert', '\uf421'),
+    ]),
+]
+
+# (alias, name)
+ALIASES = [
+    ('arrow_up', 'cod_arrow_small_up'),
+]
+
+def surrogatepass(code: str=None) -> str:
+    return code.encode('utf-16', 'surrogatepass').decode('utf-16')
+
+def to_literal(code: str=None) -> str:
+    """
+    Return the decoded glyph as a Python string literal using escapes
+    """
+    return "'" + ''.join(f'\\U{ord(char):08x}' if ord(char) > 0xffff else f'\\u{ord(char):04x}' for char in surrogatepass(code)) + "'"
+
+def generate() -> str:
+    """
+    Render the contents of glyphs.py
+    """
+    lines = [
+        '# Generated by tools/generate-glyphs.py from the NerdFonts surrogate pairs',
+        '# listed there; edit that file and re-run it rather than editing this one.',
+    ]
+    for section, glyphs in GLYPHS:
+        width = max(len(name) for name, _ in glyphs)
+        lines.append('')
+        lines.append(f'# {section}')
+        for name, code in glyphs:
+            lines.append(f'{name:<{width}} = {to_literal(code)}')
+
+    if ALIASES:
+        width = max(len(alias) for alias, _ in ALIASES)
+        lines.append('')
+        lines.append('# Aliases')
+        for alias, name in ALIASES:
+            lines.append(f'{alias:<{width}} = {name}')
+
+    return '\n'.join(lines) + '\n'
+
+def check() -> list:
+    """
+    Compare glyphs.py on disk with the definitions and return any problems
+    """
+    problems = []
+
+    if not GLYPHS_FILE.exists():
+        return [f'{GLYPHS_FILE} does not exist']
+
+    if GLYPHS_FILE.read_text() != generate():
+        problems.append(f'{GLYPHS_FILE} is out of date')
+
+    try:
+        spec = importlib.util.spec_from_file_location('glyphs', GLYPHS_FILE)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except Exception as e:
+        problems.append(f'failed to import {GLYPHS_FILE}: {e}')
+        return problems
+
+    for _, glyphs in GLYPHS:
+        for name, code in glyphs:
+            if getattr(module, name, None) != surrogatepass(code):
+                problems.append(f'{name} does not match its surrogate pair definition')
+
+    for alias, name in ALIASES:
+        if getattr(module, alias, None) != getattr(module, name, None):
+            problems.append(f'{alias} is not an alias of {name}')
+
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate scripts/polybar/glyphs.py')
+    parser.add_argument('-c', '--check', action='store_true', help='Verify glyphs.py instead of rewriting it', required=False)
+    args = parser.parse_args()
+
+    if args.check:
+        problems = check()
+        for problem in problems:
+            print(problem)
+        sys.exit(1 if problems else 0)
+
+    GLYPHS_FILE.write_text(generate())
+    print(f'wrote {GLYPHS_FILE}')
+
+if __name__ == '__main__':
+    main()
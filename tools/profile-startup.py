@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+
+"""
+Profile where the startup time of each script goes.
+
+Every script is run in a fresh interpreter under "-X importtime" with its
+subprocesses, network requests and $HOME replaced by stubs, so the numbers
+reflect the Python side of a hook rather than whatever mpstat or polybar-msg
+happened to cost at the time. Time inside the script is split into phases:
+
+    compile     compiling the script itself, which is never cached
+    imports     time spent in import statements
+    collection  get_*/find_* functions, stubbed commands and HTTP requests
+    rendering   the util formatting helpers and print()
+    ipc         stubbed polybar-msg calls
+    other       everything else, e.g., argument parsing
+
+Interpreter startup (and teardown) is whatever is left of the wall clock time
+once the script's own time is taken away.
+
+Usage:
+    tools/profile-startup.py                    profile every script
+    tools/profile-startup.py --save-baseline    ... and store the results
+    tools/profile-startup.py --compare          ... and compare with them
+"""
+
+# The child side runs before the script it profiles, so only import what the
+# interpreter has already loaded here; anything else would make the script's
+# own imports of it look free. The parent side imports what it needs locally.
+import os
+import sys
+import time
+
+SCRIPT_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+BASELINE_FILE = os.path.join(os.path.expanduser('~'), '.polybar-startup-baseline.json')
+PHASES = ['startup', 'compile', 'imports', 'collection', 'rendering', 'ipc', 'other']
+
+# label: (script, arguments)
+SCRIPTS = {
+    'cgroup-usage'      : ('cgroup-usage.py', ['--cgroup', 'user', '--label', 'session', '--unit', 'auto']),
+    'cpu-usage'         : ('cpu-usage.py', []),
+    'filesystem-usage'  : ('filesystem-usage.py', ['--mountpoint', '/', '--label', 'root', '--unit', 'auto']),
+    'kernel-activity'   : ('kernel-activity.py', []),
+    'memory-usage'      : ('memory-usage.py', ['--unit', 'auto']),
+    'power-usage'       : ('power-usage.py', []),
+    'pressure-stall'    : ('pressure-stall.py', []),
+    'speedtest show'    : ('polybar-speedtest.py', ['show']),
+    'stock-quotes'      : ('stock-quotes.py', ['--symbol', 'GOOG']),
+    'swap-usage'        : ('swap-usage.py', ['--unit', 'auto']),
+    'system-updates show' : ('system-updates.py', ['show', '--type', 'apt']),
+    'temperature'       : ('temperature.py', []),
+    'top-processes'     : ('top-processes.py', ['--unit', 'auto']),
+    'weather show'      : ('weather.py', ['show', '--location', 'San Diego, CA, US', '--label', 'san-diego']),
+    'wifi-status'       : ('wifi-status.py', ['run', '--interface', 'wlo1']),
+}
+
+# Canned output for stubbed commands, keyed by "<command> <last argument>"
+# or just "<command>"; sudo is looked through
+CANNED_OUTPUT = {
+    'blkid'        : '0b1c2d3e-4f50-6172-8394-a5b6c7d8e9f0',
+    'df'           : 'Filesystem         1B-blocks         Used     Available Use% Mounted on\n/dev/nvme0n1p2  502468108288 140187525120  336655560704  30% /',
+    'dmidecode'    : 'Handle 0x0001, DMI type 17, 92 bytes\nMemory Device\n\tData Width: 64 bits\n\tTotal Width: 64 bits\n\tSize: 32 GB\n\tForm Factor: SODIMM\n\tLocator: DIMM 0\n\tType: DDR4\n\tSpeed: 3200 MT/s\n\tConfigured Voltage: 1.2 V',
+    'findmnt'      : '/dev/nvme0n1p2',
+    'free'         : '               total        used        free      shared     buffers       cache   available\nMem:     64156000256  8632000512 40234000384   812000256   512000000 14778000384 55524000768\nSwap:     2050000896           0  2050000896',
+    'iw info'      : 'Interface wlo1\n\tifindex 3\n\ttype managed\n\tssid example\n\tchannel 48 (5240 MHz), width: 160 MHz, center1: 5250 MHz',
+    'iw link'      : 'Connected to 00:11:22:33:44:55 (on wlo1)\n\tSSID: example\n\tsignal: -48 dBm',
+    'mpstat'       : 'Linux 6.8.0 (host) \t01/01/2025 \t_x86_64_\t(16 CPU)\n\n12:00:00 PM  CPU    %usr   %nice    %sys %iowait    %irq   %soft  %steal  %guest  %gnice   %idle\n12:00:00 PM  all    1.00    0.00    0.50    0.10    0.00    0.05    0.00    0.00    0.00   98.35',
+    'pgrep'        : '4242',
+    'uptime'       : ' 12:00:00 up 1 day,  2:03,  1 user,  load average: 0.20, 0.27, 0.44',
+}
+
+CANNED_RESPONSE = {
+    'finance.yahoo.com' : {'spark': {'result': [{'symbol': 'GOOG', 'response': [{'meta': {'regularMarketPrice': 241.38, 'previousClose': 240.78, 'currency': 'USD', 'symbol': 'GOOG'}}]}]}},
+}
+
+#----------------------------
+# Child side
+#----------------------------
+class PhaseTimer:
+    """
+    Attribute wall clock time to the innermost active phase
+    """
+    def __init__(self):
+        self.totals = {phase: 0.0 for phase in PHASES}
+        self.counts = {'spawns': 0, 'ipc': 0}
+        self.stack = ['other']
+        self.last = time.perf_counter()
+
+    def switch(self):
+        now = time.perf_counter()
+        self.totals[self.stack[-1]] += now - self.last
+        self.last = now
+
+    def wrap(self, phase: str=None, func=None):
+        def wrapper(*args, **kwargs):
+            self.switch()
+            self.stack.append(phase)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.switch()
+                self.stack.pop()
+        wrapper.__wrapped__ = func
+        return wrapper
+
+def canned_output(argv: list=[], stdin: str='') -> str:
+    """
+    Return the stubbed output of a command, doing simple text filters in process
+    """
+    import re
+
+    if argv[0] == 'sudo':
+        argv = argv[1:]
+
+    name = os.path.basename(argv[0])
+    if name == 'tail' and '-n' in argv:
+        return '\n'.join(stdin.splitlines()[-int(argv[argv.index('-n') + 1]):])
+    if name == 'sed' and '-n' in argv:
+        match = re.match(r'(\d+)p', argv[argv.index('-n') + 1])
+        lines = stdin.splitlines()
+        return lines[int(match.group(1)) - 1] if match and int(match.group(1)) <= len(lines) else ''
+    if name in ['cat', 'grep']:
+        filename = argv[-1]
+        try:
+            if filename.startswith('-') or name == 'grep' and len(argv) < 3:
+                text = stdin
+            else:
+                with open(filename, 'r') as f:
+                    text = f.read()
+        except OSError:
+            return ''
+        if name == 'cat':
+            return text
+        pattern = [arg for arg in argv[1:-1] if not arg.startswith('-') and not arg.isdigit()][0]
+        lines = [line for line in text.splitlines() if re.search(pattern, line)]
+        return str(len(lines)) if '-c' in argv else '\n'.join(lines[:1] if '-m' in argv else lines)
+
+    return CANNED_OUTPUT.get(f'{name} {argv[-1]}', CANNED_OUTPUT.get(name, ''))
+
+class FakePipe:
+    def __init__(self, text: str=''):
+        self.text = text
+
+    def close(self):
+        pass
+
+class FakePopen:
+    """
+    Stand-in for subprocess.Popen that returns canned output immediately
+    """
+    timer = None
+
+    def __init__(self, args, stdin=None, stdout=None, stderr=None, **kwargs):
+        FakePopen.timer.counts['spawns'] += 1
+        argv = args if isinstance(args, list) else args.split()
+        self.args = argv
+        self.pid = 4242
+        self.returncode = 0
+        self.output = canned_output(argv, stdin.text if isinstance(stdin, FakePipe) else '')
+        self.stdout = FakePipe(self.output)
+        self.stderr = None
+
+    def communicate(self, input=None, timeout=None):
+        return self.output.encode(), b''
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def poll(self):
+        return self.returncode
+
+def is_loaded(name: str=None, patched: set=None) -> bool:
+    """
+    Return True once a module has finished importing and hasn't been patched yet
+    """
+    module = sys.modules.get(name)
+    if module is None or name in patched:
+        return False
+    return not getattr(getattr(module, '__spec__', None), '_initializing', False)
+
+def install_stubs(timer: PhaseTimer=None, patched: set=None):
+    """
+    Stub out subprocess and urllib.request once the script has imported them,
+    and time the polybar.util formatting helpers
+    """
+    if is_loaded('subprocess', patched):
+        patched.add('subprocess')
+        subprocess = sys.modules['subprocess']
+        FakePopen.timer = timer
+
+        def popen(args, *rest, **kwargs):
+            argv = args if isinstance(args, list) else args.split()
+            return timer.wrap('ipc' if os.path.basename(argv[0]) == 'polybar-msg' else 'collection', FakePopen)(args, *rest, **kwargs)
+
+        def run(args, *rest, **kwargs):
+            if os.path.basename(args[0]) == 'polybar-msg':
+                timer.counts['ipc'] += 1
+            proc = popen(args, *rest, **kwargs)
+            return subprocess.CompletedProcess(args, proc.returncode, proc.output, '')
+
+        subprocess.Popen = popen
+        subprocess.run = run
+
+    if is_loaded('urllib.request', patched):
+        patched.add('urllib.request')
+        request = sys.modules['urllib.request']
+
+        class FakeResponse:
+            status = 200
+
+            def __init__(self, url: str=''):
+                import json
+                host = next((host for host in CANNED_RESPONSE if host in url), None)
+                self.body = json.dumps(CANNED_RESPONSE.get(host, {})).encode()
+
+            def read(self):
+                return self.body
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                return False
+
+        def urlopen(url, *args, **kwargs):
+            return FakeResponse(url if isinstance(url, str) else url.full_url)
+
+        request.urlopen = timer.wrap('collection', urlopen)
+
+    if is_loaded('polybar.util', patched):
+        patched.add('polybar.util')
+        util = sys.modules['polybar.util']
+        for name in ['byte_converter', 'color_error', 'color_title', 'network_speed', 'pad_float', 'processor_speed']:
+            setattr(util, name, timer.wrap('rendering', getattr(util, name)))
+
+class ScriptGlobals(dict):
+    """
+    Module globals that wrap the script's collection functions as it defines them
+    """
+    timer = None
+
+    def __setitem__(self, key, value):
+        if callable(value) and getattr(value, '__module__', None) == '__main__' and key.startswith(('get_', 'find_', 'run_')):
+            value = ScriptGlobals.timer.wrap('collection', value)
+        super().__setitem__(key, value)
+
+def child(result_file: str=None, script: str=None, args: list=[]):
+    """
+    Run script with stubs in place and write the phase totals to result_file
+    """
+    import builtins
+
+    start = time.perf_counter()
+    timer = PhaseTimer()
+    patched = set()
+    original_import = builtins.__import__
+    original_print = builtins.print
+
+    def timed_import(*import_args, **import_kwargs):
+        try:
+            return original_import(*import_args, **import_kwargs)
+        finally:
+            install_stubs(timer=timer, patched=patched)
+
+    builtins.__import__ = timer.wrap('imports', timed_import)
+    builtins.print = timer.wrap('rendering', original_print)
+
+    ScriptGlobals.timer = timer
+    sys.argv = [script] + args
+    sys.path.insert(0, os.path.dirname(script))
+    timer.switch()
+    timer.totals = {phase: 0.0 for phase in PHASES}
+    timer.stack = ['compile']
+    with open(script, 'r') as f:
+        code = compile(f.read(), script, 'exec')
+    timer.switch()
+    timer.stack = ['other']
+
+    exit_code = 0
+    print('profile-startup: begin', file=sys.stderr, flush=True)
+    try:
+        exec(code, ScriptGlobals({'__name__': '__main__', '__file__': script, '__builtins__': builtins}))
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception as e:
+        original_print(f'profile-startup: {script} raised {e!r}', file=sys.stderr)
+        exit_code = 1
+    timer.switch()
+
+    import json
+    with open(result_file, 'w') as f:
+        f.write(json.dumps({
+            'exit_code' : exit_code,
+            'elapsed'   : (time.perf_counter() - start) * 1000,
+            'phases'    : {phase: total * 1000 for phase, total in timer.totals.items()},
+            'counts'    : timer.counts,
+        }))
+    os._exit(0)
+
+#----------------------------
+# Parent side
+#----------------------------
+def parse_importtime(stderr: str='') -> dict:
+    """
+    Return {module: self time in ms} for the imports made by the script
+    """
+    import re
+
+    modules = {}
+    started = False
+    for line in stderr.splitlines():
+        if line == 'profile-startup: begin':
+            started = True
+            continue
+        match = re.match(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)', line)
+        if started and match:
+            modules[match.group(3)] = int(match.group(1)) / 1000
+
+    return modules
+
+def profile_script(label: str=None, runs: int=5) -> dict:
+    """
+    Run a script runs times and return the median of each phase
+    """
+    import json
+    import statistics
+    import subprocess
+    import tempfile
+
+    script, args = SCRIPTS[label]
+    samples = []
+    modules = {}
+    with tempfile.TemporaryDirectory() as home:
+        # Keep the runtime caches and spawn log of these runs out of the real ones
+        env = dict(os.environ, HOME=home, XDG_RUNTIME_DIR=home)
+        for _ in range(runs):
+            result_file = os.path.join(home, 'result.json')
+            start = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, '-X', 'importtime', __file__, '--child', result_file, os.path.join(SCRIPT_DIRECTORY, script), *args],
+                stdout = subprocess.DEVNULL,
+                stderr = subprocess.PIPE,
+                env    = env,
+                text   = True,
+            )
+            wall = (time.perf_counter() - start) * 1000
+            with open(result_file, 'r') as f:
+                result = json.loads(f.read())
+            result['phases']['startup'] = wall - result['elapsed']
+            result['wall'] = wall
+            samples.append(result)
+            modules = parse_importtime(proc.stderr)
+
+    return {
+        'wall'      : statistics.median(sample['wall'] for sample in samples),
+        'phases'    : {phase: statistics.median(sample['phases'][phase] for sample in samples) for phase in PHASES},
+        'counts'    : samples[-1]['counts'],
+        'exit_code' : samples[-1]['exit_code'],
+        'modules'   : dict(sorted(modules.items(), key=lambda item: item[1], reverse=True)[:8]),
+    }
+
+def print_results(results: dict={}, baseline: dict=None, detail: bool=False):
+    width = max([len(label) for label in results] + [len("  vs baseline")])
+    header = f'{"script":<{width}}  {"total":>7}  ' + '  '.join(f'{phase:>10}' for phase in PHASES) + f'  {"spawns":>6}  {"ipc":>3}  rc'
+    print(header)
+    for label, result in results.items():
+        line = f'{label:<{width}}  {result["wall"]:>5.1f}ms  ' + '  '.join(f'{result["phases"][phase]:>8.1f}ms' for phase in PHASES)
+        line += f'  {result["counts"]["spawns"]:>6}  {result["counts"]["ipc"]:>3}  {result["exit_code"]}'
+        print(line)
+        if baseline and label in baseline:
+            before = baseline[label]
+            print(f'{"  vs baseline":<{width}}  {result["wall"] - before["wall"]:>+5.1f}ms  ' + '  '.join(f'{result["phases"][phase] - before["phases"][phase]:>+8.1f}ms' for phase in PHASES))
+        if detail:
+            for module, self_time in result['modules'].items():
+                print(f'{"":<{width}}    {self_time:>6.1f}ms  {module}')
+
+def find_regressions(results: dict={}, baseline: dict={}, threshold: float=10.0) -> list:
+    """
+    Return the scripts whose total time grew by more than threshold percent
+    """
+    regressions = []
+    for label, result in results.items():
+        if label in baseline and baseline[label]['wall'] > 0:
+            growth = (result['wall'] - baseline[label]['wall']) / baseline[label]['wall'] * 100
+            if growth > threshold:
+                regressions.append(f'{label} is {growth:.0f}% slower than the baseline ({baseline[label]["wall"]:.1f}ms -> {result["wall"]:.1f}ms)')
+    return regressions
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(result_file=sys.argv[2], script=sys.argv[3], args=sys.argv[4:])
+
+    from pathlib import Path
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Profile the startup time of the polybar scripts')
+    parser.add_argument('-s', '--script', action='append', choices=list(SCRIPTS), help='Only profile this script (repeatable)', required=False)
+    parser.add_argument('-r', '--runs', help='The number of runs per script', required=False, default=5, type=int)
+    parser.add_argument('-d', '--detail', action='store_true', help='Show the slowest imported modules for each script', required=False)
+    parser.add_argument('-b', '--baseline', help='The baseline file', required=False, default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline', required=False)
+    parser.add_argument('--compare', action='store_true', help='Compare the results with the baseline', required=False)
+    parser.add_argument('--threshold', help='Percent slowdown --compare reports as a regression', required=False, default=10.0, type=float)
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = json.loads(Path(args.baseline).read_text())
+        except (OSError, ValueError) as e:
+            print(f'failed to read the baseline {args.baseline}: {e}')
+            sys.exit(1)
+
+    results = {label: profile_script(label=label, runs=args.runs) for label in (args.script or SCRIPTS)}
+    print_results(results=results, baseline=baseline, detail=args.detail)
+
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(results, indent=4))
+        print(f'wrote the baseline to {args.baseline}')
+
+    if baseline:
+        regressions = find_regressions(results=results, baseline=baseline, threshold=args.threshold)
+        for regression in regressions:
+            print(regression)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()